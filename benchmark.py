@@ -0,0 +1,281 @@
+# benchmark.py
+
+from statistics import mean, median, stdev
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from generate import generate_faces
+from puzzle.engines import ENGINES
+from puzzle.puzzle import Puzzle
+from puzzle.puzzle_solver import PuzzleSolver
+from puzzle.search_budget import SearchBudget, SolveResult
+
+# Solver configurations by name: every engine, backtrack being the
+# candidate list kernel, plus the bitmask kernel and the dead state memo
+CONFIGURATIONS: Dict[str, Callable[[Puzzle], PuzzleSolver]] = {
+    **ENGINES,
+    "backtrack-bitmask": lambda puzzle: PuzzleSolver(puzzle, bitmask_kernel=True),
+    "backtrack-memo": lambda puzzle: PuzzleSolver(puzzle, memo_size=1 << 16),
+}
+
+# Generated puzzles: (cols, rows) and (min, max) face values, one seed each
+GENERATED_SIZES = [(4, 4), (6, 6), (8, 8)]
+GENERATED_FACES_RANGES = [(1, 9), (1, 50)]
+GENERATED_SEED = 1
+
+# Relative increase of a metric reported as a regression
+DEFAULT_THRESHOLD = 0.1
+# Runs faster than this are too noisy for their wall time to be compared
+MIN_COMPARED_SECONDS = 0.001
+
+
+def main():
+    """
+    Main function to run the benchmark suite or compare two of its results.
+    """
+    parser = argparse.ArgumentParser(
+        prog="benchmark",
+        epilog="Example: benchmark run --output baseline.json, then "
+               "benchmark compare baseline.json current.json")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser(
+        "run", help="run every configuration over the benchmark puzzles.")
+    run_parser.add_argument("--output", default=None,
+                            help="path of the JSON results (default: standard output).")
+    run_parser.add_argument("--configurations", nargs="+", choices=sorted(CONFIGURATIONS),
+                            default=sorted(CONFIGURATIONS),
+                            help="solver configurations (default: all of them).")
+    run_parser.add_argument("--puzzles", default="puzzles",
+                            help="directory of the bundled puzzles (default: puzzles).")
+    run_parser.add_argument("--repeats", type=int, default=5,
+                            help="timed runs per puzzle and configuration (default: 5).")
+    run_parser.add_argument("--timeout", type=float, default=30,
+                            help="seconds allowed per run (default: 30).")
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="flag the regressions of a result against a baseline.")
+    compare_parser.add_argument("baseline", help="path of the baseline JSON results.")
+    compare_parser.add_argument("current", help="path of the JSON results to check.")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help=f"relative increase flagged as a regression (default: {DEFAULT_THRESHOLD}).")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        if args.repeats < 1:
+            parser.error("The repeats must be a positive integer.")
+        cases = load_cases(args.puzzles) + generate_cases()
+        results = run_benchmark(cases, args.configurations, args.repeats,
+                                args.timeout, log=sys.stderr)
+        if args.output is None:
+            print(json.dumps(results, indent=2))
+        else:
+            with open(args.output, 'w') as file:
+                json.dump(results, file, indent=2)
+        return
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+    regressions = compare_results(baseline, current, args.threshold)
+    for regression in regressions:
+        print(regression)
+    print(f"{len(regressions)} regression(s) above {args.threshold:.0%}.")
+    if regressions:
+        sys.exit(1)
+
+
+def load_cases(directory: str) -> List[Tuple[str, Puzzle]]:
+    """
+    Load the bundled puzzles of a directory.
+
+    Args:
+        directory: Directory of the .txt puzzle files.
+
+    Returns:
+        (name, puzzle) of each puzzle, in name order.
+    """
+    cases = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.txt"))):
+        puzzle = Puzzle.load_puzzle(path)
+        if puzzle is not None:
+            cases.append((os.path.basename(path), puzzle))
+    return cases
+
+
+def generate_cases(sizes: List[Tuple[int, int]] = GENERATED_SIZES, faces_ranges: List[Tuple[int, int]] = GENERATED_FACES_RANGES, seed: int = GENERATED_SEED) -> List[Tuple[str, Puzzle]]:
+    """
+    Generate seeded puzzles over a grid of sizes and face ranges.
+
+    Args:
+        sizes: (cols, rows) of the puzzles.
+        faces_ranges: (min, max) face values of the puzzles.
+        seed: Random seed of every puzzle.
+
+    Returns:
+        (name, puzzle) of each puzzle, named like generate_corpus files.
+    """
+    cases = []
+    for cols, rows in sizes:
+        for faces_range_min, faces_range_max in faces_ranges:
+            faces = generate_faces(cols, rows, faces_range_min,
+                                   faces_range_max, seed)
+            puzzle = Puzzle()
+            puzzle.set_cols(cols)
+            puzzle.set_rows(rows)
+            puzzle.set_faces([int(face) for piece in faces for face in piece])
+            cases.append((f"{cols}x{rows}_{faces_range_min}-{faces_range_max}_seed{seed}",
+                          puzzle))
+    return cases
+
+
+def run_benchmark(cases: List[Tuple[str, Puzzle]], configurations: List[str], repeats: int = 5, timeout: Optional[float] = None, log=None) -> Dict:
+    """
+    Run every configuration over every puzzle.
+
+    Each puzzle is solved repeats times for the wall time, then once more
+    under tracemalloc for the peak memory, which would slow the timed runs
+    down.
+
+    Args:
+        cases: (name, puzzle) of the benchmark puzzles.
+        configurations: Names of the solver configurations, in
+            CONFIGURATIONS.
+        repeats: Timed runs per puzzle and configuration.
+        timeout: Seconds allowed per run, or None for no limit. A case
+            that runs out of time is recorded with no statistics.
+        log: Text stream the progress is written to, or None.
+
+    Returns:
+        Results, with the environment and one entry per "puzzle/configuration"
+        key.
+    """
+    results = {"python": platform.python_version(),
+               "platform": platform.platform(),
+               "repeats": repeats, "timeout": timeout, "cases": {}}
+    for name, puzzle in cases:
+        for configuration in configurations:
+            case = run_case(puzzle, CONFIGURATIONS[configuration], repeats, timeout)
+            results["cases"][f"{name}/{configuration}"] = case
+            if log is not None:
+                seconds = case["seconds"]["median"] if case["status"] == "ok" else None
+                log.write(f"{name}/{configuration}: {case['status']}"
+                          + (f", {seconds:.4f} secs" if seconds is not None else "")
+                          + "\n")
+    return results
+
+
+def run_case(puzzle: Puzzle, create_solver: Callable[[Puzzle], PuzzleSolver], repeats: int, timeout: Optional[float]) -> Dict:
+    """
+    Benchmark one configuration on one puzzle.
+
+    Args:
+        puzzle: Puzzle to solve.
+        create_solver: Solver configuration.
+        repeats: Timed runs.
+        timeout: Seconds allowed per run, or None for no limit.
+
+    Returns:
+        Status ("ok" or "timeout"), number of solutions, nodes visited,
+        wall time statistics in seconds and peak memory in bytes, or None
+        if the traced run ran out of time.
+    """
+    times = []
+    for _ in range(repeats):
+        run = run_solver(puzzle, create_solver, timeout)
+        if run is None:
+            return {"status": "timeout"}
+        num_solutions, num_nodes, seconds = run
+        times.append(seconds)
+
+    # Tracing slows the search down, so this run may still run out of time
+    tracemalloc.start()
+    try:
+        traced = run_solver(puzzle, create_solver, timeout)
+        peak_memory = tracemalloc.get_traced_memory()[1] if traced is not None else None
+    finally:
+        tracemalloc.stop()
+
+    return {"status": "ok", "num_solutions": num_solutions,
+            "num_nodes": num_nodes, "peak_memory": peak_memory,
+            "seconds": {"min": min(times), "median": median(times),
+                        "mean": mean(times),
+                        "stdev": stdev(times) if len(times) > 1 else 0.0}}
+
+
+def run_solver(puzzle: Puzzle, create_solver: Callable[[Puzzle], PuzzleSolver], timeout: Optional[float]) -> Optional[Tuple[int, int, float]]:
+    """
+    Find every solution of a puzzle once.
+
+    Args:
+        puzzle: Puzzle to solve.
+        create_solver: Solver configuration.
+        timeout: Seconds allowed, or None for no limit.
+
+    Returns:
+        (number of solutions, nodes visited, seconds), or None if the run
+        ran out of time.
+    """
+    solver = create_solver(puzzle)
+    result = SolveResult()
+    start_time = time.perf_counter()
+    for _ in solver.iter_within_budget(result, budget=SearchBudget(timeout)):
+        pass
+    seconds = time.perf_counter() - start_time
+    if result.stop_reason == "timeout":
+        return None
+    return result.num_solutions, result.num_nodes, seconds
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Compare benchmark results against a baseline.
+
+    The median wall time, nodes visited and peak memory of every case in
+    both results are compared, as well as the number of solutions, which
+    must not change. Wall times under MIN_COMPARED_SECONDS are not.
+
+    Args:
+        baseline: Results of run_benchmark taken as reference.
+        current: Results of run_benchmark to check.
+        threshold: Relative increase of a metric reported as a regression.
+
+    Returns:
+        Description of each regression, in case order.
+    """
+    regressions = []
+    for key, case in current["cases"].items():
+        reference = baseline["cases"].get(key)
+        if reference is None or reference["status"] != "ok":
+            continue
+        if case["status"] != "ok":
+            regressions.append(f"{key}: {case['status']}")
+            continue
+        if case["num_solutions"] != reference["num_solutions"]:
+            regressions.append(f"{key}: {case['num_solutions']} solution(s), "
+                               f"expected {reference['num_solutions']}")
+
+        metrics = [("seconds", reference["seconds"]["median"], case["seconds"]["median"]),
+                   ("nodes", reference["num_nodes"], case["num_nodes"]),
+                   ("peak memory", reference["peak_memory"], case["peak_memory"])]
+        for metric, before, after in metrics:
+            if before is None or after is None:
+                continue
+            if metric == "seconds" and after < MIN_COMPARED_SECONDS:
+                continue
+            if after > before * (1 + threshold):
+                change = after / before - 1 if before else float("inf")
+                regressions.append(f"{key}: {metric} {before:g} -> {after:g} "
+                                   f"(+{change:.0%})")
+    return regressions
+
+
+if __name__ == "__main__":
+    main()
@@ -1,103 +1,286 @@
 # generate.py
 
-from random import shuffle, randint
+import argparse
+import random
+import struct
 import sys
 import os
-from typing import List
+from typing import Iterator, List, Optional, Sequence, Tuple
+from puzzle.puzzle_format import (BINARY_EXTENSION, get_face_size, pack_faces,
+                                  write_binary_header)
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+# Pieces formatted and written at a time
+CHUNK_SIZE = 1 << 16
+# What to do when the destiny file already exists
+OVERWRITE_POLICIES = ["ask", "overwrite", "skip", "error"]
 
 
 def main():
     """
     Main function to generate a puzzle file, based on user specs.
     """
+    parser = argparse.ArgumentParser(
+        prog="generate", epilog="Example: generate 4 4 1-9 new_puzzle.txt")
+    parser.add_argument("cols", type=int, help="a positive integer.")
+    parser.add_argument("rows", type=int, help="a positive integer.")
+    parser.add_argument("faces_range",
+                        help="a range of positive integers. For example: 1-9")
+    parser.add_argument("filename", help="path of destiny file.")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="random seed, to generate the same puzzle again.")
+    parser.add_argument("--format", choices=["text", "binary"], default=None,
+                        help=f"output format (default: binary for {BINARY_EXTENSION} files, text otherwise).")
+    parser.add_argument("--overwrite", choices=OVERWRITE_POLICIES, default="ask",
+                        help="what to do if the file already exists (default: ask).")
+    args = parser.parse_args()
 
     try:
-        num_cols, num_rows = map(int, sys.argv[1:3])
+        num_cols, num_rows = args.cols, args.rows
 
         if num_cols < 1 or num_rows < 1:
             raise ValueError("Columns and Rows must be positive integers.")
 
-        faces_range_min, faces_range_max = map(int, sys.argv[3].split("-"))
+        faces_range_min, faces_range_max = map(int, args.faces_range.split("-"))
         if faces_range_min < 1 or faces_range_max < faces_range_min:
             raise ValueError("Incorrect range values.")
 
-        destiny_file = sys.argv[4]
-
-        if os.path.exists(destiny_file):
-            user_response = input(
-                f"The file '{destiny_file}' already exists. Do you want to overwrite it? (y/n): ").lower()
-            if user_response != 'y':
-                print("Operation canceled. Choose a different filename.")
-                sys.exit(1)
-
-    except (IndexError, ValueError) as e:
-        print("Error:", e)
-        print("Usage: generate [cols] [rows] [faces_range] [filename]")
-        print("\ncols:\t\ta positive integer.")
-        print("rows:\t\ta positive integer.")
-        print("faces_range:\ta range of positive integers. For example: 1-9")
-        print("filename:\tpath of destiny file.\n")
-        print("Example: generate 4 4 1-9 new_puzzle.txt\n")
-        sys.exit(1)
-
-    # First line (cols rows)
-    first_line = f"{num_cols} {num_rows}\n"
-
-    # Generate puzzle pieces
-    pieces = [[0] * num_cols for _ in range(num_rows)]
+    except ValueError as e:
+        parser.error(str(e))
+
+    destiny_file = args.filename
+    try:
+        if not can_write(destiny_file, args.overwrite):
+            print("Operation canceled. Choose a different filename.")
+            sys.exit(1)
+    except FileExistsError as e:
+        parser.error(str(e))
+
+    binary = (args.format == "binary" if args.format is not None
+              else destiny_file.endswith(BINARY_EXTENSION))
+
+    faces = generate_faces(num_cols, num_rows, faces_range_min,
+                           faces_range_max, args.seed)
+    write_puzzle(destiny_file, num_cols, num_rows, faces, binary)
+
+    print(f"Puzzle file '{destiny_file}' successfully generated.")
+
+
+def can_write(destiny_file: str, overwrite: str) -> bool:
+    """
+    Apply an overwrite policy to a destiny file.
+
+    Args:
+        destiny_file: Path of the file to write.
+        overwrite: One of OVERWRITE_POLICIES. "ask" prompts the user,
+            "overwrite" replaces the file, "skip" keeps it and "error"
+            raises.
+
+    Returns:
+        True if the file can be written, False if it has to be kept.
+
+    Raises:
+        FileExistsError: If the file exists and the policy is "error".
+    """
+    if not os.path.exists(destiny_file) or overwrite == "overwrite":
+        return True
+    if overwrite == "error":
+        raise FileExistsError(f"The file '{destiny_file}' already exists.")
+    if overwrite == "ask":
+        user_response = input(
+            f"The file '{destiny_file}' already exists. Do you want to overwrite it? (y/n): ").lower()
+        return user_response == 'y'
+    return False
+
+
+def generate_faces(num_cols: int, num_rows: int, faces_range_min: int, faces_range_max: int, seed: Optional[int] = None) -> Sequence[Sequence[int]]:
+    """
+    Generate the shuffled and rotated pieces of a random puzzle.
+
+    With NumPy, every face is computed at once as arrays; otherwise the
+    pieces are generated one by one. Both read the same random words, see
+    draw_words, so they give the same puzzle for the same seed.
+
+    Args:
+        num_cols: Number of columns.
+        num_rows: Number of rows.
+        faces_range_min: Smallest face value.
+        faces_range_max: Largest face value.
+        seed: Random seed, or None for a different puzzle every time.
+
+    Returns:
+        Faces [left, top, right, bottom] of each piece, in file order.
+    """
+    if np is not None:
+        return generate_faces_array(num_cols, num_rows, faces_range_min,
+                                    faces_range_max, seed)
+
+    right_words, bottom_words, order_words, rotation_words = draw_words(
+        num_cols, num_rows, seed)
+    span = faces_range_max - faces_range_min + 1
+    right = [faces_range_min + word % span
+             for word, in struct.iter_unpack("<Q", right_words)]
+    bottom = [faces_range_min + word % span
+              for word, in struct.iter_unpack("<Q", bottom_words)]
+
+    # Generate puzzle pieces, borders are represented by 0 in the face value
+    pieces = []
     for row in range(num_rows):
         for col in range(num_cols):
-            pieces[row][col] = generate_piece(
-                col, row, faces_range_min, faces_range_max, pieces)
+            pieces.append([
+                right[row * (num_cols - 1) + col - 1] if col > 0 else 0,
+                bottom[(row - 1) * num_cols + col] if row > 0 else 0,
+                right[row * (num_cols - 1) + col] if col < num_cols - 1 else 0,
+                bottom[row * num_cols + col] if row < num_rows - 1 else 0,
+            ])
 
-    # Shuffle and rotate pieces before writing to file
-    shuffled_pieces = shuffle_pieces(pieces)
+    # Shuffle the pieces by their sort keys, then rotate them
+    keys = [word for word, in struct.iter_unpack("<Q", order_words)]
+    order = sorted(range(len(pieces)), key=keys.__getitem__)
+    rotations = [word % 4 for word, in struct.iter_unpack("<Q", rotation_words)]
+    return [rotate_piece(pieces[index], rotation)
+            for index, rotation in zip(order, rotations)]
 
-    # Write file
-    with open(destiny_file, 'w') as file:
-        # Write first line
-        file.write(first_line)
-        # Write pieces
-        for col in range(num_cols):
-            for row in range(num_rows):
-                file.write(
-                    " ".join(map(str, shuffled_pieces[row][col])) + "\n")
 
-    print(f"Puzzle file '{destiny_file}' successfully generated.")
+def generate_faces_array(num_cols: int, num_rows: int, faces_range_min: int, faces_range_max: int, seed: Optional[int] = None) -> "np.ndarray":
+    """
+    Generate the shuffled and rotated pieces of a random puzzle as arrays.
+
+    The right and bottom faces are whole arrays, the left and top faces
+    are the same arrays shifted by one cell, and the shuffle and rotations
+    are applied as index permutations.
 
+    Args:
+        num_cols: Number of columns.
+        num_rows: Number of rows.
+        faces_range_min: Smallest face value.
+        faces_range_max: Largest face value.
+        seed: Random seed, or None for a different puzzle every time.
 
-def generate_piece(col: int, row: int, faces_range_min: int, faces_range_max: int, pieces: List[List[List[int]]]) -> List[int]:
+    Returns:
+        np.ndarray: Faces [left, top, right, bottom] of each piece, in file
+            order, shape (num_cols * num_rows, 4).
     """
-    Function to generate a valid piece based on its position in the puzzle
-    - Piece format [left_face, top_face, right_face, bottom_face]
-    - Borders of the puzzle are represented by 0 in the face value
+    right_words, bottom_words, order_words, rotation_words = (
+        np.frombuffer(words, dtype="<u8")
+        for words in draw_words(num_cols, num_rows, seed))
+    span = np.uint64(faces_range_max - faces_range_min + 1)
+
+    # Borders of the puzzle are represented by 0 in the face value
+    right = np.zeros((num_rows, num_cols), dtype=np.int64)
+    right[:, :-1] = ((right_words % span).astype(np.int64) + faces_range_min
+                     ).reshape(num_rows, num_cols - 1)
+    bottom = np.zeros((num_rows, num_cols), dtype=np.int64)
+    bottom[:-1, :] = ((bottom_words % span).astype(np.int64) + faces_range_min
+                      ).reshape(num_rows - 1, num_cols)
+    left = np.zeros_like(right)
+    left[:, 1:] = right[:, :-1]
+    top = np.zeros_like(bottom)
+    top[1:, :] = bottom[:-1, :]
+
+    faces = np.stack([left, top, right, bottom], axis=-1).reshape(-1, 4)
+    faces = faces[np.argsort(order_words, kind="stable")]
+
+    # Rotating r times moves face i to (i + r) % 4, as in rotate_piece
+    rotations = (rotation_words % np.uint64(4)).astype(np.int64)
+    sides = (np.arange(4) - rotations[:, None]) % 4
+    return np.take_along_axis(faces, sides, axis=1)
+
+
+def draw_words(num_cols: int, num_rows: int, seed: Optional[int] = None) -> Tuple[bytes, bytes, bytes, bytes]:
     """
-    col_length = len(pieces[0])
-    row_length = len(pieces)
+    Draw the random words of a puzzle, as little-endian unsigned 64-bit
+    integers.
+
+    Every random choice of generate_faces comes from these words, drawn
+    from random.Random whether NumPy is installed or not: a face is the
+    smallest face value plus its word modulo the size of the range, the
+    pieces are sorted by their shuffle words and a piece is rotated by its
+    rotation word modulo 4.
 
-    left_face = pieces[row][col-1][2] if col > 0 else 0
-    top_face = pieces[row-1][col][3] if row > 0 else 0
-    right_face = randint(
-        faces_range_min, faces_range_max) if col < col_length-1 else 0
-    bottom_face = randint(
-        faces_range_min, faces_range_max) if row < row_length-1 else 0
+    Args:
+        num_cols: Number of columns.
+        num_rows: Number of rows.
+        seed: Random seed, or None for a different puzzle every time.
 
-    return [left_face, top_face, right_face, bottom_face]
+    Returns:
+        Words of the right faces and of the bottom faces, in row-major
+        order without the borders, then the shuffle and rotation words of
+        each piece.
+    """
+    rng = random.Random(seed)
+    num_pieces = num_cols * num_rows
+    return (rng.randbytes(8 * num_rows * (num_cols - 1)),
+            rng.randbytes(8 * (num_rows - 1) * num_cols),
+            rng.randbytes(8 * num_pieces),
+            rng.randbytes(8 * num_pieces))
 
 
-def shuffle_pieces(pieces: List[List[List[int]]]) -> List[List[List[int]]]:
+def write_puzzle(destiny_file: str, num_cols: int, num_rows: int, faces: Sequence[Sequence[int]], binary: bool) -> None:
     """
-    Shuffle and randomly rotate the puzzle pieces.
+    Write a puzzle file, streaming the pieces in chunks.
+
+    Args:
+        destiny_file: Path of the file to write.
+        num_cols: Number of columns.
+        num_rows: Number of rows.
+        faces: Faces of each piece, in file order.
+        binary: Write the binary format instead of text.
+    """
+    if binary:
+        max_face = int(faces.max()) if np is not None and isinstance(faces, np.ndarray) \
+            else max((max(piece) for piece in faces), default=0)
+        face_size = get_face_size(max_face)
+        with open(destiny_file, 'wb') as file:
+            write_binary_header(file, num_cols, num_rows, face_size)
+            for chunk in iter_chunks(faces):
+                if np is not None and isinstance(chunk, np.ndarray):
+                    file.write(chunk.astype(f"<u{face_size}").tobytes())
+                else:
+                    file.write(pack_faces([face for piece in chunk for face in piece],
+                                          face_size))
+    else:
+        with open(destiny_file, 'w') as file:
+            # Write first line (cols rows)
+            file.write(f"{num_cols} {num_rows}\n")
+            # Write pieces
+            for chunk in iter_chunks(faces):
+                if np is not None and isinstance(chunk, np.ndarray):
+                    chunk = chunk.tolist()
+                file.write("".join(" ".join(map(str, piece)) + "\n"
+                                   for piece in chunk))
+
+
+def iter_chunks(faces: Sequence[Sequence[int]]) -> Iterator[Sequence[Sequence[int]]]:
     """
-    shuffled_pieces = [piece.copy() for piece in pieces]
-    shuffle(shuffled_pieces)
+    Split the pieces into chunks of CHUNK_SIZE pieces.
+
+    Args:
+        faces: Faces of each piece.
 
-    for col in shuffled_pieces:
-        for piece in col:
-            rotations = randint(0, 3)
-            piece[:] = piece[-rotations:] + piece[:-rotations]
+    Yields:
+        Consecutive slices of the pieces.
+    """
+    for start in range(0, len(faces), CHUNK_SIZE):
+        yield faces[start:start + CHUNK_SIZE]
 
-    return shuffled_pieces
+
+def rotate_piece(piece: List[int], rotations: int) -> List[int]:
+    """
+    Rotate a piece clockwise, moving face i to (i + rotations) % 4.
+
+    Args:
+        piece: Faces [left, top, right, bottom] of the piece.
+        rotations: Number of quarter turns, from 0 to 3.
+
+    Returns:
+        Faces of the rotated piece.
+    """
+    return piece[-rotations:] + piece[:-rotations] if rotations else piece
 
 
 if __name__ == "__main__":
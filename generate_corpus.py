@@ -0,0 +1,224 @@
+# generate_corpus.py
+
+from multiprocessing import Pool, cpu_count
+from random import Random
+from typing import Dict, Iterator, List, Optional, Tuple
+import argparse
+import json
+import os
+from generate import can_write, generate_faces, write_puzzle
+from puzzle.puzzle_format import BINARY_EXTENSION
+
+# Manifest written in the corpus directory unless another path is given
+MANIFEST_NAME = "manifest.jsonl"
+
+# (cols, rows, faces_range_min, faces_range_max, seed, path, binary)
+CorpusTask = Tuple[int, int, int, int, int, str, bool]
+
+
+def main():
+    """
+    Main function to generate a corpus of puzzles over a grid of sizes and
+    face ranges, in parallel.
+    """
+    parser = argparse.ArgumentParser(
+        prog="generate_corpus",
+        epilog="Example: generate_corpus corpus --sizes 4x4 8x8 --faces 1-9 --count 100")
+    parser.add_argument("directory", help="directory of the generated puzzles.")
+    parser.add_argument("--sizes", nargs="+", required=True,
+                        help="puzzle sizes, as colsxrows. For example: 4x4 10x14")
+    parser.add_argument("--faces", nargs="+", default=["1-9"],
+                        help="face ranges (default: 1-9).")
+    parser.add_argument("--count", type=int, default=1,
+                        help="puzzles per size and face range (default: 1).")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed the per-puzzle seeds are drawn from.")
+    parser.add_argument("--format", choices=["text", "binary"], default="text",
+                        help="output format (default: text).")
+    parser.add_argument("--overwrite", choices=["overwrite", "skip", "error"], default="error",
+                        help="what to do with existing files (default: error).")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: CPU count).")
+    parser.add_argument("--manifest", default=None,
+                        help=f"path of the JSONL manifest (default: directory/{MANIFEST_NAME}).")
+    args = parser.parse_args()
+
+    try:
+        sizes = [parse_pair(size, "x", "Invalid size") for size in args.sizes]
+        faces_ranges = [parse_pair(faces_range, "-", "Invalid face range")
+                        for faces_range in args.faces]
+        if any(cols < 1 or rows < 1 for cols, rows in sizes):
+            raise ValueError("Columns and Rows must be positive integers.")
+        if any(low < 1 or high < low for low, high in faces_ranges):
+            raise ValueError("Incorrect range values.")
+        if args.count < 1:
+            raise ValueError("The count must be a positive integer.")
+
+        records = generate_corpus(args.directory, sizes, faces_ranges,
+                                  args.count, args.seed,
+                                  args.format == "binary", args.overwrite,
+                                  args.workers, args.manifest)
+    except (ValueError, FileExistsError) as e:
+        parser.error(str(e))
+
+    num_generated = sum(1 for record in records if record["generated"])
+    print(f"{num_generated} puzzle(s) generated in '{args.directory}', "
+          f"{len(records) - num_generated} kept.")
+
+
+def parse_pair(value: str, separator: str, message: str) -> Tuple[int, int]:
+    """
+    Parse two integers joined by a separator, such as "4x4" or "1-9".
+
+    Args:
+        value: Text to parse.
+        separator: Separator between the two integers.
+        message: Error message prefix.
+
+    Returns:
+        The two integers.
+
+    Raises:
+        ValueError: If the text is not two integers joined by the separator.
+    """
+    parts = value.split(separator)
+    if len(parts) != 2 or not all(part.isdigit() for part in parts):
+        raise ValueError(f"{message}: {value}")
+    return int(parts[0]), int(parts[1])
+
+
+def generate_corpus(directory: str, sizes: List[Tuple[int, int]], faces_ranges: List[Tuple[int, int]], count: int, seed: Optional[int] = None, binary: bool = False, overwrite: str = "error", workers: Optional[int] = None, manifest: Optional[str] = None) -> List[Dict]:
+    """
+    Generate count puzzles for every size and face range, in a pool of
+    worker processes, and write their manifest.
+
+    Each puzzle gets its own seed, drawn from the corpus seed, so any
+    puzzle of the corpus can be generated again from its manifest record.
+    A file kept by the "skip" policy keeps the seed of its record in the
+    previous manifest, or gets None when there is no such record, since
+    the seed drawn this time did not generate it.
+
+    Args:
+        directory: Directory of the generated puzzles, created if needed.
+        sizes: (cols, rows) of the puzzles, repeated ones only once.
+        faces_ranges: (min, max) face values of the puzzles, repeated ones
+            only once.
+        count: Puzzles per size and face range.
+        seed: Seed of the per-puzzle seeds, or None for a different corpus
+            every time.
+        binary: Write the binary format instead of text.
+        overwrite: "overwrite", "skip" or "error", for existing files.
+        workers: Number of worker processes, defaults to the CPU count.
+        manifest: Path of the JSONL manifest, defaults to MANIFEST_NAME in
+            the directory.
+
+    Returns:
+        Manifest records, one per puzzle, in corpus order.
+
+    Raises:
+        FileExistsError: If a file exists and the policy is "error". It is
+            raised before any puzzle is generated.
+    """
+    os.makedirs(directory, exist_ok=True)
+    # A repeated size or face range would write the same files twice, from
+    # different workers at once
+    sizes = list(dict.fromkeys(sizes))
+    faces_ranges = list(dict.fromkeys(faces_ranges))
+    manifest = manifest or os.path.join(directory, MANIFEST_NAME)
+    previous_records = read_manifest(manifest)
+    tasks = list(iter_corpus_tasks(directory, sizes, faces_ranges, count,
+                                   seed, binary))
+
+    # Existing files are all checked before the pool starts
+    pending = [task for task in tasks if can_write(task[5], overwrite)]
+
+    workers = workers or cpu_count()
+    with Pool(workers) as pool:
+        # Small puzzles are cheap, so they are sent in chunks
+        chunksize = max(1, len(pending) // (workers * 8))
+        generated = set(pool.imap_unordered(generate_task, pending, chunksize))
+
+    records = []
+    for cols, rows, faces_range_min, faces_range_max, puzzle_seed, path, _ in tasks:
+        record = {"cols": cols, "rows": rows,
+                  "faces_range": [faces_range_min, faces_range_max],
+                  "seed": puzzle_seed, "path": path,
+                  "generated": path in generated}
+        if not record["generated"]:
+            previous_record = previous_records.get(path, {})
+            is_same_puzzle = all(previous_record.get(key) == record[key]
+                                 for key in ["cols", "rows", "faces_range"])
+            record["seed"] = previous_record.get("seed") if is_same_puzzle else None
+        records.append(record)
+
+    with open(manifest, 'w') as file:
+        for record in records:
+            file.write(json.dumps(record) + "\n")
+    return records
+
+
+def read_manifest(manifest: str) -> Dict[str, Dict]:
+    """
+    Read the records of a previous manifest, if there is one.
+
+    Args:
+        manifest: Path of the JSONL manifest.
+
+    Returns:
+        Records by puzzle path, empty if the manifest does not exist.
+
+    Raises:
+        ValueError: If a line of the manifest is not valid JSON.
+    """
+    if not os.path.exists(manifest):
+        return {}
+    with open(manifest) as file:
+        records = [json.loads(line) for line in file if line.strip()]
+    return {record["path"]: record for record in records}
+
+
+def iter_corpus_tasks(directory: str, sizes: List[Tuple[int, int]], faces_ranges: List[Tuple[int, int]], count: int, seed: Optional[int], binary: bool) -> Iterator[CorpusTask]:
+    """
+    List the puzzles of a corpus, with their seeds and file paths.
+
+    Args:
+        directory: Directory of the generated puzzles.
+        sizes: (cols, rows) of the puzzles.
+        faces_ranges: (min, max) face values of the puzzles.
+        count: Puzzles per size and face range.
+        seed: Seed of the per-puzzle seeds, or None.
+        binary: Use the binary file extension.
+
+    Yields:
+        One task per puzzle, in corpus order.
+    """
+    seeds = Random(seed)
+    extension = BINARY_EXTENSION if binary else ".txt"
+    for cols, rows in sizes:
+        for faces_range_min, faces_range_max in faces_ranges:
+            for index in range(count):
+                file_name = f"{cols}x{rows}_{faces_range_min}-{faces_range_max}_{index:05d}{extension}"
+                yield (cols, rows, faces_range_min, faces_range_max,
+                       seeds.getrandbits(32), os.path.join(directory, file_name),
+                       binary)
+
+
+def generate_task(task: CorpusTask) -> str:
+    """
+    Generate one puzzle of a corpus in a worker process.
+
+    Args:
+        task: (cols, rows, faces_range_min, faces_range_max, seed, path,
+            binary).
+
+    Returns:
+        Path of the generated file.
+    """
+    cols, rows, faces_range_min, faces_range_max, seed, path, binary = task
+    faces = generate_faces(cols, rows, faces_range_min, faces_range_max, seed)
+    write_puzzle(path, cols, rows, faces, binary)
+    return path
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+# chain_solver.py
+
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+from puzzle.compact_piece import Placement
+from puzzle.puzzle_piece import CORNER_PATTERNS
+from puzzle.puzzle_solver import PuzzleSolver
+
+# Double edge class: its two non-zero face values, smallest first
+EdgeKey = Tuple[int, int]
+
+
+class ChainPuzzleSolver(PuzzleSolver):
+    """
+    Engine for one-dimensional puzzles.
+
+    A strip is a path: every double edge piece is an edge between its two
+    face values and the two linear corners are its endpoints, so each
+    assembly is an Eulerian trail between the faces of the corners. The
+    trails are walked without recursion, only taking an edge whose removal
+    keeps the rest of the graph walkable (Fleury's rule), so every branch
+    leads to a solution. Two-dimensional puzzles, and a single piece,
+    fall back to the row-major search.
+    """
+
+    # Trails are not searched row-major
+    resumable = False
+
+    def prepare(self) -> None:
+        """
+        Build the pieces and, for one-dimensional puzzles, the face graph.
+        """
+        super().prepare()
+        if not self.is_strip() or self.infeasible_reason is not None:
+            return
+
+        # Piece ids per double edge class, in puzzle order
+        self.edge_pieces: Dict[EdgeKey, List[int]] = {}
+        self.end_piece = None
+        start_piece, _ = self.find_fixed_corner_piece(self.pieces)
+        for piece in self.pieces:
+            faces = [face for face in piece.get_faces() if face]
+            if piece.is_double_edge():
+                key = (min(faces), max(faces))
+                self.edge_pieces.setdefault(key, []).append(piece.get_id())
+            elif piece is not start_piece:
+                self.end_piece = piece
+
+        # Face values joined by each edge class, per face value
+        self.adjacent_edges: Dict[int, List[EdgeKey]] = {}
+        for key in sorted(self.edge_pieces):
+            self.adjacent_edges.setdefault(key[0], []).append(key)
+            if key[1] != key[0]:
+                self.adjacent_edges.setdefault(key[1], []).append(key)
+
+        self.start_face = max(start_piece.get_faces())
+        self.end_face = max(self.end_piece.get_faces())
+
+    def is_strip(self) -> bool:
+        """
+        Check if the puzzle is a strip with two linear corners.
+
+        Returns:
+            bool: True if the puzzle is one-dimensional with more than one
+                piece.
+        """
+        return (self.puzzle.is_one_dimensional()
+                and self.puzzle.get_cols() * self.puzzle.get_rows() > 1)
+
+    def iter_search(self) -> Iterator[List[List[Optional[Placement]]]]:
+        """
+        Run the search, yielding one solution per class of identical pieces.
+
+        prepare must have been called before.
+
+        Yields:
+            Solution grid of (piece id, rotation) placements.
+        """
+        if not self.is_strip():
+            yield from super().iter_search()
+            return
+
+        for path in self.iter_trails():
+            yield self.build_solution(path)
+
+    def count_by_search(self) -> int:
+        """
+        Count the solutions, one per class of identical pieces, by walking
+        the trails without building their solutions.
+
+        prepare must have been called before.
+
+        Returns:
+            Number of solutions, with identical pieces not swapped.
+        """
+        if not self.is_strip():
+            return super().count_by_search()
+        return sum(1 for _ in self.iter_trails())
+
+    def iter_trails(self) -> Iterator[List[Tuple[EdgeKey, int]]]:
+        """
+        Walk every Eulerian trail from the start face to the end face.
+
+        prepare must have been called before, for a strip.
+
+        Yields:
+            (edge class, face value reached) of every step of each trail,
+            only valid until the next one.
+        """
+        self.remaining_edges = Counter(
+            {key: len(piece_ids) for key, piece_ids in self.edge_pieces.items()})
+        num_edges = sum(self.remaining_edges.values())
+        if not self.has_trail(self.start_face, num_edges):
+            return
+        if num_edges == 0:
+            yield []
+            return
+
+        # The first trail is found in linear time, Fleury's walk then
+        # enumerates every trail and skips it
+        first_path = self.find_trail()
+        self.num_nodes += len(first_path)
+        yield first_path
+
+        # Nodes left before the next budget check, never 0 without budget
+        budget = self.budget
+        countdown = budget.check(self.num_nodes) if budget is not None else -1
+
+        # Each frame holds the moves left to try from the end of the path
+        path: List[Tuple[EdgeKey, int]] = []
+        stack = [self.get_moves(self.start_face, num_edges)]
+        while stack:
+            moves = stack[-1]
+            if not moves:
+                stack.pop()
+                if path:
+                    key, _ = path.pop()
+                    self.remaining_edges[key] += 1
+                continue
+
+            key, next_face = moves.pop()
+            self.remaining_edges[key] -= 1
+            path.append((key, next_face))
+            self.num_nodes += 1
+            countdown -= 1
+            if not countdown:
+                countdown = budget.check(self.num_nodes)
+
+            if len(path) == num_edges:
+                if path != first_path:
+                    yield path
+                path.pop()
+                self.remaining_edges[key] += 1
+            else:
+                stack.append(self.get_moves(next_face,
+                                            num_edges - len(path)))
+
+    def find_trail(self) -> List[Tuple[EdgeKey, int]]:
+        """
+        Find one Eulerian trail from the start face to the end face with
+        Hierholzer's algorithm, in time linear in the number of pieces.
+
+        has_trail must have succeeded for the start face before.
+
+        Returns:
+            (edge class, face value reached) of every step.
+        """
+        remaining_edges = Counter(self.remaining_edges)
+        # Position of the next edge class to try, per face value
+        next_edge = Counter()
+
+        trail = []
+        stack: List[Tuple[Optional[EdgeKey], int]] = [(None, self.start_face)]
+        while stack:
+            face = stack[-1][1]
+            adjacent_edges = self.adjacent_edges.get(face, [])
+            while (
+                next_edge[face] < len(adjacent_edges)
+                and not remaining_edges[adjacent_edges[next_edge[face]]]
+            ):
+                next_edge[face] += 1
+
+            if next_edge[face] < len(adjacent_edges):
+                key = adjacent_edges[next_edge[face]]
+                remaining_edges[key] -= 1
+                stack.append((key, key[1] if key[0] == face else key[0]))
+            else:
+                trail.append(stack.pop())
+
+        # The trail comes out backwards, ending with the start face
+        trail.reverse()
+        return trail[1:]
+
+    def get_moves(self, face: int, num_remaining: int) -> List[Tuple[EdgeKey, int]]:
+        """
+        Get the edges that can be walked next from a face value.
+
+        Args:
+            face: Face value at the end of the path.
+            num_remaining: Number of edges not walked yet.
+
+        Returns:
+            (edge class, face value reached) moves, in reverse order of
+            trial.
+        """
+        available = [key for key in self.adjacent_edges.get(face, [])
+                     if self.remaining_edges[key]]
+
+        moves = []
+        for key in available:
+            next_face = key[1] if key[0] == face else key[0]
+            # A move is safe when it is the only one, when another copy of
+            # the edge is left, or when the rest of the graph stays walkable
+            if (
+                len(available) == 1
+                or self.remaining_edges[key] > 1
+                or self.is_walkable_without(key, next_face, num_remaining - 1)
+            ):
+                moves.append((key, next_face))
+        moves.reverse()
+        return moves
+
+    def is_walkable_without(self, key: EdgeKey, next_face: int, num_remaining: int) -> bool:
+        """
+        Check that the remaining edges can still be walked once one copy of
+        an edge class has been used.
+
+        Args:
+            key: Edge class being walked.
+            next_face: Face value reached through it.
+            num_remaining: Number of edges left after walking it.
+
+        Returns:
+            True if an Eulerian trail to the end face is still possible.
+        """
+        self.remaining_edges[key] -= 1
+        try:
+            return self.has_trail(next_face, num_remaining)
+        finally:
+            self.remaining_edges[key] += 1
+
+    def has_trail(self, face: int, num_remaining: int) -> bool:
+        """
+        Check that an Eulerian trail from a face value to the end face
+        covers every remaining edge.
+
+        Args:
+            face: Face value the trail starts from.
+            num_remaining: Number of edges left.
+
+        Returns:
+            True if such a trail exists, False otherwise.
+        """
+        if num_remaining == 0:
+            return face == self.end_face
+
+        degrees = Counter()
+        for key, count in self.remaining_edges.items():
+            degrees[key[0]] += count
+            degrees[key[1]] += count
+        odd_faces = {vertex for vertex, degree in degrees.items() if degree % 2}
+        if face == self.end_face:
+            if odd_faces:
+                return False
+        elif odd_faces != {face, self.end_face}:
+            return False
+
+        # Every remaining edge has to be reachable from the start face
+        reached = {face}
+        pending = [face]
+        while pending:
+            vertex = pending.pop()
+            for key in self.adjacent_edges.get(vertex, []):
+                if self.remaining_edges[key]:
+                    for neighbour in key:
+                        if neighbour not in reached:
+                            reached.add(neighbour)
+                            pending.append(neighbour)
+        return all(vertex in reached for vertex, degree in degrees.items()
+                   if degree)
+
+    def build_solution(self, path: List[Tuple[EdgeKey, int]]) -> List[List[Optional[Placement]]]:
+        """
+        Build the solution grid of a complete trail.
+
+        Identical pieces are used in puzzle order, so each trail gives the
+        solution the other engines find for the same class assignment.
+
+        Args:
+            path: (edge class, face value reached) of every step.
+
+        Returns:
+            Solution grid of (piece id, rotation) placements.
+        """
+        horizontal = self.puzzle.get_rows() == 1
+        # Sides the strip goes through: left to right or top to bottom
+        entry_side, exit_side = (0, 2) if horizontal else (1, 3)
+
+        start_piece, start_rotation = self.find_fixed_corner_piece(self.pieces)
+        placements = [(start_piece.get_id(), start_rotation)]
+
+        used_copies = Counter()
+        previous_face = self.start_face
+        for key, next_face in path:
+            piece_id = self.edge_pieces[key][used_copies[key]]
+            used_copies[key] += 1
+
+            piece = self.pieces_by_id[piece_id]
+            for rotation in piece.distinct_rotations:
+                faces = piece.get_faces(rotation)
+                if faces[entry_side] == previous_face and faces[exit_side] == next_face:
+                    break
+            placements.append((piece_id, rotation))
+            previous_face = next_face
+
+        end_pattern = CORNER_PATTERNS["right" if horizontal else "bottom"]
+        placements.append((self.end_piece.get_id(),
+                           self.end_piece.find_rotation(end_pattern)))
+
+        if horizontal:
+            return [placements]
+        return [[placement] for placement in placements]
@@ -0,0 +1,176 @@
+# compact_piece.py
+
+from typing import List, Optional, Sequence, Tuple
+from puzzle.puzzle_piece import PuzzlePiece
+
+Faces = Tuple[int, int, int, int]
+Placement = Tuple[int, int]
+
+# Distinct rotations of pieces whose faces repeat every four, two or one
+# rotations
+ALL_ROTATIONS = (0, 1, 2, 3)
+HALF_TURN_ROTATIONS = (0, 1)
+NO_ROTATION = (0,)
+
+
+class CompactPiece:
+    __slots__ = ("id", "rotations", "distinct_rotations")
+
+    def __init__(self, piece_id: int, faces: Sequence[int]):
+        """
+        CompactPiece class constructor.
+
+        An immutable puzzle piece that stores its four rotations up front.
+        Rotation r holds the faces the piece has after r calls to
+        PuzzlePiece.rotate, so solvers can record (piece id, rotation)
+        instead of rotating pieces in place.
+
+        Args:
+            piece_id (int): Identifier for the puzzle piece.
+            faces (Sequence[int]): Faces [left, top, right, bottom].
+        """
+        faces = tuple(faces)
+        # Rotation r is faces[-r:] + faces[:-r]
+        rotations = (faces, faces[3:] + faces[:3], faces[2:] + faces[:2],
+                     faces[1:] + faces[:1])
+        # The faces repeat every one, two or four rotations
+        if rotations[2] != faces:
+            distinct_rotations = ALL_ROTATIONS
+        elif rotations[1] != faces:
+            distinct_rotations = HALF_TURN_ROTATIONS
+        else:
+            distinct_rotations = NO_ROTATION
+
+        set_attribute = object.__setattr__
+        set_attribute(self, "id", piece_id)
+        set_attribute(self, "rotations", rotations)
+        set_attribute(self, "distinct_rotations", distinct_rotations)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompactPiece is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("CompactPiece is immutable")
+
+    def __repr__(self) -> str:
+        return f"CompactPiece({self.id}, {list(self.rotations[0])})"
+
+    @classmethod
+    def from_piece(cls, piece: PuzzlePiece) -> 'CompactPiece':
+        """
+        Build a compact piece from a puzzle piece in its current orientation.
+
+        Args:
+            piece (PuzzlePiece): Puzzle piece to convert.
+
+        Returns:
+            'CompactPiece': Compact copy of the puzzle piece.
+        """
+        return cls(piece.get_id(), piece.get_faces())
+
+    @classmethod
+    def from_pieces(cls, pieces: List[PuzzlePiece]) -> List['CompactPiece']:
+        """
+        Build compact pieces from a list of puzzle pieces.
+
+        Args:
+            pieces (List[PuzzlePiece]): Puzzle pieces to convert.
+
+        Returns:
+            List['CompactPiece']: Compact copies, in the same order.
+        """
+        return [cls.from_piece(piece) for piece in pieces]
+
+    @staticmethod
+    def group_identical(pieces: List['CompactPiece']) -> List[List['CompactPiece']]:
+        """
+        Group the pieces that are identical up to rotation.
+
+        Pieces in the same class are interchangeable, so the solvers only
+        try one of them per cell.
+
+        Args:
+            pieces (List[CompactPiece]): Pieces to group.
+
+        Returns:
+            List[List['CompactPiece']]: Classes in order of first
+                appearance, each with its pieces in the given order. The
+                multiplicity of a class is its length.
+        """
+        classes = {}
+        for piece in pieces:
+            classes.setdefault(min(piece.rotations), []).append(piece)
+        return list(classes.values())
+
+    def get_id(self) -> int:
+        """
+        Get the identifier of the puzzle piece.
+
+        Returns:
+            int: Identifier of the puzzle piece.
+        """
+        return self.id
+
+    def get_faces(self, rotation: int = 0) -> Faces:
+        """
+        Get the faces of the puzzle piece in a given rotation.
+
+        Args:
+            rotation (int): Number of clockwise rotations (0-3).
+
+        Returns:
+            Faces: Faces [left, top, right, bottom] in that rotation.
+        """
+        return self.rotations[rotation]
+
+    def find_rotation(self, pattern: List[int]) -> Optional[int]:
+        """
+        Find the first rotation whose faces match a pattern.
+
+        Args:
+            pattern (List[int]): Target pattern, -1 matches any face value.
+
+        Returns:
+            Optional[int]: Matching rotation or None if there is none.
+        """
+        for rotation in self.distinct_rotations:
+            faces = self.rotations[rotation]
+            if all(pattern[i] == -1 or faces[i] == pattern[i] for i in range(4)):
+                return rotation
+        return None
+
+    def is_corner(self) -> bool:
+        """
+        Check if the puzzle piece is a corner.
+
+        Returns:
+            bool: True if the puzzle piece is a corner, False otherwise.
+        """
+        return self.count_borders() == 2
+
+    def is_linear_corner(self) -> bool:
+        """
+        Check if the puzzle piece is a linear corner.
+
+        Returns:
+            bool: True if the puzzle piece is a linear corner, False otherwise.
+        """
+        return self.count_borders() == 3
+
+    def is_double_edge(self) -> bool:
+        """
+        Check if the puzzle piece is a double edge.
+
+        Returns:
+            bool: True if the puzzle piece is a double edge, False otherwise.
+        """
+        return self.count_borders() == 2
+
+    def count_borders(self) -> int:
+        """
+        Count the number of borders on the puzzle piece.
+
+        Returns:
+            int: Number of borders on the puzzle piece.
+        """
+        return self.rotations[0].count(0)
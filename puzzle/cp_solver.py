@@ -0,0 +1,453 @@
+# cp_solver.py
+
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+from puzzle.compact_piece import Faces, Placement
+from puzzle.puzzle_solver import PuzzleSolver
+
+# (piece mask, piece id, rotation, faces, previous copy mask) of a piece
+# in one rotation
+CellCandidate = Tuple[int, int, int, Faces, int]
+# (side, neighbour cell, side of the neighbour that touches this cell)
+Neighbour = Tuple[int, int, int]
+
+
+class ConstraintPuzzleSolver(PuzzleSolver):
+    """
+    Constraint-propagation engine.
+
+    Instead of filling cells in row-major order, it keeps the candidate
+    domain of every empty cell next to the placed pieces, always branches
+    on the cell with the fewest candidates and prunes as soon as a domain
+    becomes empty or a face value can no longer be paired up.
+    """
+
+    # Cells are not filled in row-major order
+    resumable = False
+
+    def prepare(self) -> None:
+        """
+        Build the pieces, the candidate tables by border pattern and face,
+        and the neighbours of every cell.
+        """
+        super().prepare()
+        cols = self.puzzle.get_cols()
+        rows = self.puzzle.get_rows()
+
+        self.cell_patterns: List[Tuple[bool, bool, bool, bool]] = []
+        self.neighbours: List[List[Neighbour]] = []
+        for cell in range(cols * rows):
+            row, col = divmod(cell, cols)
+            self.cell_patterns.append(
+                (col == 0, row == 0, col == cols - 1, row == rows - 1))
+
+            neighbours = []
+            if col > 0:
+                neighbours.append((0, cell - 1, 2))
+            if row > 0:
+                neighbours.append((1, cell - cols, 3))
+            if col < cols - 1:
+                neighbours.append((2, cell + 1, 0))
+            if row < rows - 1:
+                neighbours.append((3, cell + cols, 1))
+            self.neighbours.append(neighbours)
+
+        # Position of each cell in the neighbour lists of its neighbours
+        self.neighbour_slots: List[List[int]] = [
+            [[other for _, other, _ in self.neighbours[neighbour]].index(cell)
+             for _, neighbour, _ in self.neighbours[cell]]
+            for cell in range(cols * rows)
+        ]
+
+        self.pattern_candidates: Dict[Tuple[bool, ...], List[CellCandidate]] = {}
+        self.side_candidates: Dict[Tuple[Tuple[bool, ...], int, int], List[CellCandidate]] = {}
+        # One bit per candidate, in piece then rotation order, so a domain
+        # is a bitmask and its size a bit count
+        self.bit_candidates: List[CellCandidate] = []
+        self.candidate_bits: Dict[Placement, int] = {}
+        self.piece_candidate_bits: Dict[int, int] = {}
+        for piece in self.pieces:
+            piece_mask = self.piece_masks[piece.get_id()]
+            previous_copy_mask = self.previous_copy_masks[piece.get_id()]
+            self.piece_candidate_bits[piece.get_id()] = 0
+            for rotation in piece.distinct_rotations:
+                faces = piece.get_faces(rotation)
+                pattern = tuple(face == 0 for face in faces)
+                candidate = (piece_mask, piece.get_id(), rotation, faces,
+                             previous_copy_mask)
+                bit = 1 << len(self.bit_candidates)
+                self.bit_candidates.append(candidate)
+                self.candidate_bits[(piece.get_id(), rotation)] = bit
+                self.piece_candidate_bits[piece.get_id()] |= bit
+                self.pattern_candidates.setdefault(
+                    pattern, []).append(candidate)
+                for side in range(4):
+                    if faces[side]:
+                        key = (pattern, side, faces[side])
+                        self.side_candidates.setdefault(
+                            key, []).append(candidate)
+
+        # Identical pieces are only tried once, in puzzle order: placing a
+        # piece makes the next copy available
+        self.next_copies: Dict[int, Optional[int]] = {}
+        for piece_class in self.identical_classes:
+            piece_ids = [piece.get_id() for piece in piece_class]
+            self.next_copies.update(zip(piece_ids, piece_ids[1:] + [None]))
+
+        # Candidate bits per cell pattern and neighbour faces, filled lazily
+        self.constraint_masks: Dict[tuple, int] = {}
+
+    def iter_search(self) -> Iterator[List[List[Optional[Placement]]]]:
+        """
+        Run the search, yielding one solution per class of identical pieces.
+
+        prepare must have been called before.
+
+        Yields:
+            Solution grid of (piece id, rotation) placements.
+        """
+        num_cells = self.puzzle.get_cols() * self.puzzle.get_rows()
+
+        self.current_solution = [[None]*self.puzzle.get_cols()
+                                 for _ in range(self.puzzle.get_rows())]
+        self.placed_faces: List[Optional[Faces]] = [None] * num_cells
+        # Face required by each neighbour of every cell, and the key of its
+        # candidates, kept up to date as pieces are placed and removed
+        self.required_faces: List[List[Optional[int]]] = [
+            [None] * len(neighbours) for neighbours in self.neighbours]
+        self.domain_keys: List[tuple] = [
+            (pattern, tuple(required_faces)) for pattern, required_faces
+            in zip(self.cell_patterns, self.required_faces)]
+        self.frontier: Dict[int, None] = {}
+        # Unused faces per value, and faces of placed pieces still waiting
+        # for a neighbour, per value
+        self.unused_faces = Counter(face for piece in self.pieces
+                                    for face in piece.get_faces() if face)
+        self.demanded_faces = Counter()
+        # Candidates of the pieces that can be placed next: the first
+        # unused copy of every class of identical pieces
+        self.available = 0
+        for piece in self.pieces:
+            if not self.previous_copy_masks[piece.get_id()]:
+                self.available |= self.piece_candidate_bits[piece.get_id()]
+
+        # Same fixed top left corner as the row-major search
+        piece, rotation = self.find_fixed_corner_piece(self.pieces)
+        candidate = (self.piece_masks[piece.get_id()], piece.get_id(),
+                     rotation, piece.get_faces(rotation), 0)
+
+        self.place(0, candidate)
+        if self.is_balanced(list(self.unused_faces)):
+            yield from self.search(candidate[0], 1)
+
+    def search(self, used_pieces: int, num_placed: int) -> Iterator[List[List[Optional[Placement]]]]:
+        """
+        Solve the puzzle, branching on the cell chosen by select_cell.
+
+        The search is iterative, with an explicit stack of frames holding
+        each branching cell, its domain, the cursor of the next candidate
+        to try and the candidate placed, so the puzzle size is not bound
+        by the recursion limit.
+
+        Args:
+            used_pieces: Bitmask of the pieces that have already been used.
+            num_placed: Number of pieces placed so far.
+
+        Yields:
+            Copy of each solution grid found.
+        """
+        num_cells = len(self.placed_faces)
+        if num_placed == num_cells:
+            yield [row[:] for row in self.current_solution]
+            return
+
+        # Frames of [cell, domain, cursor, placed candidate, new frontier,
+        # used pieces before placing it]
+        first_placed = num_placed
+        # Counters are only kept with stats
+        stats = self.stats
+        # Nodes left before the next budget check, never 0 without budget
+        budget = self.budget
+        countdown = budget.check(self.num_nodes) if budget is not None else -1
+        stack = []
+        selected = self.select_cell(used_pieces, num_placed)
+        if selected is not None:
+            stack.append([selected[0], selected[1], 0, None, None, used_pieces])
+
+        while stack:
+            frame = stack[-1]
+            cell, domain, cursor, candidate, new_frontier, used_pieces = frame
+            if candidate is not None:
+                self.remove(cell, candidate, new_frontier)
+
+            # Place the next candidate that passes the checks
+            while cursor < len(domain):
+                candidate = domain[cursor]
+                cursor += 1
+                new_frontier = self.place(cell, candidate)
+                if self.accepts(cell, candidate, used_pieces | candidate[0]):
+                    break
+                self.remove(cell, candidate, new_frontier)
+            else:
+                if stats is not None:
+                    num_tried = cursor - frame[2]
+                    stats.record_tries(self.cell_classes[cell], num_tried, num_tried)
+                    stats.record_backtrack(first_placed + len(stack) - 1)
+                stack.pop()
+                continue
+            if stats is not None:
+                num_tried = cursor - frame[2]
+                stats.record_tries(self.cell_classes[cell], num_tried, num_tried - 1)
+                stats.record_node()
+            frame[2:5] = cursor, candidate, new_frontier
+            self.num_nodes += 1
+            countdown -= 1
+            if not countdown:
+                countdown = budget.check(self.num_nodes)
+
+            num_placed = first_placed + len(stack)
+            used_pieces |= candidate[0]
+            if num_placed == num_cells:
+                yield [row[:] for row in self.current_solution]
+                continue
+
+            selected = self.select_cell(used_pieces, num_placed)
+            if selected is not None:
+                stack.append([selected[0], selected[1], 0, None, None,
+                              used_pieces])
+
+    def select_cell(self, used_pieces: int, num_placed: int) -> Optional[Tuple[int, List[CellCandidate]]]:
+        """
+        Pick the frontier cell with the fewest candidates.
+
+        Args:
+            used_pieces: Bitmask of the pieces that have already been used.
+            num_placed: Number of pieces placed so far.
+
+        Returns:
+            (cell, domain) to branch on, or None at a dead end.
+        """
+        available = self.available
+        domain_keys = self.domain_keys
+        constraint_masks = self.constraint_masks
+        best_cell = None
+        best_size = 0
+        for cell in self.frontier:
+            key_mask = constraint_masks.get(domain_keys[cell])
+            if key_mask is None:
+                key_mask = self.get_key_mask(cell)
+            size = (key_mask & available).bit_count()
+            if not size:
+                # Dead end: an empty cell has no candidate left
+                return None
+            if best_cell is None or size < best_size:
+                best_cell, best_size = cell, size
+                if size == 1:
+                    # Forced cell, later cells are checked one level down
+                    break
+        if best_cell is None:
+            return None
+        return best_cell, self.get_domain(best_cell)
+
+    def accepts(self, cell: int, candidate: CellCandidate, used_pieces: int) -> bool:
+        """
+        Check a candidate just placed before searching below it.
+
+        Args:
+            cell: Cell index, in row-major order.
+            candidate: Candidate placed in the cell.
+            used_pieces: Bitmask of the pieces used, including that piece.
+
+        Returns:
+            True if the search should go on with the candidate placed.
+        """
+        return self.is_balanced(candidate[3])
+
+    def get_domain(self, cell: int) -> List[CellCandidate]:
+        """
+        Get the available candidates that fit an empty cell.
+
+        Args:
+            cell: Cell index, in row-major order.
+
+        Returns:
+            Candidates that fit the cell and its placed neighbours, in
+            piece then rotation order.
+        """
+        domain_mask = self.get_domain_mask(cell)
+        candidates = []
+        while domain_mask:
+            bit = domain_mask & -domain_mask
+            candidates.append(self.bit_candidates[bit.bit_length() - 1])
+            domain_mask ^= bit
+        return candidates
+
+    def get_domain_mask(self, cell: int) -> int:
+        """
+        Get the candidate bits of the domain of an empty cell.
+
+        The candidates that fit the faces of its neighbours only change
+        when a neighbour is placed or removed, and are cached by key. The
+        available candidates drop the bits of a piece when it is placed and
+        get them back on backtrack, so the domain is their intersection.
+
+        Args:
+            cell: Cell index, in row-major order.
+
+        Returns:
+            Bitmask of the candidates of the cell.
+        """
+        key_mask = self.constraint_masks.get(self.domain_keys[cell])
+        if key_mask is None:
+            key_mask = self.get_key_mask(cell)
+        return key_mask & self.available
+
+    def get_key_mask(self, cell: int) -> int:
+        """
+        Find and cache the candidate bits, used or not, that fit the key of
+        an empty cell.
+
+        Args:
+            cell: Cell index, in row-major order.
+
+        Returns:
+            Bitmask of the candidates that fit the cell.
+        """
+        key = self.domain_keys[cell]
+        key_mask = 0
+        for candidate in self.find_candidates(cell, key[1]):
+            key_mask |= self.candidate_bits[(candidate[1], candidate[2])]
+        self.constraint_masks[key] = key_mask
+        return key_mask
+
+    def find_candidates(self, cell: int, required_faces: Tuple[Optional[int], ...]) -> List[CellCandidate]:
+        """
+        Find the candidates, used or not, that fit a cell given the faces
+        required by its placed neighbours.
+
+        Args:
+            cell: Cell index, in row-major order.
+            required_faces: Face required by each neighbour of the cell, or
+                None for the empty ones.
+
+        Returns:
+            Candidates that fit the cell.
+        """
+        known_faces = [(side, face) for (side, _, _), face
+                       in zip(self.neighbours[cell], required_faces)
+                       if face is not None]
+
+        pattern = self.cell_patterns[cell]
+        if not known_faces:
+            return self.pattern_candidates.get(pattern, [])
+
+        side, face = known_faces[0]
+        return [
+            candidate
+            for candidate in self.side_candidates.get((pattern, side, face), [])
+            if all(candidate[3][side] == face for side, face in known_faces)
+        ]
+
+    def place(self, cell: int, candidate: CellCandidate) -> List[int]:
+        """
+        Place a candidate in a cell and update the frontier and face counts.
+
+        Args:
+            cell: Cell index, in row-major order.
+            candidate: Candidate to place.
+
+        Returns:
+            Cells that joined the frontier, needed to undo the placement.
+        """
+        piece_id, rotation, faces = candidate[1:4]
+        row, col = divmod(cell, self.puzzle.get_cols())
+        self.current_solution[row][col] = (piece_id, rotation)
+        self.placed_faces[cell] = faces
+        self.frontier.pop(cell, None)
+
+        new_frontier = []
+        for (side, neighbour, _), slot in zip(self.neighbours[cell], self.neighbour_slots[cell]):
+            self.set_required_face(neighbour, slot, faces[side])
+            if self.placed_faces[neighbour] is None:
+                self.demanded_faces[faces[side]] += 1
+                if neighbour not in self.frontier:
+                    self.frontier[neighbour] = None
+                    new_frontier.append(neighbour)
+            else:
+                self.demanded_faces[faces[side]] -= 1
+        for face in faces:
+            if face:
+                self.unused_faces[face] -= 1
+
+        next_copy = self.next_copies[piece_id]
+        self.available &= ~self.piece_candidate_bits[piece_id]
+        if next_copy is not None:
+            self.available |= self.piece_candidate_bits[next_copy]
+        return new_frontier
+
+    def remove(self, cell: int, candidate: CellCandidate, new_frontier: List[int]) -> None:
+        """
+        Undo the placement of a candidate.
+
+        Args:
+            cell: Cell index, in row-major order.
+            candidate: Candidate that was placed.
+            new_frontier: Cells that joined the frontier when it was placed.
+        """
+        piece_id, faces = candidate[1], candidate[3]
+        next_copy = self.next_copies[piece_id]
+        if next_copy is not None:
+            self.available &= ~self.piece_candidate_bits[next_copy]
+        self.available |= self.piece_candidate_bits[piece_id]
+        for face in faces:
+            if face:
+                self.unused_faces[face] += 1
+        for (side, neighbour, _), slot in zip(self.neighbours[cell], self.neighbour_slots[cell]):
+            self.set_required_face(neighbour, slot, None)
+            if self.placed_faces[neighbour] is None:
+                self.demanded_faces[faces[side]] -= 1
+            else:
+                self.demanded_faces[faces[side]] += 1
+        for neighbour in new_frontier:
+            del self.frontier[neighbour]
+
+        row, col = divmod(cell, self.puzzle.get_cols())
+        self.current_solution[row][col] = None
+        self.placed_faces[cell] = None
+        self.frontier[cell] = None
+
+    def set_required_face(self, cell: int, slot: int, face: Optional[int]) -> None:
+        """
+        Set the face a neighbour requires from a cell and update its key.
+
+        Args:
+            cell: Cell index, in row-major order.
+            slot: Position of the neighbour in the neighbours of the cell.
+            face: Face required by the neighbour, or None once it is empty.
+        """
+        required_faces = self.required_faces[cell]
+        required_faces[slot] = face
+        self.domain_keys[cell] = (self.cell_patterns[cell], tuple(required_faces))
+
+    def is_balanced(self, faces: List[int]) -> bool:
+        """
+        Check that the face values of a placed piece can still be paired up.
+
+        Every unused face of a value must either meet a placed piece waiting
+        for that value or pair up with another unused face, so there must
+        be at least as many unused faces as waiting ones, with an even
+        difference.
+
+        Args:
+            faces: Face values to check, usually those of the piece just
+                placed.
+
+        Returns:
+            True if the face counts can still balance, False otherwise.
+        """
+        for face in faces:
+            if face:
+                spare = self.unused_faces[face] - self.demanded_faces[face]
+                if spare < 0 or spare % 2:
+                    return False
+        return True
@@ -0,0 +1,32 @@
+# engines.py
+
+from typing import Dict, Type
+from puzzle.chain_solver import ChainPuzzleSolver
+from puzzle.cp_solver import ConstraintPuzzleSolver
+from puzzle.frame_solver import FramePuzzleSolver
+from puzzle.puzzle import Puzzle
+from puzzle.puzzle_solver import PuzzleSolver
+
+# Solver engines by name, as selected from the command line
+ENGINES: Dict[str, Type[PuzzleSolver]] = {
+    "backtrack": PuzzleSolver,
+    "chain": ChainPuzzleSolver,
+    "cp": ConstraintPuzzleSolver,
+    "frame": FramePuzzleSolver,
+}
+
+
+def create_solver(puzzle: Puzzle, engine: str = "backtrack") -> PuzzleSolver:
+    """
+    Create a solver for a puzzle with the given engine.
+
+    Args:
+        puzzle (Puzzle): Puzzle to solve.
+        engine (str): Name of the engine, one of ENGINES.
+
+    Returns:
+        PuzzleSolver: Solver using that engine.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    return ENGINES[engine](puzzle)
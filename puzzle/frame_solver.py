@@ -0,0 +1,232 @@
+# frame_solver.py
+
+from typing import Dict, List, Optional, Tuple
+from puzzle.cp_solver import CellCandidate, ConstraintPuzzleSolver
+
+# (cell, side, neighbour cell, side of the neighbour that touches the cell)
+# of two adjacent cells of the rings
+Arc = Tuple[int, int, int, int]
+
+# Most supports kept between two cells' domains before the cache is cleared
+MAX_SUPPORTS = 1 << 16
+
+
+class FramePuzzleSolver(ConstraintPuzzleSolver):
+    """
+    Edge-first engine.
+
+    Solves the border ring first, as a cycle over the corner and edge
+    pieces starting from the fixed top left corner, then fills the
+    interior row by row with the frame fixed. When the interior cannot be
+    completed the search backtracks into the frame.
+
+    Every frame piece placed is checked at the frame level: the domains of
+    the empty cells of the border ring and of the ring just inside it are
+    made arc consistent, each candidate keeping only the faces that some
+    candidate of every neighbour in the rings can match, so a frame is
+    rejected as soon as its inward faces leave the inner ring without a
+    chain of pieces.
+    """
+
+    def prepare(self) -> None:
+        """
+        Build the candidate tables, the frame-then-interior cell order and
+        the arcs between the cells of the two rings.
+        """
+        super().prepare()
+        frame_cells = self.get_frame_cells()
+        interior_cells = self.get_interior_cells()
+        self.cell_order = frame_cells + interior_cells
+        self.frame_cells = set(frame_cells)
+
+        # The border ring and the interior cells next to it
+        ring_cells = frame_cells + [
+            cell for cell in interior_cells
+            if any(neighbour in self.frame_cells for _, neighbour, _ in self.neighbours[cell])]
+        self.ring_cells = set(ring_cells)
+        self.arcs_to: Dict[int, List[Arc]] = {cell: [] for cell in ring_cells}
+        self.arcs_from: Dict[int, List[Arc]] = {cell: [] for cell in ring_cells}
+        for cell in ring_cells:
+            for side, neighbour, neighbour_side in self.neighbours[cell]:
+                if neighbour in self.ring_cells:
+                    arc = (cell, side, neighbour, neighbour_side)
+                    self.arcs_from[cell].append(arc)
+                    self.arcs_to[neighbour].append(arc)
+
+        # Candidate bits per side and face value on that side
+        self.side_face_bits: Dict[Tuple[int, int], int] = {}
+        for index, candidate in enumerate(self.bit_candidates):
+            for side in range(4):
+                key = (side, candidate[3][side])
+                self.side_face_bits[key] = self.side_face_bits.get(key, 0) | (1 << index)
+
+        # Candidate bits of a cell supported by a neighbour's domain, by
+        # (domain, side of the neighbour, side of the cell), filled lazily
+        self.supports: Dict[Tuple[int, int, int], int] = {}
+
+    def get_frame_cells(self) -> List[int]:
+        """
+        Get the cells of the border ring, clockwise from the top left corner.
+
+        Returns:
+            List[int]: Cell indexes, in row-major numbering.
+        """
+        cols = self.puzzle.get_cols()
+        rows = self.puzzle.get_rows()
+        if cols == 0 or rows == 0:
+            return []
+        if cols == 1 or rows == 1:
+            # One-dimensional puzzles are all frame
+            return list(range(cols * rows))
+
+        top = [col for col in range(cols)]
+        right = [row * cols + cols - 1 for row in range(1, rows)]
+        bottom = [(rows - 1) * cols + col for col in range(cols - 2, -1, -1)]
+        left = [row * cols for row in range(rows - 2, 0, -1)]
+        return top + right + bottom + left
+
+    def get_interior_cells(self) -> List[int]:
+        """
+        Get the interior cells, in row-major order.
+
+        Returns:
+            List[int]: Cell indexes, in row-major numbering.
+        """
+        cols = self.puzzle.get_cols()
+        return [row * cols + col
+                for row in range(1, self.puzzle.get_rows() - 1)
+                for col in range(1, cols - 1)]
+
+    def select_cell(self, used_pieces: int, num_placed: int) -> Optional[Tuple[int, List[CellCandidate]]]:
+        """
+        Pick the next cell in frame-then-interior order.
+
+        Args:
+            used_pieces: Bitmask of the pieces that have already been used.
+            num_placed: Number of pieces placed so far.
+
+        Returns:
+            (cell, domain) to branch on.
+        """
+        cell = self.cell_order[num_placed]
+        return cell, self.get_domain(cell)
+
+    def accepts(self, cell: int, candidate: CellCandidate, used_pieces: int) -> bool:
+        """
+        Check a candidate just placed, with a forward check on its empty
+        neighbours and, in the frame, the arc consistency of the rings.
+
+        Args:
+            cell: Cell index, in row-major order.
+            candidate: Candidate placed in the cell.
+            used_pieces: Bitmask of the pieces used, including that piece.
+
+        Returns:
+            True if the search should go on with the candidate placed.
+        """
+        return (self.is_balanced(candidate[3])
+                and self.has_neighbour_candidates(cell, used_pieces)
+                and (cell not in self.frame_cells or self.is_ring_consistent(cell)))
+
+    def has_neighbour_candidates(self, cell: int, used_pieces: int) -> bool:
+        """
+        Check that every empty neighbour of a cell still has a candidate.
+
+        Args:
+            cell: Cell index of the piece just placed.
+            used_pieces: Bitmask of the pieces used, including that piece.
+
+        Returns:
+            True if no empty neighbour has run out of candidates.
+        """
+        for _, neighbour, _ in self.neighbours[cell]:
+            if self.placed_faces[neighbour] is None and not self.get_domain_mask(neighbour):
+                return False
+        return True
+
+    def is_ring_consistent(self, cell: int) -> bool:
+        """
+        Propagate a frame piece just placed through the rings.
+
+        Starting from the empty ring cells next to it, the candidates of a
+        cell that no candidate of a neighbour can match are removed, and
+        its neighbours are checked again, until nothing changes. Empty
+        cells without a placed neighbour accept any face and are skipped.
+
+        Args:
+            cell: Cell index of the frame piece just placed.
+
+        Returns:
+            False if a ring cell has run out of candidates, True otherwise.
+        """
+        placed_faces = self.placed_faces
+        neighbours = self.neighbours
+        # Domain of each ring cell looked at, or -1 when it is skipped
+        domains: Dict[int, int] = {}
+
+        def get_ring_domain(ring_cell: int) -> int:
+            domain = domains.get(ring_cell)
+            if domain is None:
+                if placed_faces[ring_cell] is None and any(
+                        placed_faces[neighbour] is not None
+                        for _, neighbour, _ in neighbours[ring_cell]):
+                    domain = self.get_domain_mask(ring_cell)
+                else:
+                    domain = -1
+                domains[ring_cell] = domain
+            return domain
+
+        pending: List[Arc] = []
+        for _, neighbour, _ in neighbours[cell]:
+            if neighbour in self.ring_cells and get_ring_domain(neighbour):
+                pending.extend(self.arcs_to[neighbour])
+                pending.extend(self.arcs_from[neighbour])
+
+        supports = self.supports
+        while pending:
+            ring_cell, side, neighbour, neighbour_side = pending.pop()
+            domain = get_ring_domain(ring_cell)
+            neighbour_domain = get_ring_domain(neighbour)
+            if domain < 0 or neighbour_domain < 0:
+                continue
+
+            key = (neighbour_domain, neighbour_side, side)
+            supported = supports.get(key)
+            if supported is None:
+                supported = self.get_supported(neighbour_domain, neighbour_side, side)
+                if len(supports) >= MAX_SUPPORTS:
+                    supports.clear()
+                supports[key] = supported
+
+            reduced = domain & supported
+            if reduced != domain:
+                if not reduced:
+                    return False
+                domains[ring_cell] = reduced
+                pending.extend(arc for arc in self.arcs_to[ring_cell]
+                               if arc[0] != neighbour)
+        return True
+
+    def get_supported(self, domain: int, side: int, other_side: int) -> int:
+        """
+        Get the candidates that match a domain across two touching sides.
+
+        Args:
+            domain: Candidate bits of a cell.
+            side: Side of that cell facing the other cell.
+            other_side: Side of the other cell facing it.
+
+        Returns:
+            Candidate bits with a face on other_side that some candidate
+            of the domain has on side.
+        """
+        faces = set()
+        while domain:
+            bit = domain & -domain
+            faces.add(self.bit_candidates[bit.bit_length() - 1][3][side])
+            domain ^= bit
+
+        supported = 0
+        for face in faces:
+            supported |= self.side_face_bits.get((other_side, face), 0)
+        return supported
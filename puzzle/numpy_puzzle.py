@@ -0,0 +1,191 @@
+# numpy_puzzle.py
+
+from collections import Counter
+from typing import List, Optional, Sequence
+from puzzle.compact_piece import CompactPiece
+from puzzle.puzzle import Puzzle
+from puzzle.puzzle_piece import PuzzlePiece
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+
+class NumpyPuzzle(Puzzle):
+    def __init__(self):
+        """
+        NumpyPuzzle class constructor.
+
+        A Puzzle backend that stores every face of every rotation in one
+        (n, 4, 4) int array, indexed [piece, rotation, face], with the
+        piece classifications reduced once when the pieces are set.
+        Requires NumPy.
+        """
+        if np is None:
+            raise ImportError("NumpyPuzzle requires NumPy to be installed.")
+        super().__init__()
+
+    @property
+    def pieces(self) -> List[PuzzlePiece]:
+        """
+        Puzzle pieces, rebuilt from the face array on first access.
+
+        The returned pieces are copies: use set_pieces to change them.
+        """
+        if self._pieces is None:
+            self._pieces = [PuzzlePiece(piece_id, faces)
+                            for piece_id, faces in zip(self.ids.tolist(),
+                                                       self.faces[:, 0].tolist())]
+        return self._pieces
+
+    @pieces.setter
+    def pieces(self, pieces: List[PuzzlePiece]) -> None:
+        self.ids = np.array([piece.get_id() for piece in pieces], dtype=np.int64)
+        faces = np.array([piece.get_faces() for piece in pieces],
+                         dtype=np.int32).reshape(len(pieces), 4)
+        self.set_faces_array(self.ids, faces)
+        self._pieces = None
+
+    @classmethod
+    def from_puzzle(cls, puzzle: Puzzle) -> 'NumpyPuzzle':
+        """
+        Build a NumPy-backed copy of a puzzle.
+
+        Args:
+            puzzle (Puzzle): Puzzle to copy.
+
+        Returns:
+            'NumpyPuzzle': NumPy-backed puzzle with the same pieces.
+        """
+        numpy_puzzle = cls()
+        numpy_puzzle.cols = puzzle.get_cols()
+        numpy_puzzle.rows = puzzle.get_rows()
+        numpy_puzzle.pieces = puzzle.get_pieces()
+        return numpy_puzzle
+
+    def set_faces(self, faces: Sequence[int]) -> None:
+        """
+        Set the pieces from their flat face values, numbered from 1.
+
+        Faces loaded from a buffer, such as a memory-mapped binary puzzle,
+        are read without building piece objects, but they are copied once
+        into the (n, 4, 4) array of every rotation.
+
+        Args:
+            faces (Sequence[int]): Faces [left, top, right, bottom] of each
+                piece, one after the other.
+        """
+        faces = np.asarray(faces).reshape(-1, 4)
+        self.set_faces_array(np.arange(1, len(faces) + 1), faces)
+
+    def set_faces_array(self, ids: "np.ndarray", faces: "np.ndarray") -> None:
+        """
+        Set the pieces from an (n, 4) face array, without piece objects.
+
+        Args:
+            ids (np.ndarray): Piece identifiers, shape (n,).
+            faces (np.ndarray): Faces [left, top, right, bottom], shape (n, 4).
+        """
+        self.ids = np.asarray(ids, dtype=np.int64)
+        # Rotation r rolls the faces r times, as PuzzlePiece.rotate does
+        self.faces = np.stack([np.roll(faces, rotation, axis=1)
+                               for rotation in range(4)], axis=1)
+
+        self.border_counts = (self.faces[:, 0] == 0).sum(axis=1)
+        self._pieces = None
+
+    def check_feasibility(self) -> Optional[str]:
+        """
+        Check, without searching, that the pieces can form the puzzle,
+        with the same checks and reasons as Puzzle.check_feasibility but
+        vectorized over the face array.
+
+        Returns:
+            Optional[str]: Reason why the puzzle cannot be solved, or None
+                if it passes the check.
+        """
+        faces = self.faces[:, 0]
+        face_values, face_totals = np.unique(faces[faces != 0],
+                                             return_counts=True)
+        borders, border_totals = np.unique(self.border_counts,
+                                           return_counts=True)
+        reason = self.check_piece_counts(
+            Counter(dict(zip(face_values.tolist(), face_totals.tolist()))),
+            Counter(dict(zip(borders.tolist(), border_totals.tolist()))))
+        if reason is not None:
+            return reason
+
+        opposite = (((faces[:, 0] == 0) & (faces[:, 2] == 0))
+                    | ((faces[:, 1] == 0) & (faces[:, 3] == 0)))
+        # Corners need adjacent borders, 1-D double edges opposite ones
+        misplaced = np.flatnonzero((self.border_counts == 2)
+                                   & (opposite != self.is_one_dimensional()))
+        if len(misplaced):
+            return f"piece {self.ids[misplaced[0]]} has its borders in the wrong place."
+        return None
+
+    def get_compact_pieces(self) -> List[CompactPiece]:
+        """
+        Get immutable copies of the puzzle pieces, for solving.
+
+        Returns:
+            List[CompactPiece]: Compact puzzle pieces, in the same order.
+        """
+        return [CompactPiece(piece_id, faces)
+                for piece_id, faces in zip(self.ids.tolist(),
+                                           self.faces[:, 0].tolist())]
+
+    def count_borders(self) -> "np.ndarray":
+        """
+        Count the number of borders on every piece.
+
+        Returns:
+            np.ndarray: Number of borders per piece, shape (n,).
+        """
+        return self.border_counts
+
+    def is_corner(self) -> "np.ndarray":
+        """
+        Check which pieces are corners.
+
+        Returns:
+            np.ndarray: Boolean mask of corner pieces, shape (n,).
+        """
+        return self.border_counts == 2
+
+    def is_linear_corner(self) -> "np.ndarray":
+        """
+        Check which pieces are linear corners.
+
+        Returns:
+            np.ndarray: Boolean mask of linear corner pieces, shape (n,).
+        """
+        return self.border_counts == 3
+
+    def is_edge(self) -> "np.ndarray":
+        """
+        Check which pieces are edges.
+
+        Returns:
+            np.ndarray: Boolean mask of edge pieces, shape (n,).
+        """
+        return self.border_counts == 1
+
+    def is_double_edge(self) -> "np.ndarray":
+        """
+        Check which pieces are double edges.
+
+        Returns:
+            np.ndarray: Boolean mask of double edge pieces, shape (n,).
+        """
+        return self.border_counts == 2
+
+    def is_interior(self) -> "np.ndarray":
+        """
+        Check which pieces are interior pieces.
+
+        Returns:
+            np.ndarray: Boolean mask of interior pieces, shape (n,).
+        """
+        return self.border_counts == 0
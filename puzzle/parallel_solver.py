@@ -0,0 +1,228 @@
+# parallel_solver.py
+
+from itertools import islice
+from multiprocessing import Pool, TimeoutError, cpu_count
+from threading import Event
+from typing import Iterator, List, Optional, Tuple
+from puzzle.compact_piece import Placement
+from puzzle.piece_index import Candidate
+from puzzle.puzzle import Puzzle
+from puzzle.search_budget import SearchBudget, SolveResult
+from puzzle.puzzle_solver import PuzzleSolver
+
+Solution = List[List[Optional[Placement]]]
+
+# Seconds between two budget checks while waiting for the workers
+BUDGET_POLL_INTERVAL = 0.05
+
+# Solver of the current worker process, set by init_worker
+worker_solver: Optional[PuzzleSolver] = None
+
+
+def init_worker(puzzle: Puzzle, memo_size: Optional[int] = None) -> None:
+    """
+    Prepare, once per worker process, the solver shared by its subtrees.
+
+    Args:
+        puzzle (Puzzle): Puzzle to solve.
+        memo_size (Optional[int]): Size of the worker's dead state memo,
+            shared by its subtrees, or None to disable it.
+    """
+    global worker_solver
+    worker_solver = PuzzleSolver(puzzle, memo_size=memo_size)
+    worker_solver.prepare()
+
+
+def solve_subtree(task: Tuple[List[Placement], Optional[int]]) -> List[Solution]:
+    """
+    Solve the subtree below a prefix of placements in a worker process.
+
+    Args:
+        task: (prefix placements in row-major order, maximum number of
+            solutions or None for all of them).
+
+    Returns:
+        List[Solution]: Solutions found in the subtree, in search order.
+    """
+    prefix, max_solutions = task
+    return list(islice(worker_solver.iter_subtree(prefix), max_solutions))
+
+
+class ParallelPuzzleSolver(PuzzleSolver):
+    # Subtrees are searched by the workers
+    resumable = False
+
+    def __init__(self, puzzle: Puzzle, workers: Optional[int] = None, expand_identical: bool = True, memo_size: Optional[int] = None):
+        """
+        ParallelPuzzleSolver class constructor.
+
+        Splits the search tree at the first cells after the fixed corner
+        and solves the subtrees in a pool of worker processes.
+
+        Args:
+            puzzle: Puzzle object to solve.
+            workers: Number of worker processes, defaults to the CPU count.
+            expand_identical: Report every permutation of identical pieces.
+            memo_size: Maximum number of dead states each worker remembers,
+                or None to disable the memo.
+        """
+        super().__init__(puzzle, expand_identical, memo_size)
+        self.workers = workers or cpu_count()
+
+    def solve(self, max_solutions: Optional[int] = None, timeout: Optional[float] = None, max_nodes: Optional[int] = None, cancel_token: Optional[Event] = None) -> SolveResult:
+        """
+        Solve the puzzle in parallel and store the solutions.
+
+        With max_solutions, the first subtrees to finish win and the rest
+        of the search is cancelled. Without it, every solution is stored
+        in the same order as PuzzleSolver.solve. On timeout or cancellation
+        the worker pool is terminated and the solutions of the subtrees
+        already finished are kept. The workers' nodes are not counted, so
+        max_nodes is not supported.
+
+        Args:
+            max_solutions: Stop the search after this many solutions, or
+                None to find them all.
+            timeout: Stop the search after this many seconds, or None.
+            max_nodes: Must be None.
+            cancel_token: Event that stops the search once set, or None.
+
+        Returns:
+            Outcome of the solve, with solver.solutions as its solutions.
+
+        Raises:
+            ValueError: If max_nodes is set.
+        """
+        result = SolveResult()
+        budget = SearchBudget(timeout, max_nodes, cancel_token)
+        if max_solutions is None:
+            solutions = self.iter_solutions()
+        else:
+            solutions = self.iter_solutions(ordered=False,
+                                            max_solutions=max_solutions)
+        for solution in self.iter_within_budget(result, max_solutions, budget, solutions):
+            self.solutions.append(solution)
+        result.solutions = self.solutions
+        return result
+
+    def iter_solutions(self, ordered: bool = True, max_solutions: Optional[int] = None) -> Iterator[Solution]:
+        """
+        Solve the puzzle in parallel, yielding solutions as subtrees finish.
+
+        The worker pool is terminated as soon as the iteration stops, which
+        cancels the subtrees still being searched. The timeout and cancel
+        token of the solve's budget are checked while waiting for them.
+
+        Args:
+            ordered: Yield solutions in serial search order, otherwise in
+                the order the subtrees finish.
+            max_solutions: Maximum number of solutions to search for in
+                each subtree, or None for all of them.
+
+        Yields:
+            Solution grid of (piece id, rotation) placements.
+
+        Raises:
+            ValueError: If the budget limits the nodes, which the workers
+                do not report.
+            SearchStopped: If the budget runs out.
+        """
+        budget = self.budget
+        if budget is not None and budget.max_nodes is not None:
+            raise ValueError("max_nodes is not supported by the parallel solver")
+        self.prepare()
+        if self.infeasible_reason is not None:
+            return
+        tasks = [(prefix, max_solutions) for prefix in self.split_search()]
+
+        pool = Pool(self.workers, initializer=init_worker,
+                    initargs=(self.puzzle, self.memo_size))
+        try:
+            if ordered:
+                results = pool.imap(solve_subtree, tasks)
+            else:
+                results = pool.imap_unordered(solve_subtree, tasks)
+
+            while True:
+                try:
+                    if budget is None:
+                        solutions = results.next()
+                    else:
+                        solutions = results.next(BUDGET_POLL_INTERVAL)
+                except StopIteration:
+                    break
+                except TimeoutError:
+                    budget.check(self.num_nodes)
+                    continue
+
+                # Subtrees are disjoint, so no solution is found twice
+                for solution in solutions:
+                    if self.expand_identical:
+                        yield from self.expand_solution(solution)
+                    else:
+                        yield solution
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def split_search(self) -> List[List[Placement]]:
+        """
+        Split the search tree into subtrees, one per prefix of placements.
+
+        Cells are expanded in row-major order, starting with the fixed
+        corner, until there are enough subtrees to keep every worker busy.
+
+        Returns:
+            List[List[Placement]]: Prefixes in serial search order.
+        """
+        num_cells = self.puzzle.get_cols() * self.puzzle.get_rows()
+        target_subtrees = self.workers * 4
+
+        prefixes = [[]]
+        for cell in range(num_cells):
+            if cell > 1 and len(prefixes) >= target_subtrees:
+                break
+
+            row, col = divmod(cell, self.puzzle.get_cols())
+            next_prefixes = []
+            for prefix in prefixes:
+                current_solution, used_pieces = self.place_prefix(prefix)
+
+                if cell == 0:
+                    candidates = [self.find_fixed_corner_piece(self.pieces)]
+                else:
+                    candidates = self.get_cell_candidates(
+                        row, col, current_solution)
+
+                for piece, rotation in candidates:
+                    piece_mask = self.piece_masks[piece.get_id()]
+                    previous_copy_mask = self.previous_copy_masks[piece.get_id()]
+                    if (
+                        not used_pieces & piece_mask
+                        and used_pieces & previous_copy_mask == previous_copy_mask
+                    ):
+                        next_prefixes.append(
+                            prefix + [(piece.get_id(), rotation)])
+            prefixes = next_prefixes
+        return prefixes
+
+    def get_cell_candidates(self, row: int, col: int, solution: List[List[Optional[Placement]]]) -> List[Candidate]:
+        """
+        Look up the candidates that fit a cell of a prefix in the index.
+
+        Args:
+            row: Current row in the puzzle.
+            col: Current column in the puzzle.
+            solution: Current state of the puzzle solution.
+
+        Returns:
+            List of (piece, rotation) pairs that fit the position.
+        """
+        left_face = self.get_placed_faces(
+            solution[row][col - 1])[2] if col > 0 else 0
+        top_face = self.get_placed_faces(
+            solution[row - 1][col])[3] if row > 0 else 0
+        right_border = col == self.puzzle.get_cols() - 1
+        bottom_border = row == self.puzzle.get_rows() - 1
+
+        return self.index.get_candidates(left_face, top_face, right_border, bottom_border)
@@ -0,0 +1,72 @@
+# piece_index.py
+
+from typing import Dict, List, Tuple
+from puzzle.compact_piece import CompactPiece
+
+CandidateKey = Tuple[int, int, bool, bool]
+Candidate = Tuple[CompactPiece, int]
+
+
+class PieceIndex:
+    def __init__(self, pieces: List[CompactPiece]):
+        """
+        PieceIndex class constructor.
+
+        Builds, once, a lookup table from the faces a cell requires to the
+        (piece, rotation) candidates that fit it. The key is the required
+        left and top faces plus whether the right and bottom faces must be
+        borders, which together encode the border class of the cell
+        (corner, edge or interior).
+
+        Args:
+            pieces (List[CompactPiece]): List of puzzle pieces to index.
+        """
+        self.candidates: Dict[CandidateKey, List[Candidate]] = {}
+        for piece in pieces:
+            self.add_piece(piece)
+
+    def add_piece(self, piece: CompactPiece) -> None:
+        """
+        Add every distinct rotation of a puzzle piece to the index.
+
+        Args:
+            piece (CompactPiece): Puzzle piece to add.
+        """
+        # Symmetric pieces repeat faces: only distinct rotations are added
+        for rotation in piece.distinct_rotations:
+            faces = piece.get_faces(rotation)
+            key = self.make_key(faces[0], faces[1],
+                                faces[2] == 0, faces[3] == 0)
+            self.candidates.setdefault(key, []).append((piece, rotation))
+
+    @staticmethod
+    def make_key(left_face: int, top_face: int, right_border: bool, bottom_border: bool) -> CandidateKey:
+        """
+        Build the lookup key for a cell.
+
+        Args:
+            left_face (int): Face required on the left (0 for a border).
+            top_face (int): Face required on the top (0 for a border).
+            right_border (bool): Whether the right face must be a border.
+            bottom_border (bool): Whether the bottom face must be a border.
+
+        Returns:
+            CandidateKey: Key for the candidates table.
+        """
+        return (left_face, top_face, right_border, bottom_border)
+
+    def get_candidates(self, left_face: int, top_face: int, right_border: bool, bottom_border: bool) -> List[Candidate]:
+        """
+        Get the pieces, and their rotations, that fit a cell.
+
+        Args:
+            left_face (int): Face required on the left (0 for a border).
+            top_face (int): Face required on the top (0 for a border).
+            right_border (bool): Whether the right face must be a border.
+            bottom_border (bool): Whether the bottom face must be a border.
+
+        Returns:
+            List[Candidate]: (piece, rotation) pairs in piece order.
+        """
+        key = self.make_key(left_face, top_face, right_border, bottom_border)
+        return self.candidates.get(key, [])
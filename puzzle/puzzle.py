@@ -1,6 +1,13 @@
 # puzzle.py
 
-from typing import List
+import mmap
+from array import array
+from collections import Counter
+from itertools import chain
+from typing import Iterator, List, Optional, Sequence
+from puzzle.compact_piece import CompactPiece
+from puzzle.puzzle_format import (BINARY_MAGIC, PuzzleFormatError, is_binary,
+                                  parse_text, read_binary)
 from puzzle.puzzle_piece import PuzzlePiece
 
 
@@ -11,7 +18,49 @@ class Puzzle:
         """
         self.cols: int = 0
         self.rows: int = 0
-        self.pieces: List[PuzzlePiece] = []
+        # Flat faces of the pieces, which are only built from them on first
+        # access, or None once they are built
+        self.face_values: Optional[Sequence[int]] = None
+        # Result of check_feasibility on face_values, kept until they are
+        # turned into pieces that can be changed in place
+        self.feasibility_checked: bool = False
+        self.feasibility_reason: Optional[str] = None
+        self.pieces = []
+
+    @property
+    def pieces(self) -> List[PuzzlePiece]:
+        """
+        Puzzle pieces, built from the flat faces on first access.
+        """
+        if self._pieces is None:
+            self._pieces = [PuzzlePiece(piece_id, list(faces))
+                            for piece_id, faces in enumerate(self.iter_piece_faces(), 1)]
+            self.face_values = None
+            self.feasibility_checked = False
+        return self._pieces
+
+    @pieces.setter
+    def pieces(self, pieces: List[PuzzlePiece]) -> None:
+        self._pieces = pieces
+        self.face_values = None
+        self.feasibility_checked = False
+
+    def __getstate__(self) -> dict:
+        """
+        Get the state to pickle, such as for worker processes.
+
+        Faces that are a view into a memory-mapped binary puzzle cannot be
+        pickled, so they are copied into an array of the same type.
+
+        Returns:
+            dict: Attributes of the puzzle.
+        """
+        state = self.__dict__.copy()
+        faces = state["face_values"]
+        if isinstance(faces, memoryview):
+            state["face_values"] = array(faces.format)
+            state["face_values"].frombytes(faces)
+        return state
 
     def get_cols(self) -> int:
         """
@@ -67,6 +116,35 @@ class Puzzle:
         """
         self.pieces = pieces
 
+    def get_compact_pieces(self) -> List[CompactPiece]:
+        """
+        Get immutable copies of the puzzle pieces, for solving.
+
+        Pieces that have not been built yet are made straight from the
+        flat faces, without building them.
+
+        Returns:
+            List[CompactPiece]: Compact puzzle pieces, in the same order.
+        """
+        if self.face_values is None:
+            return CompactPiece.from_pieces(self.pieces)
+        return [CompactPiece(piece_id, faces)
+                for piece_id, faces in enumerate(self.iter_piece_faces(), 1)]
+
+    def iter_piece_faces(self) -> Iterator[Sequence[int]]:
+        """
+        Iterate over the faces of every piece, without building the pieces
+        that have not been built yet.
+
+        Returns:
+            Iterator[Sequence[int]]: Faces [left, top, right, bottom] of
+                each piece, in piece order.
+        """
+        faces = self.face_values
+        if faces is None:
+            return (piece.get_faces() for piece in self.pieces)
+        return zip(faces[0::4], faces[1::4], faces[2::4], faces[3::4])
+
     def to_string(self) -> str:
         """
         Convert puzzle information to a string.
@@ -75,9 +153,11 @@ class Puzzle:
             str: Puzzle information as a string.
         """
         separator = "\n"
+        pieces = "".join(f"{separator}{' '.join(map(str, faces))}"
+                         for faces in self.iter_piece_faces())
         return (
             f"Columns: {self.cols} - Rows: {self.rows}"
-            f"{separator}Pieces:{self.show_pieces(self.pieces)}"
+            f"{separator}Pieces:{pieces}"
         )
 
     def show_pieces(self, pieces: List[PuzzlePiece]) -> str:
@@ -110,10 +190,64 @@ class Puzzle:
         """
         print(f"Error: {message}")
 
+    def check_piece_counts(self, face_counts: Counter, border_counts: Counter) -> Optional[str]:
+        """
+        Check that every non-zero face value pairs up and that the number
+        of pieces per number of borders fits the puzzle dimensions.
+
+        Args:
+            face_counts (Counter): Number of faces per non-zero face value.
+            border_counts (Counter): Number of pieces per number of borders.
+
+        Returns:
+            Optional[str]: Reason why the puzzle cannot be solved, or None
+                if it passes the check.
+        """
+        for face, count in sorted(face_counts.items()):
+            if count % 2:
+                return f"face value {face} appears an odd number of times ({count})."
+
+        cols, rows = self.get_cols(), self.get_rows()
+        # Expected (name, count) of pieces per number of borders
+        if cols == 1 and rows == 1:
+            expected_pieces = {4: ("single", 1)}
+        elif self.is_one_dimensional():
+            expected_pieces = {3: ("linear corner", 2),
+                               2: ("double edge", cols * rows - 2)}
+        else:
+            expected_pieces = {2: ("corner", 4),
+                               1: ("edge", 2 * (cols - 2) + 2 * (rows - 2)),
+                               0: ("interior", (cols - 2) * (rows - 2))}
+
+        for borders in sorted(set(border_counts) | set(expected_pieces)):
+            name, expected = expected_pieces.get(borders, ("other", 0))
+            found = border_counts.get(borders, 0)
+            if found != expected:
+                return (f"found {found} {name} pieces ({borders} borders), "
+                        f"expected {expected}.")
+
+        return None
+
+    def set_faces(self, faces: Sequence[int]) -> None:
+        """
+        Set the pieces from their flat face values, numbered from 1.
+
+        The faces are kept as they are, such as a view into a
+        memory-mapped binary puzzle, and the pieces are only built from
+        them when get_pieces is called.
+
+        Args:
+            faces (Sequence[int]): Faces [left, top, right, bottom] of each
+                piece, one after the other.
+        """
+        self._pieces = None
+        self.face_values = faces
+        self.feasibility_checked = False
+
     @classmethod
     def load_puzzle(cls, file_name: str) -> 'Puzzle':
         """
-        Load a puzzle from a file.
+        Load a puzzle from a file, in the text or the binary format.
 
         Args:
             cls: Class reference.
@@ -123,45 +257,53 @@ class Puzzle:
             'Puzzle': Loaded puzzle object or None if an error occurs.
         """
         try:
-            with open(file_name, 'r') as file:
-                lines = file.read().splitlines()
-
-            first_row = lines.pop(0)
-            dimensions = list(map(int, first_row.split()))
-            cols, rows = dimensions[0], dimensions[1]
+            puzzle = cls.read_puzzle(file_name)
 
-            pieces = []
-
-            for line in lines:
-                if line:
-                    faces_values = list(map(int, line.split()))
-
-                    if len(faces_values) != 4:
-                        cls.handle_error("Invalid piece format.")
-                        return None
-
-                    piece_id = len(pieces) + 1
-                    faces = faces_values
-
-                    piece = PuzzlePiece(piece_id, faces)
-                    pieces.append(piece)
-
-            expected_num_pieces = cols * rows
-            if expected_num_pieces != len(pieces):
-                cls.handle_error(
-                    "The number of pieces does not fit puzzle dimensions.")
+            reason = puzzle.check_feasibility()
+            if reason is not None:
+                cls.handle_error(f"Unsolvable puzzle: {reason}")
                 return None
 
-            puzzle = cls()
-            puzzle.cols = cols
-            puzzle.rows = rows
-            puzzle.pieces = pieces
-
             return puzzle
+        except PuzzleFormatError as e:
+            cls.handle_error(str(e))
+            return None
         except Exception as e:
             cls.handle_error(f"Error processing content: {str(e)}")
             return None
 
+    @classmethod
+    def read_puzzle(cls, file_name: str) -> 'Puzzle':
+        """
+        Read a puzzle from a file, in the text or the binary format,
+        without printing anything or checking that it can be solved.
+
+        Args:
+            cls: Class reference.
+            file_name (str): Name of the file containing puzzle information.
+
+        Returns:
+            'Puzzle': Puzzle object.
+
+        Raises:
+            OSError: If the file cannot be read.
+            PuzzleFormatError: If the content is not a valid puzzle.
+        """
+        with open(file_name, 'rb') as file:
+            if is_binary(file.read(len(BINARY_MAGIC))):
+                # Map the file so the faces are read in place
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                cols, rows, faces = read_binary(buffer)
+            else:
+                file.seek(0)
+                cols, rows, faces = parse_text(file.read())
+
+        puzzle = cls()
+        puzzle.cols = cols
+        puzzle.rows = rows
+        puzzle.set_faces(faces)
+        return puzzle
+
     def is_one_dimensional(self) -> bool:
         """
         Check if the puzzle is one-dimensional.
@@ -170,3 +312,59 @@ class Puzzle:
             bool: True if the puzzle is one-dimensional, False otherwise.
         """
         return self.get_rows() == 1 or self.get_cols() == 1
+
+    def check_feasibility(self) -> Optional[str]:
+        """
+        Check, without searching, that the pieces can form the puzzle.
+
+        Every non-zero face value has to pair up with another one, and the
+        number of corner, edge and interior pieces, and where their borders
+        are, has to fit the puzzle dimensions.
+
+        The result for pieces not built yet is kept, so loading and then
+        solving a puzzle only checks it once.
+
+        Returns:
+            Optional[str]: Reason why the puzzle cannot be solved, or None
+                if it passes the check.
+        """
+        if self.face_values is None:
+            return self.check_piece_faces([piece.get_id() for piece in self.pieces],
+                                          [piece.get_faces() for piece in self.pieces])
+        if not self.feasibility_checked:
+            piece_faces = list(self.iter_piece_faces())
+            self.feasibility_reason = self.check_piece_faces(
+                range(1, len(piece_faces) + 1), piece_faces)
+            self.feasibility_checked = True
+        return self.feasibility_reason
+
+    def check_piece_faces(self, ids: Sequence[int], piece_faces: List[Sequence[int]]) -> Optional[str]:
+        """
+        Run the checks of check_feasibility on the faces of the pieces.
+
+        Args:
+            ids (Sequence[int]): Identifier of each piece.
+            piece_faces (List[Sequence[int]]): Faces of each piece, in the
+                same order.
+
+        Returns:
+            Optional[str]: Reason why the puzzle cannot be solved, or None
+                if it passes the check.
+        """
+        face_counts = Counter(chain.from_iterable(piece_faces))
+        del face_counts[0]
+        border_counts = Counter(faces.count(0) for faces in piece_faces)
+        reason = self.check_piece_counts(face_counts, border_counts)
+        if reason is not None:
+            return reason
+
+        one_dimensional = self.is_one_dimensional()
+        for piece_id, faces in zip(ids, piece_faces):
+            if faces.count(0) == 2:
+                opposite = (faces[0] == 0 and faces[2] == 0) or (
+                    faces[1] == 0 and faces[3] == 0)
+                # Corners need adjacent borders, 1-D double edges opposite ones
+                if opposite != one_dimensional:
+                    return f"piece {piece_id} has its borders in the wrong place."
+
+        return None
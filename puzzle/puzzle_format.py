@@ -0,0 +1,203 @@
+# puzzle_format.py
+
+import struct
+import sys
+from array import array
+from typing import BinaryIO, Sequence, Tuple
+
+# Binary puzzle format, little-endian:
+#
+#   magic      4 bytes   b"PZLB"
+#   version    uint8     BINARY_VERSION
+#   face_size  uint8     bytes per face value: 1, 2 or 4
+#   reserved   uint16    0
+#   cols       uint32
+#   rows       uint32
+#   faces      cols * rows * 4 unsigned face values of face_size bytes,
+#              [left, top, right, bottom] for each piece in piece order
+#
+# The faces start at a fixed offset and are fixed-width, so a memory-mapped
+# file can be read in place.
+BINARY_MAGIC = b"PZLB"
+BINARY_VERSION = 1
+BINARY_EXTENSION = ".pzl"
+HEADER = struct.Struct("<4sBBHII")
+# Array type code per face size
+FACE_TYPECODES = {1: "B", 2: "H", 4: "I"}
+# Token marking the end of a line while parsing text, never a face value
+LINE_SEPARATOR = b"|"
+
+
+class PuzzleFormatError(ValueError):
+    """
+    Raised when the content of a puzzle file is invalid.
+    """
+
+
+def is_binary(data: bytes) -> bool:
+    """
+    Check if the content of a puzzle file is in the binary format.
+
+    Args:
+        data (bytes): Content of the file, or at least its first bytes.
+
+    Returns:
+        bool: True if it starts with the binary magic, False otherwise.
+    """
+    return data[:len(BINARY_MAGIC)] == BINARY_MAGIC
+
+
+def parse_text(data: bytes) -> Tuple[int, int, Sequence[int]]:
+    """
+    Parse a text puzzle in one pass over its content.
+
+    Args:
+        data (bytes): Content of the file: "cols rows" then one line of four
+            face values per piece.
+
+    Returns:
+        Tuple[int, int, Sequence[int]]: (cols, rows, flat face values).
+
+    Raises:
+        PuzzleFormatError: If the content does not describe cols * rows
+            pieces of four faces.
+    """
+    first_line, _, body = data.partition(b"\n")
+    dimensions = first_line.split()
+    if len(dimensions) != 2:
+        raise PuzzleFormatError("Invalid puzzle dimensions.")
+    cols, rows = int(dimensions[0]), int(dimensions[1])
+
+    # Tokenized once, with a separator token at the end of every line
+    if LINE_SEPARATOR in body:
+        raise PuzzleFormatError("Invalid piece format.")
+    tokens = body.replace(b"\n", b" " + LINE_SEPARATOR + b" ").split()
+    if not tokens or tokens[-1] != LINE_SEPARATOR:
+        tokens.append(LINE_SEPARATOR)
+
+    num_pieces = len(tokens) // 5
+    if (len(tokens) == 5 * num_pieces
+            and tokens[4::5].count(LINE_SEPARATOR) == num_pieces
+            and tokens.count(LINE_SEPARATOR) == num_pieces):
+        # Every line holds four faces
+        del tokens[4::5]
+    else:
+        # Blank lines are allowed, every other line holds one piece of
+        # four faces, which a matching total alone would not prove
+        tokens, line_tokens = [], tokens
+        num_pieces = num_faces = 0
+        for token in line_tokens:
+            if token != LINE_SEPARATOR:
+                tokens.append(token)
+                num_faces += 1
+            elif num_faces == 4:
+                num_pieces += 1
+                num_faces = 0
+            elif num_faces:
+                raise PuzzleFormatError("Invalid piece format.")
+    if num_pieces != cols * rows:
+        raise PuzzleFormatError(
+            "The number of pieces does not fit puzzle dimensions.")
+    faces = array("q", map(int, tokens))
+    return cols, rows, faces
+
+
+def read_binary(buffer) -> Tuple[int, int, Sequence[int]]:
+    """
+    Read a binary puzzle without copying its faces.
+
+    Args:
+        buffer: Bytes-like content of the file, such as an mmap.
+
+    Returns:
+        Tuple[int, int, Sequence[int]]: (cols, rows, flat face values), the
+            face values being a view into the buffer.
+
+    Raises:
+        PuzzleFormatError: If the header is invalid or the faces do not fit
+            the dimensions.
+    """
+    if len(buffer) < HEADER.size:
+        raise PuzzleFormatError("Truncated binary puzzle header.")
+    magic, version, face_size, _, cols, rows = HEADER.unpack_from(buffer)
+    if magic != BINARY_MAGIC:
+        raise PuzzleFormatError("Not a binary puzzle file.")
+    if version != BINARY_VERSION:
+        raise PuzzleFormatError(
+            f"Unsupported binary puzzle version: {version}.")
+    if face_size not in FACE_TYPECODES:
+        raise PuzzleFormatError(f"Invalid face size: {face_size}.")
+
+    data = memoryview(buffer)[HEADER.size:]
+    if len(data) != cols * rows * 4 * face_size:
+        raise PuzzleFormatError(
+            "The number of pieces does not fit puzzle dimensions.")
+
+    if sys.byteorder == "little":
+        faces = data.cast(FACE_TYPECODES[face_size])
+    else:
+        # Native order differs from the file: byte-swap a copy
+        faces = array(FACE_TYPECODES[face_size], data)
+        faces.byteswap()
+    return cols, rows, faces
+
+
+def get_face_size(max_face: int) -> int:
+    """
+    Get the smallest face size that holds every face value up to max_face.
+
+    Args:
+        max_face (int): Largest face value to store.
+
+    Returns:
+        int: Bytes per face value.
+    """
+    return next(size for size in sorted(FACE_TYPECODES)
+                if max_face < 1 << (8 * size))
+
+
+def write_binary_header(file: BinaryIO, cols: int, rows: int, face_size: int) -> None:
+    """
+    Write the header of a binary puzzle, to be followed by its faces.
+
+    Args:
+        file (BinaryIO): File open for binary writing.
+        cols (int): Number of columns.
+        rows (int): Number of rows.
+        face_size (int): Bytes per face value, see get_face_size.
+    """
+    file.write(HEADER.pack(BINARY_MAGIC, BINARY_VERSION, face_size, 0,
+                           cols, rows))
+
+
+def pack_faces(faces: Sequence[int], face_size: int) -> bytes:
+    """
+    Pack face values as fixed-width little-endian integers.
+
+    Args:
+        faces (Sequence[int]): Flat face values.
+        face_size (int): Bytes per face value.
+
+    Returns:
+        bytes: Packed face values.
+    """
+    packed = array(FACE_TYPECODES[face_size], faces)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def write_binary(file: BinaryIO, cols: int, rows: int, faces: Sequence[int]) -> None:
+    """
+    Write a puzzle in the binary format, with the smallest face size that
+    holds its face values.
+
+    Args:
+        file (BinaryIO): File open for binary writing.
+        cols (int): Number of columns.
+        rows (int): Number of rows.
+        faces (Sequence[int]): Flat face values, four per piece.
+    """
+    face_size = get_face_size(max(faces, default=0))
+    write_binary_header(file, cols, rows, face_size)
+    file.write(pack_faces(faces, face_size))
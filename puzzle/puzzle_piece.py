@@ -1,5 +1,26 @@
 # puzzle_piece.py
 
+# Face patterns [left, top, right, bottom] per target position: 0 is a
+# border and -1 matches any face value
+CORNER_PATTERNS = {
+    "top-left": [0, 0, -1, -1],
+    "top-right": [-1, 0, 0, -1],
+    "bottom-right": [-1, -1, 0, 0],
+    "bottom-left": [0, -1, -1, 0],
+    "left": [0, 0, -1, 0],
+    "right": [-1, 0, 0, 0],
+    "top": [0, 0, 0, -1],
+    "bottom": [0, -1, 0, 0],
+}
+
+EDGE_PATTERNS = {
+    "left": [0, -1, -1, -1],
+    "top": [-1, 0, -1, -1],
+    "right": [-1, -1, 0, -1],
+    "bottom": [-1, -1, -1, 0],
+}
+
+
 class PuzzlePiece:
     def __init__(self, piece_id, faces):
         """
@@ -63,26 +84,9 @@ class PuzzlePiece:
         Args:
             position: Target corner position.
         """
-        target_pattern = []
-
-        if position == "top-left":
-            target_pattern = [0, 0, -1, -1]
-        elif position == "top-right":
-            target_pattern = [-1, 0, 0, -1]
-        elif position == "bottom-right":
-            target_pattern = [-1, -1, 0, 0]
-        elif position == "bottom-left":
-            target_pattern = [0, -1, -1, 0]
-        elif position == "left":
-            target_pattern = [0, 0, -1, 0]
-        elif position == "right":
-            target_pattern = [-1, 0, 0, 0]
-        elif position == "top":
-            target_pattern = [0, 0, 0, -1]
-        elif position == "bottom":
-            target_pattern = [0, -1, 0, 0]
-        else:
+        if position not in CORNER_PATTERNS:
             raise ValueError("Invalid position")
+        target_pattern = CORNER_PATTERNS[position]
 
         while not self.matches_pattern(self.get_faces(), target_pattern):
             self.rotate()
@@ -94,18 +98,9 @@ class PuzzlePiece:
         Args:
             position: Target edge position.
         """
-        target_pattern = []
-
-        if position == "left":
-            target_pattern = [0, -1, -1, -1]
-        elif position == "top":
-            target_pattern = [-1, 0, -1, -1]
-        elif position == "right":
-            target_pattern = [-1, -1, 0, -1]
-        elif position == "bottom":
-            target_pattern = [-1, -1, -1, 0]
-        else:
+        if position not in EDGE_PATTERNS:
             raise ValueError("Invalid position")
+        target_pattern = EDGE_PATTERNS[position]
 
         while not self.matches_pattern(self.get_faces(), target_pattern):
             self.rotate()
@@ -1,20 +1,114 @@
 # puzzle_solver.py
 
 from puzzle.puzzle import Puzzle
-from puzzle.puzzle_piece import PuzzlePiece
-from typing import List, Optional
+from puzzle.puzzle_piece import CORNER_PATTERNS
+from puzzle.compact_piece import CompactPiece, Faces, Placement
+from puzzle.piece_index import Candidate, CandidateKey, PieceIndex
+from puzzle.search_budget import SearchBudget, SearchStopped, SolveResult
+from puzzle.search_checkpoint import SearchCheckpoint, fingerprint_puzzle
+from puzzle.search_stats import POSITION_CLASSES, SearchStats
+from puzzle.solution_format import PackedSolutions, write_solutions
+from puzzle.transposition_table import TranspositionTable
+from itertools import islice, permutations
+from math import factorial
+import time
+from io import StringIO
+from threading import Event
+from typing import BinaryIO, Dict, Iterator, List, Optional, TextIO, Tuple, Union
+
+# (piece mask, previous copy mask, placement, faces) of an index candidate
+SearchCandidate = Tuple[int, int, Placement, Faces]
+# (top face, left border, right border, bottom border) of a cell
+BelowKey = Tuple[int, bool, bool, bool]
+
+# Largest puzzle, in pieces, the bitmask kernel is used for: candidate
+# sets are then one or two machine words
+BITMASK_KERNEL_MAX_PIECES = 128
+
+# Most search states count_by_profile keeps for a cell before it gives up
+# and the solutions are counted by searching
+MAX_PROFILE_STATES = 1 << 18
 
 
 class PuzzleSolver:
-    def __init__(self, puzzle: Puzzle):
+    # The search runs row-major through solve_puzzle, so its position can
+    # be checkpointed and resumed
+    resumable = True
+
+    def __init__(self, puzzle: Puzzle, expand_identical: bool = True, memo_size: Optional[int] = None, stats: Optional[SearchStats] = None, bitmask_kernel: bool = False):
         """
         PuzzleSolver class constructor.
 
+        Pieces that are identical up to rotation are always searched once
+        per class. With expand_identical, each solution found is expanded
+        into every way of swapping those pieces; otherwise only one of
+        them is reported.
+
+        With memo_size, the row-major search remembers up to that many
+        dead states, keyed at the start of each row, so that a frontier
+        reached again through another placement order is not searched
+        twice.
+
+        With stats, every solve resets and fills its counters and notifies
+        its hooks. Without them the counters are skipped.
+
+        With bitmask_kernel, puzzles of up to BITMASK_KERNEL_MAX_PIECES
+        pieces are searched with candidate bitmasks instead of candidate
+        lists. It visits slightly fewer nodes but each one costs more, so
+        it is slower on the bundled puzzles and off by default.
+
         Args:
             puzzle: Puzzle object to solve.
+            expand_identical: Report every permutation of identical pieces.
+            memo_size: Maximum number of dead states to remember, or None
+                to disable the memo.
+            stats: Search counters and progress hooks, or None.
+            bitmask_kernel: Search with the bitmask kernel.
+
+        Raises:
+            ValueError: If both the memo and the bitmask kernel are asked
+                for, since only the candidate list search keeps the memo.
         """
+        if memo_size is not None and bitmask_kernel:
+            raise ValueError("The memo is not kept by the bitmask kernel.")
         self.puzzle = puzzle
-        self.solutions = []
+        self.expand_identical = expand_identical
+        self.memo_size = memo_size
+        self.stats = stats
+        self.bitmask_kernel = bitmask_kernel
+        self.memo: Optional[TranspositionTable] = None
+        # Solutions stored by solve, packed four bytes per cell
+        self.solutions = PackedSolutions(puzzle.get_cols(), puzzle.get_rows())
+        self.pieces: List[CompactPiece] = []
+        self.pieces_by_id: Dict[int, CompactPiece] = {}
+        self.piece_masks: Dict[int, int] = {}
+        self.previous_copy_masks: Dict[int, int] = {}
+        self.piece_classes: Dict[int, int] = {}
+        # Classes of pieces identical up to rotation, in puzzle order
+        self.identical_classes: List[List[CompactPiece]] = []
+        self.all_pieces_mask: int = 0
+        self.index: Optional[PieceIndex] = None
+        self.search_candidates: Dict[CandidateKey, List[SearchCandidate]] = {}
+        self.use_bitmask_kernel: bool = False
+        self.fit_masks: Dict[CandidateKey, int] = {}
+        self.fit_placements: Dict[CandidateKey, Dict[int, List[Tuple[Placement, Faces]]]] = {}
+        self.fit_counts: Dict[CandidateKey, int] = {}
+        self.below_masks: Dict[BelowKey, int] = {}
+        self.next_copy_masks: Dict[int, int] = {}
+        self.infeasible_reason: Optional[str] = None
+        # Position class of each cell, for the stats
+        self.cell_classes: List[str] = []
+        # Pieces placed by the search since prepare
+        self.num_nodes: int = 0
+        # Budget of the running solve, checked by the search every few nodes
+        self.budget: Optional[SearchBudget] = None
+        # Grid of the running row-major search, the position a checkpoint saves
+        self.search_solution: Optional[List[List[Optional[Placement]]]] = None
+        # Solutions expanded from the search's current solution and handed
+        # out, None while searching
+        self.num_expanded: Optional[int] = None
+        # Checkpoint state the running solve resumes from, or None
+        self.resume_state: Optional[dict] = None
 
     def get_solutions_as_string(self) -> str:
         """
@@ -23,88 +117,1085 @@ class PuzzleSolver:
         Returns:
             Formatted string containing the solutions.
         """
-        separator = "\n"
-        result = f"{separator}Solution(s){separator}"
-        for solution in self.solutions:
-            for row in solution:
-                for piece in row:
-                    result += f"{piece.get_id()} " if piece is not None else "null "
-                result += separator
-            result += separator
+        result = StringIO()
+        write_solutions(result, self.solutions, self.puzzle.get_cols(),
+                        self.puzzle.get_rows())
+        return result.getvalue()
+
+    def write_solutions(self, file: Union[TextIO, BinaryIO], output_format: str = "text", max_solutions: Optional[int] = None, timeout: Optional[float] = None, max_nodes: Optional[int] = None, cancel_token: Optional[Event] = None, checkpoint: Optional[SearchCheckpoint] = None, resume: bool = False) -> SolveResult:
+        """
+        Solve the puzzle, writing each solution as it is found instead of
+        storing it.
+
+        Args:
+            file: File open for text writing, or binary writing for the
+                "binary" format.
+            output_format: One of SOLUTION_FORMATS.
+            max_solutions: Stop the search after this many solutions, or
+                None to find them all.
+            timeout: Stop the search after this many seconds, or None.
+            max_nodes: Stop the search after this many nodes, or None.
+            cancel_token: Event that stops the search once set, or None.
+            checkpoint: Checkpoint the position of the search is saved to,
+                or None.
+            resume: Resume the search from the checkpoint, appending the
+                solutions to a file that already holds the ones written
+                before it.
+
+        Returns:
+            Outcome of the solve, with the number of solutions written.
+        """
+        result = SolveResult()
+        budget = SearchBudget(timeout, max_nodes, cancel_token)
+        write_solutions(file, self.iter_within_budget(result, max_solutions, budget,
+                                                      checkpoint=checkpoint, resume=resume),
+                        self.puzzle.get_cols(), self.puzzle.get_rows(),
+                        output_format, append=resume)
         return result
 
-    def solve(self) -> None:
+    def solve(self, max_solutions: Optional[int] = None, timeout: Optional[float] = None, max_nodes: Optional[int] = None, cancel_token: Optional[Event] = None, checkpoint: Optional[SearchCheckpoint] = None, resume: bool = False) -> SolveResult:
         """
         Solve the puzzle and store the solutions.
+
+        When a budget runs out, the solutions found so far are kept and
+        the result says why the search stopped.
+
+        Args:
+            max_solutions: Stop the search after this many solutions, or
+                None to find them all.
+            timeout: Stop the search after this many seconds, or None.
+            max_nodes: Stop the search after this many nodes, or None.
+            cancel_token: Event that stops the search once set, for
+                example from another thread, or None.
+            checkpoint: Checkpoint the position of the search is saved to,
+                or None.
+            resume: Resume the search from the checkpoint. Only the
+                solutions found after it are stored.
+
+        Returns:
+            Outcome of the solve, with solver.solutions as its solutions.
+        """
+        result = SolveResult()
+        budget = SearchBudget(timeout, max_nodes, cancel_token)
+        for solution in self.iter_within_budget(result, max_solutions, budget,
+                                                checkpoint=checkpoint, resume=resume):
+            self.solutions.append(solution)
+        result.solutions = self.solutions
+        return result
+
+    def iter_within_budget(self, result: SolveResult, max_solutions: Optional[int] = None, budget: Optional[SearchBudget] = None, solutions: Optional[Iterator[List[List[Optional[Placement]]]]] = None, checkpoint: Optional[SearchCheckpoint] = None, resume: bool = False) -> Iterator[List[List[Optional[Placement]]]]:
+        """
+        Yield the solutions until the search ends or its budget runs out,
+        filling in the result once the iteration stops.
+
+        With a checkpoint, the position of the search is saved at the
+        budget checks once its interval has passed, and when the search
+        stops, unless the caller stops the iteration itself. A resumed
+        search counts the solutions handed out before the checkpoint in
+        result.num_solutions and max_solutions.
+
+        Args:
+            result: Result to fill in.
+            max_solutions: Stop the search after this many solutions, or
+                None to find them all.
+            budget: Limits of the search, or None.
+            solutions: Solutions of the search, defaults to
+                iter_solutions.
+            checkpoint: Checkpoint the position of the search is saved to,
+                or None.
+            resume: Resume the search from the checkpoint.
+
+        Yields:
+            Solution grid of (piece id, rotation) placements.
+
+        Raises:
+            ValueError: If the solver cannot be checkpointed, or the
+                checkpoint does not match the search.
+        """
+        self.search_solution = None
+        self.resume_state = None
+        if checkpoint is not None:
+            if not self.resumable:
+                raise ValueError(f"{type(self).__name__} cannot be checkpointed.")
+            if resume:
+                self.resume_state = checkpoint.load(fingerprint_puzzle(self.puzzle))
+                result.num_solutions = self.resume_state["num_solutions"]
+
+            def save_if_due(num_nodes: int) -> None:
+                if checkpoint.is_due():
+                    self.save_checkpoint(checkpoint, result.num_solutions, num_nodes)
+
+            if budget is None:
+                budget = SearchBudget()
+            budget.on_check = save_if_due
+            checkpoint.start()
+
+        if budget is not None and not budget.is_limited():
+            # Without limits the search skips the checks
+            budget = None
+        if budget is not None:
+            budget.start()
+        self.budget = budget
+
+        start_time = time.perf_counter()
+        # Left as None if the caller stops the iteration itself
+        result.stop_reason = None
+        try:
+            if max_solutions is not None and result.num_solutions >= max_solutions:
+                result.stop_reason = "max_solutions"
+                return
+            if solutions is None:
+                solutions = self.iter_solutions()
+            for solution in solutions:
+                result.num_solutions += 1
+                yield solution
+                if result.num_solutions == max_solutions:
+                    result.stop_reason = "max_solutions"
+                    return
+                if budget is not None:
+                    # Expanded solutions are yielded without placing any node
+                    budget.check(self.num_nodes)
+            result.stop_reason = "complete"
+        except SearchStopped as e:
+            result.stop_reason = e.reason
+        finally:
+            self.budget = None
+            result.num_nodes = self.num_nodes
+            result.seconds = time.perf_counter() - start_time
+            # Without any search, the previous checkpoint is still right
+            if checkpoint is not None and (result.is_complete() or (
+                    result.stop_reason is not None and self.search_solution is not None)):
+                self.save_checkpoint(checkpoint, result.num_solutions, self.num_nodes,
+                                     result.is_complete())
+            self.resume_state = None
+
+    def iter_solutions(self) -> Iterator[List[List[Optional[Placement]]]]:
+        """
+        Solve the puzzle lazily, yielding each solution as it is found.
+
+        The search only advances while the generator is consumed, so
+        stopping the iteration stops the search.
+
+        Yields:
+            Solution grid of (piece id, rotation) placements.
+        """
+        self.prepare()
+        state = self.resume_state
+        if self.infeasible_reason is not None or (state is not None and state["complete"]):
+            self.finish_stats()
+            return
+
+        # Solutions expanded from the first one found already handed out
+        num_skipped = 0
+        if state is None:
+            search = self.iter_search()
+        else:
+            path = self.get_resume_path(state)
+            search = self.iter_search_from(path, state["cursors"])
+            num_skipped = state["skip"]
+
+        stats = self.stats
+        try:
+            for solution in search:
+                solutions = self.expand_solution(solution) if self.expand_identical else [solution]
+                self.num_expanded = num_skipped
+                if num_skipped:
+                    solutions = islice(solutions, num_skipped, None)
+                    num_skipped = 0
+                for expanded_solution in solutions:
+                    if stats is not None:
+                        stats.record_solution()
+                    self.num_expanded += 1
+                    yield expanded_solution
+                self.num_expanded = None
+        finally:
+            self.num_expanded = None
+            self.finish_stats()
+
+    def count_solutions(self) -> int:
+        """
+        Count the solutions without storing them.
+
+        Puzzles at most two pieces wide (or high) are counted with a
+        row-profile dynamic program, as long as it needs at most
+        MAX_PROFILE_STATES states per cell. Other puzzles are counted by
+        running the search.
+
+        Returns:
+            Number of solutions solve would find.
+        """
+        self.prepare()
+        if self.infeasible_reason is not None:
+            self.finish_stats()
+            return 0
+
+        num_solutions = None
+        if min(self.puzzle.get_cols(), self.puzzle.get_rows()) <= 2:
+            num_solutions = self.count_by_profile()
+        if num_solutions is None:
+            num_solutions = self.count_by_search()
+
+        if self.expand_identical:
+            num_solutions *= self.count_expansions()
+        if self.stats is not None:
+            self.stats.num_solutions = num_solutions
+        self.finish_stats()
+        return num_solutions
+
+    def finish_stats(self) -> None:
+        """
+        Close the stats of a solve, if any, with the final node count.
+        """
+        if self.stats is not None:
+            self.stats.finish(self.num_nodes)
+
+    def count_by_search(self) -> int:
+        """
+        Count the solutions, one per class of identical pieces, by running
+        the search.
+
+        Strips are walked as Eulerian trails by the chain engine, which
+        has no dead ends, so the time is linear in the number of solutions.
+        prepare must have been called before.
+
+        Returns:
+            Number of solutions, with identical pieces not swapped.
+        """
+        if (self.puzzle.is_one_dimensional()
+                and self.puzzle.get_cols() * self.puzzle.get_rows() > 1):
+            # Imported here since the chain engine is built on this class
+            from puzzle.chain_solver import ChainPuzzleSolver
+            chain_solver = ChainPuzzleSolver(self.puzzle, self.expand_identical)
+            chain_solver.prepare()
+            try:
+                return chain_solver.count_by_search()
+            finally:
+                self.num_nodes += chain_solver.num_nodes
+        return sum(1 for _ in self.iter_search())
+
+    def count_by_profile(self) -> Optional[int]:
+        """
+        Count the solutions, one per class of identical pieces, with a
+        transfer-matrix dynamic program.
+
+        Cells are filled along the shorter side of the puzzle, and the
+        search states that share the used pieces and the faces exposed by
+        the frontier are merged with their counts added up, so each state
+        is only extended once. Every state is a node. prepare must have
+        been called before.
+
+        The used pieces are part of the state, so it is not polynomial:
+        identical pieces are used in order, which bounds the states by the
+        product of (copies + 1) over the classes of identical pieces, times
+        the frontier faces. That is exponential in the number of classes,
+        and distinct pieces give one class each. It pays off on strips
+        with few classes, such as 1x100 with faces 1-3 (7 classes, 41 s),
+        but a 1x40 strip with faces 1-6 (19 classes) already takes minutes,
+        so it gives up once a cell has more than MAX_PROFILE_STATES states.
+
+        Returns:
+            Number of solutions, with identical pieces not swapped, or None
+            if there are too many states.
+        """
+        cols = self.puzzle.get_cols()
+        rows = self.puzzle.get_rows()
+        # Lines are rows when filling row by row, columns otherwise
+        row_major = cols <= rows
+        width = cols if row_major else rows
+        # Face of a placed piece towards the next cell of its line, and
+        # towards the same cell of the next line
+        near_side, far_side = (2, 3) if row_major else (3, 2)
+
+        piece, rotation = self.find_fixed_corner_piece(self.pieces)
+        faces = piece.get_faces(rotation)
+        # State: (used pieces, far faces of the last line of cells, near
+        # face of the last cell), cells before the first one are borders
+        states = {(self.piece_masks[piece.get_id()],
+                   (0,) * (width - 1) + (faces[far_side],),
+                   faces[near_side]): 1}
+
+        for cell in range(1, cols * rows):
+            line, position = divmod(cell, width)
+            row, col = (line, position) if row_major else (position, line)
+
+            next_states: Dict[Tuple[int, Tuple[int, ...], int], int] = {}
+            for (used_pieces, far_faces, near_face), count in states.items():
+                near_face = near_face if position else 0
+                if row_major:
+                    key = (near_face, far_faces[0], col == cols - 1, row == rows - 1)
+                else:
+                    key = (far_faces[0], near_face, col == cols - 1, row == rows - 1)
+
+                for piece_mask, previous_copy_mask, _, faces in self.search_candidates.get(key, []):
+                    if (
+                        not used_pieces & piece_mask
+                        and used_pieces & previous_copy_mask == previous_copy_mask
+                    ):
+                        next_state = (used_pieces | piece_mask,
+                                      far_faces[1:] + (faces[far_side],),
+                                      faces[near_side])
+                        next_states[next_state] = next_states.get(
+                            next_state, 0) + count
+                if len(next_states) > MAX_PROFILE_STATES:
+                    self.num_nodes += len(next_states)
+                    return None
+            self.num_nodes += len(next_states)
+            states = next_states
+
+        return sum(states.values())
+
+    def count_expansions(self) -> int:
+        """
+        Count the ways expand_solution swaps the identical pieces of a
+        solution, which is the same for every solution.
+
+        Returns:
+            Number of expanded solutions per solution found by the search.
+        """
+        fixed_corner = self.find_fixed_corner_piece(self.pieces)
+        fixed_id = fixed_corner[0].get_id() if fixed_corner is not None else None
+
+        class_sizes: Dict[int, int] = {}
+        for piece in self.pieces:
+            if piece.get_id() != fixed_id:
+                class_index = self.piece_classes[piece.get_id()]
+                class_sizes[class_index] = class_sizes.get(class_index, 0) + 1
+
+        num_expansions = 1
+        for class_size in class_sizes.values():
+            num_expansions *= factorial(class_size)
+        return num_expansions
+
+    def iter_search(self) -> Iterator[List[List[Optional[Placement]]]]:
+        """
+        Run the search, yielding one solution per class of identical pieces.
+
+        prepare must have been called before.
+
+        Yields:
+            Solution grid of (piece id, rotation) placements.
+        """
+        yield from self.iter_subtree([])
+
+    def iter_subtree(self, prefix: List[Placement]) -> Iterator[List[List[Optional[Placement]]]]:
+        """
+        Yield the solutions that start with a prefix of placements.
+
+        prepare must have been called before.
+
+        Args:
+            prefix: Placements of the first cells, in row-major order.
+
+        Yields:
+            Solution grid of (piece id, rotation) placements.
+        """
+        current_solution, used_pieces = self.place_prefix(prefix)
+        row, col = divmod(len(prefix), self.puzzle.get_cols())
+        yield from self.solve_puzzle(row, col, current_solution, used_pieces)
+
+    def iter_search_from(self, path: List[Placement], cursors: List[int]) -> Iterator[List[List[Optional[Placement]]]]:
+        """
+        Run the search from a position on: the subtree below a path of
+        placements, then, from the deepest cell up, the subtrees of the
+        candidates that come after the path's, in search order.
+
+        prepare must have been called before.
+
+        Args:
+            path: Placements of the first cells, in row-major order.
+            cursors: Index of each placement of the path in its cell's
+                search candidates, as get_cursors.
+
+        Yields:
+            Solution grid of (piece id, rotation) placements.
+        """
+        yield from self.iter_subtree(path)
+        # The fixed corner has no other candidate
+        for depth in range(len(path) - 1, 0, -1):
+            prefix = path[:depth]
+            _, used_pieces = self.place_prefix(prefix)
+            placed_faces = [self.get_placed_faces(placement) for placement in prefix]
+            candidates = self.search_candidates.get(
+                self.get_cell_key(depth, placed_faces), [])
+            for piece_mask, previous_copy_mask, placement, _ in candidates[cursors[depth] + 1:]:
+                if (
+                    not used_pieces & piece_mask
+                    and used_pieces & previous_copy_mask == previous_copy_mask
+                ):
+                    yield from self.iter_subtree(prefix + [placement])
+
+    def get_cursors(self, path: List[Placement]) -> List[int]:
+        """
+        Get the index of each placement of a path in its cell's search
+        candidates.
+
+        prepare must have been called before.
+
+        Args:
+            path: Placements of the first cells, in row-major order.
+
+        Returns:
+            Cursor of each cell, 0 for the fixed corner.
+
+        Raises:
+            ValueError: If a placement is not a candidate of its cell.
+        """
+        cursors = [0] * len(path)
+        placed_faces = [self.get_placed_faces(placement) for placement in path]
+        for depth in range(1, len(path)):
+            candidates = self.search_candidates.get(
+                self.get_cell_key(depth, placed_faces), [])
+            placements = [candidate[2] for candidate in candidates]
+            if path[depth] not in placements:
+                raise ValueError("The checkpoint does not match the search.")
+            cursors[depth] = placements.index(path[depth])
+        return cursors
+
+    def save_checkpoint(self, checkpoint: SearchCheckpoint, num_solutions: int, num_nodes: int, complete: bool = False) -> None:
+        """
+        Save the position of the running search.
+
+        The position is the path of placements of the search grid, whose
+        subtree is still to be searched, less the solutions already
+        expanded from it when it is a whole solution.
+
+        Args:
+            checkpoint: Checkpoint to save to.
+            num_solutions: Solutions handed out so far.
+            num_nodes: Nodes searched so far.
+            complete: The search is over.
+        """
+        grid = self.search_solution if not complete else None
+        path = []
+        if grid is not None:
+            for placement in (placement for row in grid for placement in row):
+                if placement is None:
+                    break
+                path.append(placement)
+        checkpoint.save({
+            "fingerprint": fingerprint_puzzle(self.puzzle),
+            "expand_identical": self.expand_identical,
+            "complete": complete,
+            "grid": ([[list(placement) if placement is not None else None for placement in row]
+                      for row in grid] if grid is not None else None),
+            "cursors": self.get_cursors(path),
+            "used_pieces": sorted(placement[0] for placement in path),
+            "skip": self.num_expanded or 0,
+            "num_solutions": num_solutions,
+            "num_nodes": num_nodes,
+        })
+
+    def get_resume_path(self, state: dict) -> List[Placement]:
+        """
+        Get the path of placements a checkpoint resumes from, checking it
+        against the search.
+
+        prepare must have been called before.
+
+        Args:
+            state: Position loaded from a checkpoint.
+
+        Returns:
+            Placements of the first cells, in row-major order.
+
+        Raises:
+            ValueError: If the checkpoint does not match the search.
+        """
+        if state["expand_identical"] != self.expand_identical:
+            raise ValueError("The checkpoint was saved with another expand_identical.")
+        path = []
+        grid = state["grid"] or []
+        for placement in (placement for row in grid for placement in row):
+            if placement is None:
+                break
+            path.append((placement[0], placement[1]))
+
+        fixed_corner = self.find_fixed_corner_piece(self.pieces)
+        if (
+            len(path) > self.puzzle.get_cols() * self.puzzle.get_rows()
+            or path and path[0] != (fixed_corner[0].get_id(), fixed_corner[1])
+            or sorted(placement[0] for placement in path) != state["used_pieces"]
+            or len(set(state["used_pieces"])) != len(path)
+            or self.get_cursors(path) != state["cursors"]
+        ):
+            raise ValueError("The checkpoint does not match the search.")
+        return path
+
+    def place_prefix(self, prefix: List[Placement]) -> Tuple[List[List[Optional[Placement]]], int]:
+        """
+        Build the solution grid and used pieces bitmask for a prefix.
+
+        Args:
+            prefix: Placements of the first cells, in row-major order.
+
+        Returns:
+            (solution grid, used pieces bitmask) with the prefix placed.
         """
         current_solution = [[None]*self.puzzle.get_cols()
                             for _ in range(self.puzzle.get_rows())]
-        self.solve_puzzle(0, 0, current_solution, [])
+        used_pieces = 0
+        for cell, placement in enumerate(prefix):
+            row, col = divmod(cell, self.puzzle.get_cols())
+            current_solution[row][col] = placement
+            used_pieces |= self.piece_masks[placement[0]]
+        return current_solution, used_pieces
 
-    def solve_puzzle(self, row: int, col: int, current_solution: List[List[Optional[PuzzlePiece]]], used_pieces: List[PuzzlePiece]) -> None:
+    def prepare(self) -> None:
+        """
+        Build the compact pieces, piece masks and index used by the search.
         """
-        Recursively solve the puzzle.
+        self.num_nodes = 0
+        cols = self.puzzle.get_cols()
+        rows = self.puzzle.get_rows()
+        self.cell_classes = [
+            POSITION_CLASSES[min(2, (col == 0) + (row == 0)
+                                 + (col == cols - 1) + (row == rows - 1))]
+            for row in range(rows) for col in range(cols)]
+        if self.stats is not None:
+            self.stats.reset(cols * rows)
+            self.stats.emit("start")
+        # Work on immutable copies so the puzzle's pieces are never rotated
+        self.pieces = self.puzzle.get_compact_pieces()
+        self.pieces_by_id = {piece.get_id(): piece for piece in self.pieces}
+        # One bit per piece, by position, for the used pieces bitmask
+        self.piece_masks = {piece.get_id(): 1 << position
+                            for position, piece in enumerate(self.pieces)}
+        self.all_pieces_mask = (1 << len(self.pieces)) - 1
 
-        Args:
-            row: Current row in the puzzle.
-            col: Current column in the puzzle.
-            current_solution: Current state of the puzzle solution.
-            used_pieces: List of pieces that have already been used.
+        # A piece identical to an earlier one may only be used after it, so
+        # each class of identical pieces is branched on once per cell
+        self.previous_copy_masks = {}
+        self.piece_classes = {}
+        self.identical_classes = CompactPiece.group_identical(self.pieces)
+        for class_index, piece_class in enumerate(self.identical_classes):
+            previous_copy_mask = 0
+            for piece in piece_class:
+                self.previous_copy_masks[piece.get_id()] = previous_copy_mask
+                self.piece_classes[piece.get_id()] = class_index
+                previous_copy_mask = self.piece_masks[piece.get_id()]
+
+        self.index = PieceIndex(self.pieces)
+        # Index candidates with the masks and faces the search checks
+        self.search_candidates = {
+            key: [(self.piece_masks[piece.get_id()],
+                   self.previous_copy_masks[piece.get_id()],
+                   (piece.get_id(), rotation), piece.get_faces(rotation))
+                  for piece, rotation in candidates]
+            for key, candidates in self.index.candidates.items()
+        }
+        self.infeasible_reason = self.check_feasibility()
+        if self.memo_size is not None:
+            self.memo = TranspositionTable(self.memo_size)
+
+        self.use_bitmask_kernel = (self.bitmask_kernel
+                                   and len(self.pieces) <= BITMASK_KERNEL_MAX_PIECES)
+        if self.use_bitmask_kernel:
+            self.prepare_bitmask_kernel()
+
+    def prepare_bitmask_kernel(self) -> None:
+        """
+        Build the bitmasks of the pieces that fit each index key, and of
+        the pieces that can go below a placed bottom face.
+        """
+        self.fit_masks = {}
+        self.fit_placements = {}
+        self.fit_counts = {}
+        for key, candidates in self.search_candidates.items():
+            fit_mask = 0
+            placements: Dict[int, List[Tuple[Placement, Faces]]] = {}
+            for piece_mask, _, placement, faces in candidates:
+                fit_mask |= piece_mask
+                placements.setdefault(piece_mask, []).append((placement, faces))
+            self.fit_masks[key] = fit_mask
+            self.fit_placements[key] = placements
+            self.fit_counts[key] = len(candidates)
+
+        self.below_masks = {}
+        for piece in self.pieces:
+            for rotation in piece.distinct_rotations:
+                faces = piece.get_faces(rotation)
+                if faces[1]:
+                    key = (faces[1], faces[0] == 0, faces[2] == 0, faces[3] == 0)
+                    self.below_masks[key] = (self.below_masks.get(key, 0)
+                                             | self.piece_masks[piece.get_id()])
+
+        # Each used piece makes the next copy of its class usable
+        self.next_copy_masks = {piece_mask: 0
+                                for piece_mask in self.piece_masks.values()}
+        for piece_id, previous_copy_mask in self.previous_copy_masks.items():
+            if previous_copy_mask:
+                self.next_copy_masks[previous_copy_mask] = self.piece_masks[piece_id]
+
+    def check_feasibility(self) -> Optional[str]:
+        """
+        Check, before searching, that the puzzle can have a solution.
 
         Returns:
-            None
+            Reason why the puzzle cannot be solved, or None if it passes.
         """
-        num_pieces = len(self.puzzle.get_pieces())
+        reason = self.puzzle.check_feasibility()
+        if reason is not None:
+            return reason
 
-        # Calculate next row and column
-        next_row = row
-        next_col = col + 1
-        if next_col == self.puzzle.get_cols():
-            next_row += 1
-            next_col = 0
+        fixed_corner = self.find_fixed_corner_piece(self.pieces)
+        if fixed_corner is None or fixed_corner[1] is None:
+            return "no corner piece can be fixed at the top left."
+        return None
 
+    def solve_puzzle(self, row: int, col: int, current_solution: List[List[Optional[Placement]]], used_pieces: int) -> Iterator[List[List[Optional[Placement]]]]:
+        """
+        Solve the puzzle from a cell on, yielding the solutions found.
+
+        With bitmask_kernel, puzzles of up to BITMASK_KERNEL_MAX_PIECES
+        pieces are searched with the bitmask kernel, others with candidate
+        lists.
+
+        Args:
+            row: Current row in the puzzle.
+            col: Current column in the puzzle.
+            current_solution: Current state of the puzzle solution, as
+                (piece id, rotation) placements.
+            used_pieces: Bitmask of the pieces that have already been used.
+
+        Yields:
+            Copy of each solution grid found.
+        """
+        self.search_solution = current_solution
         # Base case: if we've placed all the pieces, we found a solution
-        if len(used_pieces) == num_pieces:
-            # Save current solution to the solutions array
-            self.solutions.append([row[:] for row in current_solution])
+        if used_pieces == self.all_pieces_mask:
+            # Hand a copy of the current solution to the caller
+            yield [row[:] for row in current_solution]
             return
 
-        pieces = self.puzzle.get_pieces()
+        cols = self.puzzle.get_cols()
+        start_cell = row * cols + col
 
-        if row == 0 and col == 0:
+        # Faces of the placed pieces, by cell, starting with the prefix
+        placed_faces: List[Optional[Faces]] = [None] * (cols * self.puzzle.get_rows())
+        for cell in range(start_cell):
+            placed_faces[cell] = self.get_placed_faces(
+                current_solution[cell // cols][cell % cols])
+
+        if self.use_bitmask_kernel:
+            yield from self.solve_bitmask(start_cell, current_solution,
+                                          used_pieces, placed_faces)
+        else:
+            yield from self.solve_candidates(start_cell, current_solution,
+                                             used_pieces, placed_faces)
+
+    def solve_candidates(self, start_cell: int, current_solution: List[List[Optional[Placement]]], used_pieces: int, placed_faces: List[Optional[Faces]]) -> Iterator[List[List[Optional[Placement]]]]:
+        """
+        Search the cells from start_cell on, with the index candidate lists.
+
+        The search is iterative: explicit per-cell stacks hold the
+        candidates of every cell from the starting one and the cursor of
+        the next one to try, so the puzzle size is not bound by the
+        recursion limit.
+
+        Args:
+            start_cell: First empty cell, in row-major order.
+            current_solution: Current state of the puzzle solution, with
+                the cells before start_cell placed.
+            used_pieces: Bitmask of the pieces that have already been used.
+            placed_faces: Faces of the placed pieces, by cell.
+
+        Yields:
+            Copy of each solution grid found.
+        """
+        cols = self.puzzle.get_cols()
+        num_cells = len(placed_faces)
+        all_pieces_mask = self.all_pieces_mask
+        search_candidates = self.search_candidates
+
+        if start_cell == 0:
             # Find fixed top left corner to avoid rotated solutions
-            fixed_corner_piece = self.find_fixed_corner_piece(pieces)
+            fixed_corner = self.find_fixed_corner_piece(self.pieces)
+            if fixed_corner is None:
+                return
+            piece, rotation = fixed_corner
+            candidates = [(self.piece_masks[piece.get_id()], 0,
+                           (piece.get_id(), rotation), piece.get_faces(rotation))]
+        else:
+            # Only look at the pieces whose faces fit this cell
+            candidates = search_candidates.get(self.get_cell_key(
+                start_cell, placed_faces), [])
+
+        # Per cell being searched: its candidates, the cursor of the next
+        # one to try and the used pieces before placing it
+        cell_candidates: List[List[SearchCandidate]] = [[]] * num_cells
+        cursors = [0] * num_cells
+        used_before = [0] * num_cells
+
+        # With the memo, the state of each cell that starts a row and the
+        # number of solutions found when it was entered, to tell if its
+        # subtree was dead. States are only keyed at row boundaries, where
+        # the frontier is the bottom faces of the last row, so the cells
+        # within a row cost nothing more
+        memo = self.memo
+        states: List[Optional[tuple]] = [None] * num_cells
+        solutions_before = [0] * num_cells
+        num_solutions = 0
+
+        # Counters are only kept with stats
+        stats = self.stats
+        cell_classes = self.cell_classes
+        # Nodes left before the next budget check, never 0 without budget
+        budget = self.budget
+        countdown = budget.check(self.num_nodes) if budget is not None else -1
+
+        cell = start_cell
+        cell_candidates[cell] = candidates
+        used_before[cell] = used_pieces
+        num_nodes = 0
+        try:
+            while cell >= start_cell:
+                candidates = cell_candidates[cell]
+                cursor = cursors[cell]
+                used_pieces = used_before[cell]
 
-            # Add to used pieces
-            used_pieces.append(fixed_corner_piece)
+                # Skip to the next candidate that is not used yet
+                num_candidates = len(candidates)
+                while cursor < num_candidates:
+                    piece_mask, previous_copy_mask, placement, faces = candidates[cursor]
+                    cursor += 1
+                    if (
+                        not used_pieces & piece_mask
+                        and used_pieces & previous_copy_mask == previous_copy_mask
+                    ):
+                        break
+                else:
+                    if stats is not None:
+                        num_tried = cursor - cursors[cell]
+                        stats.record_tries(cell_classes[cell], num_tried, num_tried)
+                        stats.record_backtrack(cell)
+                    if memo is not None and states[cell] is not None and num_solutions == solutions_before[cell]:
+                        memo.add(states[cell])
+
+                    # Backtrack: Undo the placement and return to the previous cell
+                    current_solution[cell // cols][cell % cols] = None
+                    placed_faces[cell] = None
+                    cell -= 1
+                    continue
+                if stats is not None:
+                    num_tried = cursor - cursors[cell]
+                    stats.record_tries(cell_classes[cell], num_tried, num_tried - 1)
+                    stats.record_node()
+                cursors[cell] = cursor
+
+                # Place the piece, in its rotation, in the current solution
+                current_solution[cell // cols][cell % cols] = placement
+                placed_faces[cell] = faces
+                used_pieces |= piece_mask
+                num_nodes += 1
+                countdown -= 1
+                if not countdown:
+                    countdown = budget.check(self.num_nodes + num_nodes)
+
+                if used_pieces == all_pieces_mask:
+                    num_solutions += 1
+                    # Keep num_nodes current while the caller holds the solution
+                    self.num_nodes += num_nodes
+                    num_nodes = 0
+                    yield [row[:] for row in current_solution]
+                elif cell + 1 < num_cells:
+                    if memo is not None and not (cell + 1) % cols:
+                        state = self.get_row_state(cell + 1, used_pieces, placed_faces)
+                        if state in memo:
+                            # Dead state already searched from another order
+                            continue
+                        states[cell + 1] = state
+                        solutions_before[cell + 1] = num_solutions
+
+                    # Move on to the next cell with the piece added to used pieces
+                    cell += 1
+                    cell_candidates[cell] = search_candidates.get(
+                        self.get_cell_key(cell, placed_faces), [])
+                    cursors[cell] = 0
+                    used_before[cell] = used_pieces
+        finally:
+            self.num_nodes += num_nodes
+
+    def solve_bitmask(self, start_cell: int, current_solution: List[List[Optional[Placement]]], used_pieces: int, placed_faces: List[Optional[Faces]]) -> Iterator[List[List[Optional[Placement]]]]:
+        """
+        Search the cells from start_cell on, with candidate bitmasks.
+
+        The candidates of a cell are the AND of the pieces that fit its
+        index key with the pieces ready to be used (unused, and first of
+        their class among the unused), iterated lowest bit first, that is
+        in the same order as the candidate lists. Each placement is also
+        checked against the cell below it, which must still have a ready
+        piece for its top face.
 
-            # Place the piece in the current solution
-            current_solution[row][col] = fixed_corner_piece
+        The stats count the candidates as the candidate list search does:
+        every placement of the cell's key is tried, and the ones that are
+        not placed (their piece is not ready) are rejected when the cell
+        is exhausted.
 
-            # Recursively try to solve the puzzle with the updated solution
-            self.solve_puzzle(next_row, next_col,
-                              current_solution, used_pieces)
+        Args:
+            start_cell: First empty cell, in row-major order.
+            current_solution: Current state of the puzzle solution, with
+                the cells before start_cell placed.
+            used_pieces: Bitmask of the pieces that have already been used.
+            placed_faces: Faces of the placed pieces, by cell.
+
+        Yields:
+            Copy of each solution grid found.
+        """
+        cols = self.puzzle.get_cols()
+        num_cells = len(placed_faces)
+        last_row_start = num_cells - cols
+        all_pieces_mask = self.all_pieces_mask
+        fit_masks = self.fit_masks
+        fit_placements = self.fit_placements
+        fit_counts = self.fit_counts
+        below_masks = self.below_masks
+        next_copy_masks = self.next_copy_masks
+
+        ready_pieces = 0
+        for piece_id, piece_mask in self.piece_masks.items():
+            previous_copy_mask = self.previous_copy_masks[piece_id]
+            if (
+                not used_pieces & piece_mask
+                and used_pieces & previous_copy_mask == previous_copy_mask
+            ):
+                ready_pieces |= piece_mask
+
+        # Per cell being searched: the candidate pieces left to try, the
+        # placements of its key, the other rotations left for the current
+        # piece, and the used and ready pieces before placing it
+        remaining = [0] * num_cells
+        cell_placements: List[Dict[int, List[Tuple[Placement, Faces]]]] = [{}] * num_cells
+        pending_placements: List[List[Tuple[Placement, Faces]]] = [[]] * num_cells
+        current_masks = [0] * num_cells
+        used_before = [0] * num_cells
+        ready_before = [0] * num_cells
+        # With stats, the placements of each cell's key not placed yet
+        unplaced = [0] * num_cells
+
+        if start_cell == 0:
+            # Find fixed top left corner to avoid rotated solutions
+            fixed_corner = self.find_fixed_corner_piece(self.pieces)
+            if fixed_corner is None:
+                return
+            piece, rotation = fixed_corner
+            piece_mask = self.piece_masks[piece.get_id()]
+            remaining[0] = piece_mask
+            cell_placements[0] = {piece_mask: [((piece.get_id(), rotation),
+                                                piece.get_faces(rotation))]}
+            unplaced[0] = 1
         else:
-            # Iterate through all pieces and try placing them
-            for i in range(num_pieces):
-                current_piece = pieces[i]
+            key = self.get_cell_key(start_cell, placed_faces)
+            remaining[start_cell] = fit_masks.get(key, 0) & ready_pieces
+            cell_placements[start_cell] = fit_placements.get(key, {})
+            unplaced[start_cell] = fit_counts.get(key, 0)
+        used_before[start_cell] = used_pieces
+        ready_before[start_cell] = ready_pieces
 
-                if current_piece not in used_pieces and self.try_piece(row, col, current_piece, current_solution):
-                    # Add to used pieces
-                    used_pieces.append(current_piece)
+        # Counters are only kept with stats
+        stats = self.stats
+        cell_classes = self.cell_classes
+        # Nodes left before the next budget check, never 0 without budget
+        budget = self.budget
+        countdown = budget.check(self.num_nodes) if budget is not None else -1
 
-                    # Place the piece in the current solution
-                    current_solution[row][col] = current_piece
+        cell = start_cell
+        num_nodes = 0
+        try:
+            while cell >= start_cell:
+                pending = pending_placements[cell]
+                if pending:
+                    # Another rotation of the same piece fits the cell
+                    placement, faces = pending[0]
+                    pending_placements[cell] = pending[1:]
+                    piece_mask = current_masks[cell]
+                else:
+                    candidates = remaining[cell]
+                    if not candidates:
+                        if stats is not None:
+                            num_rejected = unplaced[cell]
+                            stats.record_tries(cell_classes[cell], num_rejected, num_rejected)
+                            stats.record_backtrack(cell)
+                        # Backtrack: Undo the placement and return to the previous cell
+                        current_solution[cell // cols][cell % cols] = None
+                        placed_faces[cell] = None
+                        cell -= 1
+                        continue
+
+                    # Take the lowest candidate bit
+                    piece_mask = candidates & -candidates
+                    remaining[cell] = candidates ^ piece_mask
+                    placements = cell_placements[cell][piece_mask]
+                    placement, faces = placements[0]
+                    if len(placements) > 1:
+                        pending_placements[cell] = placements[1:]
+                        current_masks[cell] = piece_mask
+
+                # Place the piece, in its rotation, in the current solution
+                col = cell % cols
+                current_solution[cell // cols][col] = placement
+                placed_faces[cell] = faces
+                used_pieces = used_before[cell] | piece_mask
+                num_nodes += 1
+                countdown -= 1
+                if not countdown:
+                    countdown = budget.check(self.num_nodes + num_nodes)
+                if stats is not None:
+                    unplaced[cell] -= 1
+                    stats.record_tries(cell_classes[cell], 1, 0)
+                    stats.record_node()
+
+                if used_pieces == all_pieces_mask:
+                    # Keep num_nodes current while the caller holds the solution
+                    self.num_nodes += num_nodes
+                    num_nodes = 0
+                    yield [row[:] for row in current_solution]
+                    continue
+                if cell + 1 == num_cells:
+                    continue
+
+                ready_pieces = ready_before[cell] & ~piece_mask | next_copy_masks[piece_mask]
+                if cell < last_row_start:
+                    # Forward check: some ready piece must fit below this one
+                    below_key = (faces[3], col == 0, col == cols - 1,
+                                 cell + cols >= last_row_start)
+                    if not below_masks.get(below_key, 0) & ready_pieces:
+                        continue
+
+                # Move on to the next cell with the piece added to used pieces
+                cell += 1
+                col = cell % cols
+                key = (faces[2] if col else 0,
+                       placed_faces[cell - cols][3] if cell >= cols else 0,
+                       col == cols - 1, cell >= last_row_start)
+                remaining[cell] = fit_masks.get(key, 0) & ready_pieces
+                cell_placements[cell] = fit_placements.get(key, {})
+                used_before[cell] = used_pieces
+                ready_before[cell] = ready_pieces
+                if stats is not None:
+                    unplaced[cell] = fit_counts.get(key, 0)
+        finally:
+            self.num_nodes += num_nodes
+
+    def get_row_state(self, cell: int, used_pieces: int, placed_faces: List[Optional[Faces]]) -> tuple:
+        """
+        Get the search state before filling a cell that starts a row.
+
+        The rest of the search only depends on the pieces left and on the
+        bottom faces of the row above, which is complete.
+
+        Args:
+            cell: Cell index of the first cell of a row, in row-major order.
+            used_pieces: Bitmask of the pieces that have already been used.
+            placed_faces: Faces of the placed pieces, by cell.
+
+        Returns:
+            Hashable state for the transposition table.
+        """
+        cols = self.puzzle.get_cols()
+        return used_pieces, tuple(faces[3] for faces in placed_faces[cell - cols:cell])
+
+    def get_cell_key(self, cell: int, placed_faces: List[Optional[Faces]]) -> CandidateKey:
+        """
+        Get the index key of a cell whose left and top neighbours are placed.
+
+        Args:
+            cell: Cell index, in row-major order.
+            placed_faces: Faces of the placed pieces, by cell.
+
+        Returns:
+            Key of the candidates that fit the cell.
+        """
+        cols = self.puzzle.get_cols()
+        row, col = divmod(cell, cols)
+        left_face = placed_faces[cell - 1][2] if col > 0 else 0
+        top_face = placed_faces[cell - cols][3] if row > 0 else 0
+        return (left_face, top_face, col == cols - 1,
+                row == self.puzzle.get_rows() - 1)
+
+    def expand_solution(self, solution: List[List[Optional[Placement]]]) -> Iterator[List[List[Optional[Placement]]]]:
+        """
+        Expand a solution into every way of swapping its identical pieces.
+
+        The fixed top left corner is never swapped, as in the search.
+
+        Args:
+            solution: Solution grid of (piece id, rotation) placements.
+
+        Yields:
+            The solution itself first, then every other permutation.
+        """
+        cells_by_class: Dict[int, List[Tuple[int, int]]] = {}
+        for row, placements in enumerate(solution):
+            for col, placement in enumerate(placements):
+                if placement is not None and (row, col) != (0, 0):
+                    class_index = self.piece_classes[placement[0]]
+                    cells_by_class.setdefault(
+                        class_index, []).append((row, col))
+
+        # Only classes with more than one piece in play can be swapped
+        swappable_cells = [cells for cells in cells_by_class.values()
+                           if len(cells) > 1]
+        if not swappable_cells:
+            yield solution
+            return
 
-                    # Recursively try to solve the puzzle with the updated solution
-                    self.solve_puzzle(next_row, next_col,
-                                      current_solution, used_pieces)
+        piece_ids = [[solution[row][col][0] for row, col in cells]
+                     for cells in swappable_cells]
+        for assignment in self.iter_assignments(piece_ids):
+            expanded_solution = [row[:] for row in solution]
+            for cells, assigned_ids in zip(swappable_cells, assignment):
+                for (row, col), piece_id in zip(cells, assigned_ids):
+                    faces = self.get_placed_faces(solution[row][col])
+                    rotation = self.pieces_by_id[piece_id].rotations.index(faces)
+                    expanded_solution[row][col] = (piece_id, rotation)
+            yield expanded_solution
 
-                    # Backtrack: Undo the changes made for backtracking
-                    current_solution[row][col] = None
-                    used_pieces.pop()
+    @staticmethod
+    def iter_assignments(piece_ids: List[List[int]]) -> Iterator[Tuple[Tuple[int, ...], ...]]:
+        """
+        Iterate over every combination of one permutation per list of ids.
+
+        Same order as itertools.product over the permutations, but lazy:
+        product would build every permutation of each class up front.
+
+        Args:
+            piece_ids: Piece ids of each class of identical pieces.
 
-    def find_fixed_corner_piece(self, pieces: List[PuzzlePiece]) -> Optional[PuzzlePiece]:
+        Yields:
+            One permutation of the ids of each class.
+        """
+        iterators = [permutations(ids) for ids in piece_ids]
+        assignment = [next(iterator) for iterator in iterators]
+        while True:
+            yield tuple(assignment)
+
+            # Advance the last class, carrying over to the previous ones
+            position = len(iterators) - 1
+            while position >= 0:
+                try:
+                    assignment[position] = next(iterators[position])
+                    break
+                except StopIteration:
+                    iterators[position] = permutations(piece_ids[position])
+                    assignment[position] = next(iterators[position])
+                    position -= 1
+            if position < 0:
+                return
+
+    def get_placed_faces(self, placement: Placement) -> Faces:
+        """
+        Get the faces of a placed piece in its placed rotation.
+
+        Args:
+            placement: (piece id, rotation) placement.
+
+        Returns:
+            Faces [left, top, right, bottom] of the placed piece.
+        """
+        piece_id, rotation = placement
+        return self.pieces_by_id[piece_id].get_faces(rotation)
+
+    def find_fixed_corner_piece(self, pieces: List[CompactPiece]) -> Optional[Candidate]:
         """
         Find the fixed corner piece based on the puzzle type.
 
@@ -112,163 +1203,22 @@ class PuzzleSolver:
             pieces: List of puzzle pieces.
 
         Returns:
-            Fixed corner puzzle piece or None if not found.
+            (piece, rotation) of the fixed corner or None if not found.
         """
         for piece in pieces:
-            if self.puzzle.is_one_dimensional():
+            if self.puzzle.get_cols() == 1 and self.puzzle.get_rows() == 1:
+                # The single cell is the corner: its piece is all borders
+                if piece.count_borders() == 4:
+                    return piece, 0
+            elif self.puzzle.is_one_dimensional():
                 if piece.is_linear_corner():
                     if self.puzzle.get_rows() == 1:
-                        piece.rotate_to_corner("left")
+                        rotation = piece.find_rotation(CORNER_PATTERNS["left"])
                     else:
-                        piece.rotate_to_corner("top")
-                    return piece
+                        rotation = piece.find_rotation(CORNER_PATTERNS["top"])
+                    return piece, rotation
             else:
                 if piece.is_corner():
-                    piece.rotate_to_corner("top-left")
-                    return piece
+                    rotation = piece.find_rotation(CORNER_PATTERNS["top-left"])
+                    return piece, rotation
         return None
-
-    def try_piece(self, row: int, col: int, piece: PuzzlePiece, solution: List[List[PuzzlePiece]]) -> bool:
-        """
-        Try placing a puzzle piece in the current position.
-
-        Args:
-            row: Current row in the puzzle.
-            col: Current column in the puzzle.
-            piece: Puzzle piece to try placing.
-            solution: Current state of the puzzle solution.
-
-        Returns:
-            True if the piece can be placed, False otherwise.
-        """
-        width = self.puzzle.get_cols()
-        height = self.puzzle.get_rows()
-
-        top_piece = solution[row - 1][col] if row > 0 else None
-        left_piece = solution[row][col - 1] if col > 0 else None
-
-        if self.puzzle.is_one_dimensional():
-            # One-dimensional puzzle
-            if height == 1:
-                # X linear
-                if col == 0:
-                    # Left Corner
-                    if piece.is_linear_corner():
-                        piece.rotate_to_corner("left")
-                        return True
-                elif 0 < col < width - 1:
-                    # Interior X linear
-                    if piece.is_double_edge():
-                        if left_piece.get_faces()[2] == piece.get_faces()[0]:
-                            return True
-                        for _ in range(3):
-                            piece.rotate()
-                            if left_piece.get_faces()[2] == piece.get_faces()[0]:
-                                return True
-                else:
-                    # Right Corner
-                    if piece.is_linear_corner():
-                        piece.rotate_to_corner("right")
-                        return True
-            else:
-                # Y linear
-                if row == 0:
-                    # Top corner
-                    if piece.is_linear_corner():
-                        piece.rotate_to_corner("top")
-                        return True
-                elif 0 < row < height - 1:
-                    # Interior Y linear
-                    if piece.is_double_edge():
-                        if top_piece.get_faces()[3] == piece.get_faces()[1]:
-                            return True
-                        for _ in range(3):
-                            piece.rotate()
-                            if top_piece.get_faces()[3] == piece.get_faces()[1]:
-                                return True
-                else:
-                    # Bottom corner
-                    if piece.is_linear_corner():
-                        piece.rotate_to_corner("bottom")
-                        return True
-        else:
-            # Square or rectangular puzzle
-            if row == 0:
-                # First row
-                if col == 0:
-                    # Top Left Corner
-                    if piece.is_corner():
-                        piece.rotate_to_corner("top-left")
-                        return True
-                elif col == width - 1:
-                    # Top Right Corner
-                    if piece.is_corner():
-                        piece.rotate_to_corner("top-right")
-                        if left_piece.get_faces()[2] == piece.get_faces()[0]:
-                            return True
-                else:
-                    # Top Edge
-                    if piece.is_edge():
-                        piece.rotate_to_edge("top")
-                        if left_piece.get_faces()[2] == piece.get_faces()[0]:
-                            return True
-            elif row == height - 1:
-                # Last row
-                if col == 0:
-                    # Bottom Left Corner
-                    if piece.is_corner():
-                        piece.rotate_to_corner("bottom-left")
-                        if top_piece.get_faces()[3] == piece.get_faces()[1]:
-                            return True
-                elif col == width - 1:
-                    # Bottom Right Corner
-                    if piece.is_corner():
-                        piece.rotate_to_corner("bottom-right")
-                        if (
-                            top_piece.get_faces()[3] == piece.get_faces()[1]
-                            and left_piece.get_faces()[2] == piece.get_faces()[0]
-                        ):
-                            return True
-                else:
-                    # Bottom Edge
-                    if piece.is_edge():
-                        piece.rotate_to_edge("bottom")
-                        if (
-                            top_piece.get_faces()[3] == piece.get_faces()[1]
-                            and left_piece.get_faces()[2] == piece.get_faces()[0]
-                        ):
-                            return True
-            else:
-                # Intermediate rows
-                if col == 0:
-                    # Left Edge
-                    if piece.is_edge():
-                        piece.rotate_to_edge("left")
-                        if top_piece.get_faces()[3] == piece.get_faces()[1]:
-                            return True
-                elif col == width - 1:
-                    # Right Edge
-                    if piece.is_edge():
-                        piece.rotate_to_edge("right")
-                        if (
-                            top_piece.get_faces()[3] == piece.get_faces()[1]
-                            and left_piece.get_faces()[2] == piece.get_faces()[0]
-                        ):
-                            return True
-                else:
-                    # Interior
-                    if piece.is_interior():
-                        if (
-                            top_piece.get_faces()[3] == piece.get_faces()[1]
-                            and left_piece.get_faces()[2] == piece.get_faces()[0]
-                        ):
-                            return True
-                        for _ in range(3):
-                            piece.rotate()
-                            if (
-                                top_piece.get_faces()[
-                                    3] == piece.get_faces()[1]
-                                and left_piece.get_faces()[2] == piece.get_faces()[0]
-                            ):
-                                return True
-        return False
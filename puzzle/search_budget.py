@@ -0,0 +1,122 @@
+# search_budget.py
+
+from threading import Event
+from typing import Callable, Optional
+import time
+
+# Most nodes searched between two budget checks
+BUDGET_CHECK_INTERVAL = 1024
+
+# Why a solve stopped
+STOP_REASONS = ["complete", "max_solutions", "timeout", "max_nodes", "cancelled"]
+
+
+class SearchStopped(Exception):
+    """
+    Raised inside the search when its budget is exhausted.
+    """
+
+    def __init__(self, reason: str):
+        super().__init__(f"Search stopped: {reason}")
+        self.reason = reason
+
+
+class SearchBudget:
+    def __init__(self, timeout: Optional[float] = None, max_nodes: Optional[int] = None, cancel_token: Optional[Event] = None):
+        """
+        SearchBudget class constructor.
+
+        Limits a solve in time, in nodes, or until a token is set from
+        another thread. The search only checks it every few nodes, so the
+        checks cost close to nothing, and after each solution, since the
+        expansion of identical pieces yields solutions without placing any
+        node. Those expanded solutions do not count towards max_nodes.
+
+        Args:
+            timeout: Seconds allowed from start, or None for no limit.
+            max_nodes: Nodes allowed, or None for no limit.
+            cancel_token: Event that cancels the search once set, or None.
+        """
+        if timeout is not None and timeout < 0:
+            raise ValueError("timeout must not be negative")
+        if max_nodes is not None and max_nodes < 0:
+            raise ValueError("max_nodes must not be negative")
+        self.timeout = timeout
+        self.max_nodes = max_nodes
+        self.cancel_token = cancel_token
+        self.deadline: Optional[float] = None
+        # Called with the nodes searched at every check, for example to
+        # save a checkpoint
+        self.on_check: Optional[Callable[[int], None]] = None
+
+    def is_limited(self) -> bool:
+        """
+        Check if the budget sets any limit.
+
+        Returns:
+            bool: False if the search can run without checks.
+        """
+        return (self.timeout is not None or self.max_nodes is not None
+                or self.cancel_token is not None or self.on_check is not None)
+
+    def start(self) -> None:
+        """
+        Start the clock of the timeout.
+        """
+        if self.timeout is not None:
+            self.deadline = time.monotonic() + self.timeout
+
+    def check(self, num_nodes: int) -> int:
+        """
+        Check the budget.
+
+        Args:
+            num_nodes: Nodes searched so far.
+
+        Returns:
+            Nodes to search before the next check.
+
+        Raises:
+            SearchStopped: If the budget is exhausted.
+        """
+        if self.on_check is not None:
+            self.on_check(num_nodes)
+        if self.cancel_token is not None and self.cancel_token.is_set():
+            raise SearchStopped("cancelled")
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise SearchStopped("timeout")
+        if self.max_nodes is None:
+            return BUDGET_CHECK_INTERVAL
+        if num_nodes >= self.max_nodes:
+            raise SearchStopped("max_nodes")
+        return min(BUDGET_CHECK_INTERVAL, self.max_nodes - num_nodes)
+
+
+class SolveResult:
+    def __init__(self):
+        """
+        SolveResult class constructor.
+
+        Outcome of a solve, complete or stopped by its budget.
+        """
+        # Solutions kept by the solve, if it stores them
+        self.solutions = None
+        self.num_solutions: int = 0
+        self.num_nodes: int = 0
+        self.seconds: float = 0.0
+        # One of STOP_REASONS, or None while the solve runs or if its
+        # caller stopped consuming the solutions
+        self.stop_reason: Optional[str] = None
+
+    def __repr__(self) -> str:
+        return (f"SolveResult(stop_reason={self.stop_reason!r}, "
+                f"num_solutions={self.num_solutions}, num_nodes={self.num_nodes})")
+
+    def is_complete(self) -> bool:
+        """
+        Check if the search ran to the end.
+
+        Returns:
+            bool: True if every solution was found.
+        """
+        return self.stop_reason == "complete"
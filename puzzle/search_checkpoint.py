@@ -0,0 +1,113 @@
+# search_checkpoint.py
+
+from hashlib import sha256
+from typing import IO, Optional
+import json
+import os
+import time
+from puzzle.puzzle import Puzzle
+
+# Version of the checkpoint files
+CHECKPOINT_VERSION = 1
+# Default seconds between two checkpoints
+DEFAULT_CHECKPOINT_INTERVAL = 60.0
+
+
+def fingerprint_puzzle(puzzle: Puzzle) -> str:
+    """
+    Fingerprint a puzzle with its pieces in order, as searched.
+
+    Args:
+        puzzle (Puzzle): Puzzle to fingerprint.
+
+    Returns:
+        str: Hex digest of its dimensions and faces.
+    """
+    faces = [face for piece in puzzle.get_compact_pieces() for face in piece.get_faces()]
+    content = f"{puzzle.get_cols()} {puzzle.get_rows()} " + " ".join(map(str, faces))
+    return sha256(content.encode()).hexdigest()
+
+
+class SearchCheckpoint:
+    def __init__(self, path: str, interval: float = DEFAULT_CHECKPOINT_INTERVAL, output: Optional[IO] = None):
+        """
+        SearchCheckpoint class constructor.
+
+        A JSON file holding the position of a search, saved every interval
+        seconds and when the search stops, so that a later solve can
+        resume from it. Each save replaces the file atomically.
+
+        Args:
+            path: Path of the checkpoint file.
+            interval: Seconds between two saves.
+            output: File the solutions are written to, or None. It is
+                flushed at every save and its position recorded, so a
+                resumed solve can drop what was written after the save.
+        """
+        if interval < 0:
+            raise ValueError("interval must not be negative")
+        self.path = path
+        self.interval = interval
+        self.output = output
+        self.next_save: float = 0.0
+
+    def start(self) -> None:
+        """
+        Start the clock of the next save.
+        """
+        self.next_save = time.monotonic() + self.interval
+
+    def is_due(self) -> bool:
+        """
+        Check if the next save is due.
+
+        Returns:
+            bool: True once interval seconds passed since the last save.
+        """
+        return time.monotonic() >= self.next_save
+
+    def save(self, state: dict) -> None:
+        """
+        Save the position of a search.
+
+        Args:
+            state: JSON-serialisable position, completed with the version
+                and the position of the output.
+        """
+        output_offset = None
+        if self.output is not None:
+            self.output.flush()
+            output_offset = self.output.tell()
+        content = {"version": CHECKPOINT_VERSION, **state,
+                   "output_offset": output_offset}
+
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, 'w') as file:
+            json.dump(content, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.path)
+        self.start()
+
+    def load(self, fingerprint: str) -> dict:
+        """
+        Load the position saved for a puzzle.
+
+        Args:
+            fingerprint: fingerprint_puzzle of the puzzle being solved.
+
+        Returns:
+            dict: Position saved by the last save.
+
+        Raises:
+            FileNotFoundError: If there is no checkpoint file.
+            ValueError: If the checkpoint is not of this version or not of
+                this puzzle.
+        """
+        with open(self.path) as file:
+            state = json.load(file)
+        if state.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version: {state.get('version')}.")
+        if state.get("fingerprint") != fingerprint:
+            raise ValueError("The checkpoint was saved for another puzzle.")
+        return state
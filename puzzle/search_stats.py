@@ -0,0 +1,131 @@
+# search_stats.py
+
+from typing import Callable, Dict, List, Optional
+import time
+
+# Position class of a cell by its number of border sides, capped at 2
+POSITION_CLASSES = ["interior", "edge", "corner"]
+
+# Progress hook, called with the event name and the stats
+ProgressHook = Callable[[str, "SearchStats"], None]
+
+
+class SearchStats:
+    def __init__(self, progress_interval: int = 100000):
+        """
+        SearchStats class constructor.
+
+        Collects the counters of a solve when handed to a solver, and
+        notifies its hooks of the "start", "progress" (every
+        progress_interval nodes), "solution" and "finish" events. A solver
+        without stats skips every counter.
+
+        Args:
+            progress_interval: Nodes between two progress events.
+        """
+        if progress_interval < 1:
+            raise ValueError("progress_interval must be at least 1")
+        self.progress_interval = progress_interval
+        self.hooks: List[ProgressHook] = []
+        self.reset(0)
+
+    def add_hook(self, hook: ProgressHook) -> None:
+        """
+        Add a hook called on every event.
+
+        Args:
+            hook: Callable taking the event name and these stats.
+        """
+        self.hooks.append(hook)
+
+    def reset(self, num_cells: int) -> None:
+        """
+        Clear the counters before a solve.
+
+        Args:
+            num_cells: Number of cells of the puzzle, one depth per cell.
+        """
+        self.start_time = time.perf_counter()
+        self.seconds = 0.0
+        self.first_solution_seconds: Optional[float] = None
+        self.num_nodes = 0
+        self.num_solutions = 0
+        self.tried: Dict[str, int] = dict.fromkeys(POSITION_CLASSES, 0)
+        self.rejected: Dict[str, int] = dict.fromkeys(POSITION_CLASSES, 0)
+        self.backtracks: List[int] = [0] * num_cells
+        self.next_progress = self.progress_interval
+
+    def emit(self, event: str) -> None:
+        """
+        Call the hooks with an event.
+
+        Args:
+            event: Name of the event.
+        """
+        for hook in self.hooks:
+            hook(event, self)
+
+    def record_node(self) -> None:
+        """
+        Count a piece placed by the search.
+        """
+        self.num_nodes += 1
+        if self.num_nodes >= self.next_progress:
+            self.next_progress += self.progress_interval
+            self.emit("progress")
+
+    def record_tries(self, position_class: str, num_tried: int, num_rejected: int) -> None:
+        """
+        Count the candidates tried at a cell.
+
+        Args:
+            position_class: Class of the cell, one of POSITION_CLASSES.
+            num_tried: Candidates tried.
+            num_rejected: Candidates among them that were not placed.
+        """
+        self.tried[position_class] += num_tried
+        self.rejected[position_class] += num_rejected
+
+    def record_backtrack(self, depth: int) -> None:
+        """
+        Count a backtrack out of a cell.
+
+        Args:
+            depth: Number of pieces placed before the cell.
+        """
+        self.backtracks[depth] += 1
+
+    def record_solution(self) -> None:
+        """
+        Count a solution, timing the first one.
+        """
+        self.num_solutions += 1
+        if self.first_solution_seconds is None:
+            self.first_solution_seconds = time.perf_counter() - self.start_time
+        self.emit("solution")
+
+    def finish(self, num_nodes: int) -> None:
+        """
+        Stop the clock at the end of a solve.
+
+        Args:
+            num_nodes: Pieces placed by the search, as counted by the
+                solver.
+        """
+        self.seconds = time.perf_counter() - self.start_time
+        self.num_nodes = num_nodes
+        self.emit("finish")
+
+    def to_dict(self) -> Dict:
+        """
+        Get the counters as a JSON-serialisable dictionary.
+
+        Returns:
+            Counters by name.
+        """
+        return {"seconds": self.seconds,
+                "first_solution_seconds": self.first_solution_seconds,
+                "num_nodes": self.num_nodes,
+                "num_solutions": self.num_solutions,
+                "tried": dict(self.tried), "rejected": dict(self.rejected),
+                "backtracks": list(self.backtracks)}
@@ -0,0 +1,274 @@
+# solution_cache.py
+
+from hashlib import sha256
+from typing import Dict, Iterator, List, Optional, Tuple
+import json
+import sqlite3
+import time
+from puzzle.compact_piece import CompactPiece, Placement
+from puzzle.engines import create_solver
+from puzzle.puzzle import Puzzle
+from puzzle.puzzle_solver import PuzzleSolver
+
+Solution = List[List[Optional[Placement]]]
+
+# Default bound of the cached solutions, in bytes of their encoding
+DEFAULT_MAX_BYTES = 256 << 20
+
+
+def canonicalize(puzzle: Puzzle) -> Tuple[str, Puzzle, List[Placement]]:
+    """
+    Build the canonical form of a puzzle, which ignores the order and the
+    rotation of its pieces.
+
+    Every piece is turned to its smallest rotation, then the pieces are
+    sorted by their faces and numbered from 1. Puzzles that only differ
+    by shuffled and rotated pieces share the same canonical puzzle.
+
+    Args:
+        puzzle (Puzzle): Puzzle to canonicalize.
+
+    Returns:
+        Tuple[str, Puzzle, List[Placement]]: Fingerprint of the canonical
+            puzzle, the canonical puzzle, and for each canonical piece the
+            (piece id, rotation) of the original piece it comes from.
+    """
+    canonical_pieces = []
+    for piece in puzzle.get_compact_pieces():
+        rotation = min(range(4), key=piece.get_faces)
+        canonical_pieces.append((piece.get_faces(rotation), piece.get_id(), rotation))
+    # Identical pieces keep their puzzle order
+    canonical_pieces.sort(key=lambda canonical_piece: canonical_piece[0])
+
+    faces = [face for piece_faces, _, _ in canonical_pieces for face in piece_faces]
+    canonical_puzzle = Puzzle()
+    canonical_puzzle.set_cols(puzzle.get_cols())
+    canonical_puzzle.set_rows(puzzle.get_rows())
+    canonical_puzzle.set_faces(faces)
+
+    content = f"{puzzle.get_cols()} {puzzle.get_rows()} " + " ".join(map(str, faces))
+    fingerprint = sha256(content.encode()).hexdigest()
+    origins = [(piece_id, rotation) for _, piece_id, rotation in canonical_pieces]
+    return fingerprint, canonical_puzzle, origins
+
+
+class SolutionCache:
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        SolutionCache class constructor.
+
+        Persists the solutions of canonical puzzles in an SQLite database,
+        by fingerprint. Once the encoded solutions exceed max_bytes, the
+        least recently used entries are evicted.
+
+        Args:
+            path: Path of the SQLite database, created if needed.
+            max_bytes: Maximum size of the cached solutions, in bytes.
+        """
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        self.max_bytes = max_bytes
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS solutions ("
+                "key TEXT PRIMARY KEY, content TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_used INTEGER NOT NULL)")
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        return self.connection.execute(
+            "SELECT 1 FROM solutions WHERE key = ?", (key,)).fetchone() is not None
+
+    def close(self) -> None:
+        """
+        Close the database.
+        """
+        self.connection.close()
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Get a cached entry, marking it as recently used.
+
+        Args:
+            key: Cache key.
+
+        Returns:
+            The entry stored with put, or None if it is not cached.
+        """
+        row = self.connection.execute(
+            "SELECT content FROM solutions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        with self.connection:
+            self.connection.execute(
+                "UPDATE solutions SET last_used = ? WHERE key = ?",
+                (time.time_ns(), key))
+        return json.loads(row[0])
+
+    def put(self, key: str, entry: dict) -> None:
+        """
+        Store an entry, evicting the least recently used ones to stay under
+        max_bytes. An entry larger than max_bytes is not stored.
+
+        Args:
+            key: Cache key.
+            entry: JSON-serialisable entry.
+        """
+        content = json.dumps(entry, separators=(",", ":"))
+        if len(content) > self.max_bytes:
+            return
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?)",
+                (key, content, len(content), time.time_ns()))
+            total_size = self.connection.execute(
+                "SELECT SUM(size) FROM solutions").fetchone()[0]
+            rows = self.connection.execute(
+                "SELECT key, size FROM solutions WHERE key != ? ORDER BY last_used",
+                (key,)).fetchall()
+            evicted = []
+            for evicted_key, size in rows:
+                if total_size <= self.max_bytes:
+                    break
+                evicted.append((evicted_key,))
+                total_size -= size
+            self.connection.executemany(
+                "DELETE FROM solutions WHERE key = ?", evicted)
+
+
+class CachedPuzzleSolver(PuzzleSolver):
+    # Solutions come from the cache or from another solver
+    resumable = False
+
+    def __init__(self, puzzle: Puzzle, cache: SolutionCache, engine: str = "backtrack", expand_identical: bool = True):
+        """
+        CachedPuzzleSolver class constructor.
+
+        Solves the puzzle with an engine and caches its solutions under
+        the fingerprint of its canonical form, translated to the canonical
+        pieces, so the same puzzle with its pieces shuffled or rotated is
+        answered from the cache. The solutions are mapped back to the ids
+        and rotations of the puzzle's own pieces, in the order the first
+        puzzle's search found them.
+
+        The solutions depend on the corner piece the search fixes at the
+        top left, the first corner in puzzle order, so the cache key also
+        holds the canonical piece of that corner: a shuffled copy that
+        fixes another corner is solved and cached on its own, and gets
+        the solutions PuzzleSolver finds for it.
+
+        Args:
+            puzzle: Puzzle object to solve.
+            cache: Cache of canonical solutions.
+            engine: Name of the engine used on a cache miss.
+            expand_identical: Report every permutation of identical pieces.
+        """
+        super().__init__(puzzle, expand_identical)
+        self.cache = cache
+        self.engine = engine
+        self.cache_hit: Optional[bool] = None
+
+    def iter_solutions(self) -> Iterator[Solution]:
+        """
+        Yield the solutions from the cache, or solve the puzzle and cache
+        its solutions once the search is complete.
+
+        Yields:
+            Solution grid of (piece id, rotation) placements.
+        """
+        self.num_nodes = 0
+        fingerprint, _, origins = canonicalize(self.puzzle)
+        pieces = self.puzzle.get_compact_pieces()
+        pieces_by_id = {piece.get_id(): piece for piece in pieces}
+        # Canonical (piece id, rotation) of each of the puzzle's pieces
+        canonical_placements = {piece_id: (canonical_id, rotation)
+                                for canonical_id, (piece_id, rotation) in enumerate(origins, 1)}
+        fixed_corner = self.find_fixed_corner_piece(pieces)
+        fixed_id = (canonical_placements[fixed_corner[0].get_id()][0]
+                    if fixed_corner is not None else 0)
+        # Engines find the same solutions, but not in the same order
+        key = f"{fingerprint}:{fixed_id}:{self.engine}:{int(self.expand_identical)}"
+
+        entry = self.cache.get(key)
+        self.cache_hit = entry is not None
+        if entry is not None:
+            stats = self.stats
+            if stats is not None:
+                stats.reset(self.puzzle.get_cols() * self.puzzle.get_rows())
+                stats.emit("start")
+            try:
+                self.infeasible_reason = entry["infeasible_reason"]
+                for solution in entry["solutions"]:
+                    if stats is not None:
+                        stats.record_solution()
+                    yield self.map_solution(solution, origins, pieces_by_id)
+            finally:
+                self.finish_stats()
+            return
+
+        solver = create_solver(self.puzzle, self.engine)
+        solver.expand_identical = self.expand_identical
+        solver.stats = self.stats
+        solver.budget = self.budget
+        # Solutions kept for the cache, and the size of their encoding,
+        # until it grows past what the cache can store
+        solutions: Optional[List[Solution]] = []
+        num_bytes = 0
+        try:
+            for solution in solver.iter_solutions():
+                if solutions is not None:
+                    canonical_solution = [[(canonical_placements[piece_id][0],
+                                            (rotation - canonical_placements[piece_id][1]) % 4)
+                                           for piece_id, rotation in row]
+                                          for row in solution]
+                    # The encoded solution and its separator
+                    num_bytes += len(json.dumps(canonical_solution, separators=(",", ":"))) + 1
+                    if num_bytes > self.cache.max_bytes:
+                        solutions = None
+                    else:
+                        solutions.append(canonical_solution)
+                yield solution
+        finally:
+            self.num_nodes = solver.num_nodes
+            self.infeasible_reason = solver.infeasible_reason
+
+        # Only a complete search is cached
+        if solutions is not None:
+            self.cache.put(key, {"solutions": solutions,
+                                 "infeasible_reason": solver.infeasible_reason})
+
+    @staticmethod
+    def map_solution(solution: Solution, origins: List[Placement], pieces_by_id: Dict[int, CompactPiece]) -> Solution:
+        """
+        Map a solution of the canonical puzzle to the original pieces.
+
+        Canonical piece i is original piece origins[i - 1] turned by its
+        rotation, so canonical rotation r is that piece's rotation plus r.
+        A piece whose faces repeat is given its first rotation with the
+        same faces, as the search places it.
+
+        Args:
+            solution: Solution grid of canonical (piece id, rotation)
+                placements.
+            origins: (piece id, rotation) of each canonical piece.
+            pieces_by_id: Original pieces, by id.
+
+        Returns:
+            Solution grid of the original pieces' placements.
+        """
+        mapped_solution = []
+        for row in solution:
+            mapped_row = []
+            for placement in row:
+                if placement is None:
+                    mapped_row.append(None)
+                    continue
+                piece_id, rotation = origins[placement[0] - 1]
+                rotations = pieces_by_id[piece_id].rotations
+                rotation = rotations.index(rotations[(rotation + placement[1]) % 4])
+                mapped_row.append((piece_id, rotation))
+            mapped_solution.append(mapped_row)
+        return mapped_solution
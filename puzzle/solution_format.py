@@ -0,0 +1,215 @@
+# solution_format.py
+
+import json
+import struct
+import sys
+from array import array
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
+from puzzle.compact_piece import Placement
+from puzzle.puzzle_format import PuzzleFormatError
+
+Solution = List[List[Optional[Placement]]]
+
+# Binary solutions format, little-endian:
+#
+#   magic      4 bytes   b"PZLS"
+#   version    uint8     SOLUTION_VERSION
+#   cell_size  uint8     4, bytes per cell
+#   reserved   uint16    0
+#   cols       uint32
+#   rows       uint32
+#   solutions  cols * rows uint32 cells per solution, piece_id << 2 |
+#              rotation in row-major order, as many solutions as fit
+SOLUTION_MAGIC = b"PZLS"
+SOLUTION_VERSION = 1
+SOLUTION_HEADER = struct.Struct("<4sBBHII")
+# Unsigned typecode of 4 bytes, "I" on the usual platforms, since the
+# size of array typecodes depends on the platform
+CELL_TYPECODE = next((typecode for typecode in "IL" if array(typecode).itemsize == 4), "L")
+CELL_SIZE = array(CELL_TYPECODE).itemsize
+# Cells unpacked at a time by read_binary_solutions, rounded down to
+# whole solutions
+READ_BLOCK_CELLS = 1 << 16
+# Output formats of write_solutions
+SOLUTION_FORMATS = ["text", "json", "binary"]
+
+
+def pack_solution(solution: Solution) -> array:
+    """
+    Pack a solution as one integer per cell.
+
+    Args:
+        solution (Solution): Solution grid of (piece id, rotation)
+            placements, every cell placed.
+
+    Returns:
+        array: piece_id << 2 | rotation of each cell, in row-major order.
+    """
+    return array(CELL_TYPECODE, [piece_id << 2 | rotation
+                                 for row in solution for piece_id, rotation in row])
+
+
+def unpack_solution(cells: Sequence[int], cols: int) -> Solution:
+    """
+    Unpack a solution packed by pack_solution.
+
+    Args:
+        cells (Sequence[int]): Packed cells, in row-major order.
+        cols (int): Number of columns.
+
+    Returns:
+        Solution: Solution grid of (piece id, rotation) placements.
+    """
+    return [[(cell >> 2, cell & 3) for cell in cells[start:start + cols]]
+            for start in range(0, len(cells), cols)]
+
+
+class PackedSolutions:
+    def __init__(self, cols: int, rows: int):
+        """
+        PackedSolutions class constructor.
+
+        A list of solutions stored back to back in one array of packed
+        cells, four bytes per cell. Solutions are unpacked into grids when
+        they are read.
+
+        Args:
+            cols (int): Number of columns of the solutions.
+            rows (int): Number of rows of the solutions.
+        """
+        self.cols = cols
+        self.num_cells = cols * rows
+        self.cells = array(CELL_TYPECODE)
+
+    def __len__(self) -> int:
+        return len(self.cells) // self.num_cells if self.num_cells else 0
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Solution, List[Solution]]:
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("solution index out of range")
+        start = index * self.num_cells
+        return unpack_solution(self.cells[start:start + self.num_cells], self.cols)
+
+    def __iter__(self) -> Iterator[Solution]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PackedSolutions):
+            return self.cols == other.cols and self.cells == other.cells
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"PackedSolutions({list(self)})"
+
+    def append(self, solution: Solution) -> None:
+        """
+        Pack and add a solution.
+
+        Args:
+            solution (Solution): Solution grid of (piece id, rotation)
+                placements.
+        """
+        self.cells.extend(pack_solution(solution))
+
+
+def write_solutions(file: Union[TextIO, BinaryIO], solutions: Iterable[Solution], cols: int, rows: int, output_format: str = "text", append: bool = False) -> int:
+    """
+    Write solutions to a file as they come, without keeping them.
+
+    "text" is the format of PuzzleSolver.get_solutions_as_string, "json"
+    writes one line per solution with its [piece id, rotation] pairs by
+    row, and "binary" the packed cells after a SOLUTION_HEADER.
+
+    Args:
+        file: File open for text writing, or binary writing for "binary".
+        solutions: Solution grids, for example a solver's iter_solutions.
+        cols (int): Number of columns.
+        rows (int): Number of rows.
+        output_format (str): One of SOLUTION_FORMATS.
+        append (bool): Continue a file that already holds solutions,
+            without writing the header again.
+
+    Returns:
+        int: Number of solutions written.
+    """
+    if output_format not in SOLUTION_FORMATS:
+        raise ValueError(f"Unknown solution format: {output_format}")
+
+    num_solutions = 0
+    if output_format == "binary":
+        if not append:
+            file.write(SOLUTION_HEADER.pack(SOLUTION_MAGIC, SOLUTION_VERSION,
+                                            CELL_SIZE, 0, cols, rows))
+        for solution in solutions:
+            cells = pack_solution(solution)
+            if sys.byteorder != "little":
+                cells.byteswap()
+            file.write(cells.tobytes())
+            num_solutions += 1
+    elif output_format == "json":
+        for solution in solutions:
+            file.write(json.dumps(solution, separators=(",", ":")) + "\n")
+            num_solutions += 1
+    else:
+        if not append:
+            file.write("\nSolution(s)\n")
+        for solution in solutions:
+            file.write("".join(
+                " ".join(str(placement[0]) if placement is not None else "null"
+                         for placement in row) + " \n"
+                for row in solution) + "\n")
+            num_solutions += 1
+    return num_solutions
+
+
+def read_binary_solutions(buffer) -> Tuple[int, int, Iterator[Solution]]:
+    """
+    Read solutions written in the binary format.
+
+    The cells are converted one block of solutions at a time, as the
+    solutions are iterated, so a large file (for example an mmap) is
+    streamed rather than loaded at once.
+
+    Args:
+        buffer: Bytes-like content of the file, such as an mmap.
+
+    Returns:
+        Tuple[int, int, Iterator[Solution]]: (cols, rows, solution grids).
+
+    Raises:
+        PuzzleFormatError: If the header is invalid or the content is not
+            a whole number of solutions.
+    """
+    if len(buffer) < SOLUTION_HEADER.size:
+        raise PuzzleFormatError("Truncated binary solutions header.")
+    magic, version, cell_size, _, cols, rows = SOLUTION_HEADER.unpack_from(buffer)
+    if magic != SOLUTION_MAGIC:
+        raise PuzzleFormatError("Not a binary solutions file.")
+    if version != SOLUTION_VERSION or cell_size != CELL_SIZE:
+        raise PuzzleFormatError(
+            f"Unsupported binary solutions version: {version}.")
+
+    data = memoryview(buffer)[SOLUTION_HEADER.size:]
+    num_cells = cols * rows
+    if num_cells == 0 or len(data) % (num_cells * CELL_SIZE):
+        raise PuzzleFormatError(
+            "The solutions do not fit the puzzle dimensions.")
+    block_size = max(1, READ_BLOCK_CELLS // num_cells) * num_cells * CELL_SIZE
+
+    def iter_solutions() -> Iterator[Solution]:
+        for block_start in range(0, len(data), block_size):
+            cells = array(CELL_TYPECODE)
+            cells.frombytes(data[block_start:block_start + block_size])
+            if sys.byteorder != "little":
+                cells.byteswap()
+            for start in range(0, len(cells), num_cells):
+                yield unpack_solution(cells[start:start + num_cells], cols)
+
+    return cols, rows, iter_solutions()
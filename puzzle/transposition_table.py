@@ -0,0 +1,51 @@
+# transposition_table.py
+
+from collections import OrderedDict
+from typing import Hashable
+
+
+class TranspositionTable:
+    def __init__(self, max_size: int):
+        """
+        TranspositionTable class constructor.
+
+        Remembers search states proven to lead to no solution. Once full,
+        the least recently used state is evicted, so memory stays bounded.
+
+        Args:
+            max_size: Maximum number of states kept.
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.states: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def __contains__(self, state: Hashable) -> bool:
+        """
+        Check if a state is known to be dead, marking it as recently used.
+
+        Args:
+            state: State to look up.
+
+        Returns:
+            True if the state has been recorded, False otherwise.
+        """
+        if state in self.states:
+            self.states.move_to_end(state)
+            return True
+        return False
+
+    def add(self, state: Hashable) -> None:
+        """
+        Record a dead state, evicting the least recently used one if full.
+
+        Args:
+            state: State to record.
+        """
+        self.states[state] = None
+        self.states.move_to_end(state)
+        if len(self.states) > self.max_size:
+            self.states.popitem(last=False)
@@ -1,8 +1,18 @@
 # solve.py
 
 from puzzle.puzzle import Puzzle
-from puzzle.puzzle_solver import PuzzleSolver
+from puzzle.engines import ENGINES, create_solver
+from puzzle.search_checkpoint import DEFAULT_CHECKPOINT_INTERVAL, SearchCheckpoint, fingerprint_puzzle
+from puzzle.search_stats import POSITION_CLASSES, SearchStats
+from puzzle.solution_cache import CachedPuzzleSolver, SolutionCache
+from puzzle.solution_format import SOLUTION_FORMATS
+from typing import TextIO
+import argparse
+import cProfile
+import pstats
+import signal
 import sys
+import threading
 import time
 
 
@@ -10,29 +20,170 @@ def main():
     """
     Main function to load a puzzle, solve it, and print the solutions.
     """
-    if len(sys.argv) < 2:
-        print("Usage: solve [filename]")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(prog="solve")
+    parser.add_argument("filename", help="path of the puzzle file.")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="backtrack",
+                        help="solver engine (default: backtrack).")
+    parser.add_argument("--count", action="store_true",
+                        help="only print the number of solutions.")
+    parser.add_argument("--stats", action="store_true",
+                        help="print the search counters.")
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="FILE",
+                        help="profile the solve with cProfile, dumping the stats to FILE or printing them.")
+    parser.add_argument("--cache", default=None, metavar="FILE",
+                        help="SQLite cache of solutions, shared by shuffled or rotated copies of a puzzle.")
+    parser.add_argument("--format", choices=SOLUTION_FORMATS, default="text",
+                        help="format of the solutions (default: text).")
+    parser.add_argument("--output", default=None, metavar="FILE",
+                        help="write the solutions to FILE instead of the standard output.")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="stop the search after that many seconds, keeping the solutions found.")
+    parser.add_argument("--max-nodes", type=int, default=None,
+                        help="stop the search after that many nodes, keeping the solutions found.")
+    parser.add_argument("--checkpoint", default=None, metavar="FILE",
+                        help="save the position of the search to FILE, periodically and when stopped.")
+    parser.add_argument("--checkpoint-interval", type=float, default=DEFAULT_CHECKPOINT_INTERVAL,
+                        metavar="SECS",
+                        help=f"seconds between two checkpoints (default: {DEFAULT_CHECKPOINT_INTERVAL:g}).")
+    parser.add_argument("--resume", action="store_true",
+                        help="resume the search from the --checkpoint, appending to the --output.")
+    args = parser.parse_args()
 
-    file_name = sys.argv[1]
-    puzzle = Puzzle.load_puzzle(file_name)
+    if args.timeout is not None and args.timeout <= 0:
+        parser.error("The timeout must be a positive number.")
+    if args.max_nodes is not None and args.max_nodes < 1:
+        parser.error("The maximum number of nodes must be a positive integer.")
+    if args.count and (args.timeout is not None or args.max_nodes is not None):
+        parser.error("--count cannot be combined with --timeout or --max-nodes.")
+    if args.resume and args.checkpoint is None:
+        parser.error("--resume needs the --checkpoint to resume from.")
+    if args.checkpoint is not None:
+        if args.count or args.cache is not None or args.engine != "backtrack":
+            parser.error("--checkpoint only applies to the backtrack engine, without --count or --cache.")
+        # The output is cut back to the checkpoint when resuming
+        if args.output is None:
+            parser.error("--checkpoint needs an --output file.")
+        if args.checkpoint_interval < 0:
+            parser.error("The checkpoint interval must not be negative.")
+
+    # Keep the standard output for the solutions when they are not text
+    log = sys.stderr if args.output is None and args.format != "text" else sys.stdout
+
+    puzzle = Puzzle.load_puzzle(args.filename)
 
     if puzzle is not None:
-        print(puzzle.to_string())
+        output_offset = None
+        if args.resume:
+            try:
+                state = SearchCheckpoint(args.checkpoint).load(fingerprint_puzzle(puzzle))
+            except (OSError, ValueError) as e:
+                parser.error(f"Cannot resume from '{args.checkpoint}': {e}")
+            output_offset = state["output_offset"]
+            if output_offset is None:
+                parser.error(f"'{args.checkpoint}' holds no position of the output.")
+
+        print(puzzle.to_string(), file=log)
+
+        print("Solving...", file=log)
+        # Counts are not cached
+        cache = (SolutionCache(args.cache)
+                 if args.cache is not None and not args.count else None)
+        if cache is not None:
+            solver = CachedPuzzleSolver(puzzle, cache, args.engine)
+        else:
+            solver = create_solver(puzzle, args.engine)
+        if args.stats:
+            solver.stats = SearchStats()
 
-        print("Solving...")
-        solver = PuzzleSolver(puzzle)
+        cancel_token = None
+        if args.checkpoint is not None:
+            # Stop cleanly when interrupted or preempted, saving a checkpoint
+            cancel_token = threading.Event()
+            for signal_number in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signal_number, lambda *_: cancel_token.set())
 
+        profiler = cProfile.Profile() if args.profile is not None else None
+        result = None
         start_time = time.time()
-        solver.solve()
+        if profiler is not None:
+            profiler.enable()
+        if args.count:
+            num_solutions = solver.count_solutions()
+        elif args.output is None:
+            # Solutions are written as they are found, never stored
+            output = sys.stdout.buffer if args.format == "binary" else sys.stdout
+            result = solver.write_solutions(output, args.format, timeout=args.timeout,
+                                            max_nodes=args.max_nodes)
+            output.flush()
+        else:
+            if args.resume:
+                # Drop the solutions written after the checkpoint was saved
+                file = open(args.output, 'r+b' if args.format == "binary" else 'r+')
+                file.seek(output_offset)
+                file.truncate()
+            else:
+                file = open(args.output, 'wb' if args.format == "binary" else 'w')
+            with file:
+                checkpoint = (SearchCheckpoint(args.checkpoint, args.checkpoint_interval, file)
+                              if args.checkpoint is not None else None)
+                result = solver.write_solutions(file, args.format, timeout=args.timeout,
+                                                max_nodes=args.max_nodes,
+                                                cancel_token=cancel_token,
+                                                checkpoint=checkpoint, resume=args.resume)
+        if profiler is not None:
+            profiler.disable()
         end_time = time.time()
 
         execution_time = end_time - start_time
 
-        solutions = solver.get_solutions_as_string()
-        print(solutions)
+        if solver.infeasible_reason is not None:
+            print(f"Unsolvable puzzle: {solver.infeasible_reason}", file=log)
+
+        if result is not None and not result.is_complete():
+            print(f"Search stopped ({result.stop_reason}) after "
+                  f"{result.num_nodes} nodes.", file=log)
+            if args.checkpoint is not None:
+                print(f"Resume with --checkpoint {args.checkpoint} --resume.", file=log)
+
+        if args.count:
+            print(f"\n{num_solutions} solution(s)\n", file=log)
+        elif args.output is not None:
+            print(f"{result.num_solutions} solution(s) written to '{args.output}'.", file=log)
+
+        print(f"Solved in {execution_time:.4f} secs.", file=log)
+        if cache is not None:
+            print("Solutions read from the cache." if solver.cache_hit
+                  else "Solutions added to the cache.", file=log)
+            cache.close()
 
-        print(f"Solved in {execution_time:.4f} secs.")
+        if args.stats:
+            print_stats(solver.stats, log)
+
+        if profiler is not None:
+            if args.profile:
+                profiler.dump_stats(args.profile)
+                print(f"Profile written to '{args.profile}'.", file=log)
+            else:
+                pstats.Stats(profiler, stream=log).sort_stats("cumulative").print_stats(20)
+
+
+def print_stats(stats: SearchStats, file: TextIO) -> None:
+    """
+    Print the search counters of a solve.
+
+    Args:
+        stats (SearchStats): Counters filled by the solver.
+        file (TextIO): Text stream to print to.
+    """
+    print(f"Nodes: {stats.num_nodes}", file=file)
+    if stats.first_solution_seconds is not None:
+        print(f"First solution in {stats.first_solution_seconds:.4f} secs.", file=file)
+    for position_class in reversed(POSITION_CLASSES):
+        print(f"{position_class.capitalize()} candidates: "
+              f"{stats.tried[position_class]} tried, "
+              f"{stats.rejected[position_class]} rejected", file=file)
+    backtracks = [f"{depth}:{count}" for depth, count in enumerate(stats.backtracks) if count]
+    print(f"Backtracks by depth: {' '.join(backtracks) or 'none'}", file=file)
 
 
 if __name__ == "__main__":
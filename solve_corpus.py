@@ -0,0 +1,194 @@
+# solve_corpus.py
+
+from multiprocessing import Pool, cpu_count
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+import argparse
+import json
+import os
+import sys
+import time
+from puzzle.engines import ENGINES, create_solver
+from puzzle.puzzle import Puzzle
+from puzzle.puzzle_format import BINARY_EXTENSION
+from puzzle.search_budget import SearchBudget, SolveResult
+
+# Puzzle files picked up from a directory
+PUZZLE_EXTENSIONS = (".txt", BINARY_EXTENSION)
+
+# Limits per puzzle, so a puzzle with millions of solutions cannot hold
+# a worker for good
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MAX_SOLUTIONS = 1000
+
+# (path, engine, timeout in seconds or None, maximum number of solutions
+# or None)
+SolveTask = Tuple[str, str, Optional[float], Optional[int]]
+
+
+def main():
+    """
+    Main function to solve every puzzle of a directory or manifest, in
+    parallel, and print one JSONL record per puzzle.
+    """
+    parser = argparse.ArgumentParser(
+        prog="solve_corpus",
+        epilog="Example: solve_corpus puzzles --engine chain --timeout 10")
+    parser.add_argument("source",
+                        help="directory of puzzle files, or JSONL manifest written by generate_corpus.")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="backtrack",
+                        help="solver engine (default: backtrack).")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"seconds allowed per puzzle, 0 for no limit (default: {DEFAULT_TIMEOUT:g}).")
+    parser.add_argument("--max-solutions", type=int, default=DEFAULT_MAX_SOLUTIONS,
+                        help=f"solutions searched per puzzle, 0 for no limit (default: {DEFAULT_MAX_SOLUTIONS}).")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: CPU count).")
+    parser.add_argument("--output", default=None,
+                        help="path of the JSONL results (default: standard output).")
+    args = parser.parse_args()
+
+    try:
+        paths = list(iter_puzzle_paths(args.source))
+        if args.timeout < 0:
+            raise ValueError("The timeout must not be negative.")
+        if args.max_solutions < 0:
+            raise ValueError("The maximum number of solutions must not be negative.")
+    except (ValueError, FileNotFoundError) as e:
+        parser.error(str(e))
+
+    timeout = args.timeout or None
+    max_solutions = args.max_solutions or None
+    if args.output is None:
+        solve_corpus(paths, sys.stdout, args.engine, timeout, args.workers,
+                     max_solutions)
+    else:
+        with open(args.output, 'w') as file:
+            solve_corpus(paths, file, args.engine, timeout, args.workers,
+                         max_solutions)
+
+
+def iter_puzzle_paths(source: str) -> Iterator[str]:
+    """
+    List the puzzle files of a directory or of a corpus manifest.
+
+    Args:
+        source: Directory of puzzle files, in name order, or JSONL manifest
+            with a "path" in each record, in manifest order.
+
+    Yields:
+        Path of each puzzle file.
+
+    Raises:
+        FileNotFoundError: If the source does not exist.
+        ValueError: If a manifest record has no path.
+    """
+    if os.path.isdir(source):
+        for file_name in sorted(os.listdir(source)):
+            if file_name.endswith(PUZZLE_EXTENSIONS):
+                yield os.path.join(source, file_name)
+        return
+
+    with open(source) as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "path" not in record:
+                raise ValueError(f"Manifest line {line_number} has no path.")
+            yield record["path"]
+
+
+def solve_corpus(paths: List[str], output: TextIO, engine: str = "backtrack", timeout: Optional[float] = DEFAULT_TIMEOUT, workers: Optional[int] = None, max_solutions: Optional[int] = DEFAULT_MAX_SOLUTIONS) -> List[Dict]:
+    """
+    Solve puzzles in a pool of worker processes, writing one JSONL record
+    per puzzle as each one finishes.
+
+    The workers are started once and solve puzzle after puzzle, so the
+    interpreter startup and imports are not paid per file.
+
+    Args:
+        paths: Paths of the puzzle files.
+        output: Text stream the JSONL records are written to.
+        engine: Name of the solver engine, one of ENGINES.
+        timeout: Seconds allowed per puzzle, load included, or None for
+            no limit.
+        workers: Number of worker processes, defaults to the CPU count.
+        max_solutions: Solutions searched per puzzle, or None for all of
+            them.
+
+    Returns:
+        Result records, one per puzzle, in the order they finished.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+
+    tasks = [(path, engine, timeout, max_solutions) for path in paths]
+    records = []
+    with Pool(workers or cpu_count()) as pool:
+        # Solves are expensive and uneven, so they are sent one at a time
+        for record in pool.imap_unordered(solve_task, tasks):
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            records.append(record)
+    return records
+
+
+def solve_task(task: SolveTask) -> Dict:
+    """
+    Solve one puzzle in a worker process.
+
+    Args:
+        task: (path, engine, timeout, max_solutions).
+
+    Returns:
+        Result record with the path, status ("solved", "capped" when the
+        search stopped at max_solutions, "unsolvable" when the puzzle is
+        infeasible or the search found no solution, "timeout" or "error"),
+        number of solutions, first solution as [piece id,
+        rotation] pairs by row, wall time and node count.
+    """
+    path, engine, timeout, max_solutions = task
+    record = {"path": path, "status": "solved", "num_solutions": 0,
+              "first_solution": None, "seconds": 0.0, "num_nodes": 0}
+
+    start_time = time.time()
+    solver = None
+    try:
+        # Unlike load_puzzle, prints nothing and leaves the feasibility
+        # check to the solver, which reports it as unsolvable
+        puzzle = Puzzle.read_puzzle(path)
+        # The load counts towards the timeout, so the search only gets the
+        # time left, none if the load took it all
+        if timeout is not None:
+            timeout = max(timeout - (time.time() - start_time), 0.0)
+        solver = create_solver(puzzle, engine)
+
+        result = SolveResult()
+        for solution in solver.iter_within_budget(result, max_solutions, SearchBudget(timeout)):
+            if record["first_solution"] is None:
+                record["first_solution"] = [[list(placement) for placement in row]
+                                            for row in solution]
+        record["num_solutions"] = result.num_solutions
+        if result.stop_reason == "timeout":
+            record["status"] = "timeout"
+        elif result.stop_reason == "max_solutions":
+            record["status"] = "capped"
+        elif solver.infeasible_reason is not None:
+            record["status"] = "unsolvable"
+            record["reason"] = solver.infeasible_reason
+        elif result.num_solutions == 0:
+            # Feasible, but the complete search found no solution
+            record["status"] = "unsolvable"
+            record["reason"] = "the search found no solution."
+    except Exception as e:
+        record["status"] = "error"
+        record["reason"] = str(e)
+
+    record["seconds"] = time.time() - start_time
+    if solver is not None:
+        record["num_nodes"] = solver.num_nodes
+    return record
+
+
+if __name__ == "__main__":
+    main()
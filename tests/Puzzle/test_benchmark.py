@@ -0,0 +1,54 @@
+import copy
+import unittest
+from benchmark import compare_results, generate_cases, load_cases, run_benchmark
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_run_benchmark(self):
+        cases = [case for case in load_cases("puzzles")
+                 if case[0] in ("4x4.txt", "2x10.txt")]
+        cases += generate_cases([(4, 4)], [(1, 50)])
+        results = run_benchmark(cases, ["backtrack", "cp"], repeats=2)
+
+        self.assertEqual(["2x10.txt/backtrack", "2x10.txt/cp",
+                          "4x4.txt/backtrack", "4x4.txt/cp",
+                          "4x4_1-50_seed1/backtrack", "4x4_1-50_seed1/cp"],
+                         list(results["cases"]))
+        case = results["cases"]["4x4.txt/backtrack"]
+        self.assertEqual("ok", case["status"])
+        self.assertEqual(2, case["num_solutions"])
+        self.assertGreater(case["num_nodes"], 0)
+        self.assertGreater(case["peak_memory"], 0)
+        self.assertLessEqual(case["seconds"]["min"], case["seconds"]["median"])
+
+    def test_generate_cases_is_reproducible(self):
+        first = generate_cases([(4, 4)], [(1, 9)])
+        second = generate_cases([(4, 4)], [(1, 9)])
+
+        self.assertEqual([piece.get_faces() for piece in first[0][1].get_pieces()],
+                         [piece.get_faces() for piece in second[0][1].get_pieces()])
+
+    def test_compare_results(self):
+        case = {"status": "ok", "num_solutions": 2, "num_nodes": 100,
+                "peak_memory": 1000,
+                "seconds": {"min": 1.0, "median": 1.0, "mean": 1.0, "stdev": 0.0}}
+        baseline = {"cases": {"a/backtrack": case,
+                              "b/backtrack": copy.deepcopy(case)}}
+        current = copy.deepcopy(baseline)
+        self.assertEqual([], compare_results(baseline, current))
+
+        current["cases"]["a/backtrack"]["seconds"]["median"] = 1.05
+        current["cases"]["b/backtrack"]["num_nodes"] = 150
+        current["cases"]["b/backtrack"]["num_solutions"] = 1
+        regressions = compare_results(baseline, current, threshold=0.1)
+        self.assertEqual(2, len(regressions))
+        self.assertTrue(all(regression.startswith("b/backtrack")
+                            for regression in regressions))
+
+        current["cases"]["a/backtrack"] = {"status": "timeout"}
+        self.assertEqual("a/backtrack: timeout",
+                         compare_results(baseline, current)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from puzzle.puzzle import Puzzle
+from puzzle.puzzle_piece import PuzzlePiece
+from puzzle.puzzle_solver import PuzzleSolver
+from puzzle.chain_solver import ChainPuzzleSolver
+
+
+def make_strip(faces):
+    """
+    Make a horizontal strip whose pieces meet with the given face values.
+    """
+    puzzle = Puzzle()
+    puzzle.set_cols(len(faces) + 1)
+    puzzle.set_rows(1)
+    sides = [0] + list(faces) + [0]
+    puzzle.set_pieces([PuzzlePiece(piece_id + 1,
+                                   [sides[piece_id], 0, sides[piece_id + 1], 0])
+                       for piece_id in range(len(faces) + 1)])
+    return puzzle
+
+
+class ChainPuzzleSolverTest(unittest.TestCase):
+    def test_solve_matches_backtracking(self):
+        puzzles = [Puzzle.load_puzzle("puzzles/1x5.txt"),
+                   Puzzle.load_puzzle("puzzles/5x1.txt"),
+                   Puzzle.load_puzzle("puzzles/4x4.txt"),
+                   make_strip([1, 2, 1, 2, 2, 1, 1]),
+                   make_strip([1, 2, 3, 1, 3, 2, 1, 2])]
+        for puzzle in puzzles:
+            solver = PuzzleSolver(puzzle)
+            solver.solve()
+
+            chain_solver = ChainPuzzleSolver(puzzle)
+            chain_solver.solve()
+
+            self.assertEqual(sorted(solver.solutions),
+                             sorted(chain_solver.solutions))
+
+    def test_two_piece_strip(self):
+        solver = ChainPuzzleSolver(make_strip([7]))
+        solver.solve()
+
+        self.assertEqual([[[(1, 0), (2, 0)]]], solver.solutions)
+
+    def test_long_strip(self):
+        faces = [face % 97 + 1 for face in range(5000)]
+        solver = ChainPuzzleSolver(make_strip(faces))
+        solver.solve(max_solutions=1)
+
+        solution = solver.solutions[0][0]
+        self.assertEqual(5001, len(solution))
+        placed_faces = [solver.get_placed_faces(placement)
+                        for placement in solution]
+        for left, right in zip(placed_faces, placed_faces[1:]):
+            self.assertEqual(left[2], right[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from puzzle.compact_piece import CompactPiece
+from puzzle.puzzle_piece import PuzzlePiece
+
+
+class CompactPieceTest(unittest.TestCase):
+    def test_rotations_match_puzzle_piece_rotate(self):
+        piece = PuzzlePiece(1, [1, 2, 3, 4])
+        compact_piece = CompactPiece.from_piece(piece)
+
+        self.assertEqual(1, compact_piece.get_id())
+        for rotation in range(4):
+            self.assertEqual(tuple(piece.get_faces()),
+                             compact_piece.get_faces(rotation))
+            piece.rotate()
+
+    def test_distinct_rotations(self):
+        self.assertEqual((0, 1, 2, 3),
+                         CompactPiece(1, [1, 2, 3, 4]).distinct_rotations)
+        self.assertEqual((0, 1), CompactPiece(1, [1, 2, 1, 2]).distinct_rotations)
+        self.assertEqual((0,), CompactPiece(1, [5, 5, 5, 5]).distinct_rotations)
+
+    def test_find_rotation(self):
+        piece = CompactPiece(1, [1, 2, 0, 0])
+
+        self.assertEqual(2, piece.find_rotation([0, 0, -1, -1]))
+        self.assertIsNone(piece.find_rotation([0, -1, 0, -1]))
+
+    def test_group_identical(self):
+        pieces = [CompactPiece(1, [1, 2, 3, 4]),
+                  CompactPiece(2, [0, 1, 2, 3]),
+                  CompactPiece(3, [3, 4, 1, 2]),
+                  CompactPiece(4, [1, 2, 4, 3])]
+
+        self.assertEqual([[pieces[0], pieces[2]], [pieces[1]], [pieces[3]]],
+                         CompactPiece.group_identical(pieces))
+
+    def test_is_immutable(self):
+        piece = CompactPiece(1, [1, 2, 3, 4])
+
+        with self.assertRaises(AttributeError):
+            piece.id = 2
+        with self.assertRaises(AttributeError):
+            piece.rotations = ()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from puzzle.puzzle import Puzzle
+from puzzle.puzzle_piece import PuzzlePiece
+from puzzle.puzzle_solver import PuzzleSolver
+from puzzle.cp_solver import ConstraintPuzzleSolver
+from puzzle.engines import create_solver
+from tests.Puzzle.test_puzzle_solver import make_grid
+
+
+class ConstraintPuzzleSolverTest(unittest.TestCase):
+    def test_solve_matches_backtracking(self):
+        for file_name in ["puzzles/4x4.txt", "puzzles/3x8.txt",
+                          "puzzles/5x1.txt", "puzzles/7x7.txt"]:
+            puzzle = Puzzle.load_puzzle(file_name)
+            solver = PuzzleSolver(puzzle)
+            solver.solve()
+
+            cp_solver = ConstraintPuzzleSolver(puzzle)
+            cp_solver.solve()
+
+            self.assertEqual(sorted(solver.solutions),
+                             sorted(cp_solver.solutions))
+
+    def test_engine(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        solver = create_solver(puzzle, "cp")
+        self.assertIsInstance(solver, ConstraintPuzzleSolver)
+        self.assertEqual(2, solver.count_solutions())
+
+    def test_unbalanced_faces_have_no_solution(self):
+        puzzle = Puzzle()
+        puzzle.set_cols(2)
+        puzzle.set_rows(2)
+        puzzle.set_pieces([PuzzlePiece(1, [0, 0, 1, 2]),
+                           PuzzlePiece(2, [1, 0, 0, 3]),
+                           PuzzlePiece(3, [0, 2, 4, 0]),
+                           PuzzlePiece(4, [4, 3, 0, 0])])
+        solver = ConstraintPuzzleSolver(puzzle)
+        solver.solve()
+        self.assertEqual(1, len(solver.solutions))
+
+        puzzle.get_pieces()[3].set_faces([5, 3, 0, 0])
+        solver = ConstraintPuzzleSolver(puzzle)
+        solver.solve()
+        self.assertEqual([], solver.solutions)
+
+    def test_solve_beyond_recursion_limit(self):
+        puzzle = make_grid(40, 40)
+        solver = ConstraintPuzzleSolver(puzzle)
+        solver.solve()
+        self.assertEqual(1, len(solver.solutions))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from unittest import mock
+from puzzle.puzzle import Puzzle
+from puzzle.puzzle_solver import PuzzleSolver
+from puzzle.engines import create_solver
+from puzzle.frame_solver import FramePuzzleSolver
+from tests.Puzzle.test_puzzle_solver import make_grid
+
+
+class FramePuzzleSolverTest(unittest.TestCase):
+    def test_get_frame_cells(self):
+        puzzle = Puzzle()
+        puzzle.set_cols(4)
+        puzzle.set_rows(3)
+        solver = FramePuzzleSolver(puzzle)
+
+        self.assertEqual([0, 1, 2, 3, 7, 11, 10, 9, 8, 4],
+                         solver.get_frame_cells())
+        self.assertEqual([5, 6], solver.get_interior_cells())
+
+    def test_solve_matches_backtracking(self):
+        for file_name in ["puzzles/4x4.txt", "puzzles/2x10.txt", "puzzles/1x5.txt",
+                          "puzzles/6x5.txt", "puzzles/7x7.txt", "puzzles/10x14.txt"]:
+            puzzle = Puzzle.load_puzzle(file_name)
+            solver = PuzzleSolver(puzzle)
+            solver.solve()
+
+            frame_solver = FramePuzzleSolver(puzzle)
+            frame_solver.solve()
+
+            self.assertEqual(sorted(solver.solutions),
+                             sorted(frame_solver.solutions), file_name)
+
+    def test_ring_consistency_prunes_frames(self):
+        puzzle = Puzzle.load_puzzle("puzzles/7x7.txt")
+        solver = FramePuzzleSolver(puzzle)
+        solver.solve()
+
+        with mock.patch.object(FramePuzzleSolver, "is_ring_consistent",
+                               return_value=True):
+            unchecked_solver = FramePuzzleSolver(puzzle)
+            unchecked_solver.solve()
+
+        self.assertEqual(unchecked_solver.solutions, solver.solutions)
+        self.assertLess(2 * solver.num_nodes, unchecked_solver.num_nodes)
+
+    def test_engine(self):
+        solver = create_solver(Puzzle.load_puzzle("puzzles/4x4.txt"), "frame")
+        self.assertIsInstance(solver, FramePuzzleSolver)
+        self.assertEqual(2, solver.count_solutions())
+
+    def test_solve_beyond_recursion_limit(self):
+        puzzle = make_grid(40, 40)
+        solver = FramePuzzleSolver(puzzle)
+        solver.solve()
+        self.assertEqual(1, len(solver.solutions))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import json
+import generate
+from generate_corpus import generate_corpus
+from puzzle.puzzle import Puzzle
+from puzzle.puzzle_solver import PuzzleSolver
+
+
+class GenerateTest(unittest.TestCase):
+    def test_generated_puzzle_is_solvable(self):
+        for numpy_module in [generate.np, None]:
+            with mock.patch("generate.np", numpy_module):
+                faces = generate.generate_faces(4, 4, 1, 4, seed=7)
+
+                with tempfile.TemporaryDirectory() as directory:
+                    for file_name, binary in [("puzzle.txt", False),
+                                              ("puzzle.pzl", True)]:
+                        path = os.path.join(directory, file_name)
+                        generate.write_puzzle(path, 4, 4, faces, binary)
+                        puzzle = Puzzle.load_puzzle(path)
+
+                        solver = PuzzleSolver(puzzle)
+                        solver.solve(max_solutions=1)
+                        self.assertEqual(16, len(puzzle.get_pieces()))
+                        self.assertTrue(solver.solutions)
+
+    def test_seed_is_reproducible(self):
+        first = generate.generate_faces(6, 4, 1, 9, seed=3)
+        second = generate.generate_faces(6, 4, 1, 9, seed=3)
+
+        self.assertEqual([list(piece) for piece in first],
+                         [list(piece) for piece in second])
+
+    @unittest.skipIf(generate.np is None, "NumPy is not installed")
+    def test_seed_is_portable(self):
+        # The same seed gives the same puzzle with and without NumPy
+        for cols, rows in [(6, 4), (1, 5), (5, 1)]:
+            with_numpy = generate.generate_faces(cols, rows, 1, 9, seed=3)
+            with mock.patch("generate.np", None):
+                without_numpy = generate.generate_faces(cols, rows, 1, 9, seed=3)
+
+            self.assertEqual(with_numpy.tolist(), without_numpy)
+
+    def test_chunked_writing(self):
+        faces = generate.generate_faces(4, 4, 1, 9, seed=1)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "puzzle.txt")
+            with mock.patch("generate.CHUNK_SIZE", 3):
+                generate.write_puzzle(path, 4, 4, faces, False)
+            puzzle = Puzzle.load_puzzle(path)
+
+        self.assertEqual([list(piece) for piece in faces],
+                         [piece.get_faces() for piece in puzzle.get_pieces()])
+
+
+class GenerateCorpusTest(unittest.TestCase):
+    def test_generate_corpus(self):
+        with tempfile.TemporaryDirectory() as directory:
+            records = generate_corpus(directory, [(3, 3), (4, 2)],
+                                      [(1, 5), (1, 9)], 2, seed=5, workers=2)
+            with open(os.path.join(directory, "manifest.jsonl")) as file:
+                manifest = [json.loads(line) for line in file]
+
+            self.assertEqual(8, len(records))
+            self.assertEqual(records, manifest)
+            self.assertEqual(8, len({record["seed"] for record in records}))
+
+            # Each puzzle can be generated again from its record
+            record = records[5]
+            self.assertEqual([4, 2, [1, 5]],
+                             [record["cols"], record["rows"], record["faces_range"]])
+            faces = generate.generate_faces(4, 2, 1, 5, record["seed"])
+            puzzle = Puzzle.load_puzzle(record["path"])
+            self.assertEqual([list(piece) for piece in faces],
+                             [piece.get_faces() for piece in puzzle.get_pieces()])
+
+    def test_repeated_sizes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            records = generate_corpus(directory, [(2, 2), (3, 2), (2, 2)],
+                                      [(1, 9), (1, 9)], 1, seed=1, workers=2)
+
+            paths = [record["path"] for record in records]
+            self.assertEqual(2, len(paths))
+            self.assertEqual(len(paths), len(set(paths)))
+
+    def test_overwrite_policy(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first_records = generate_corpus(directory, [(2, 2)], [(1, 9)], 2,
+                                            seed=1, workers=1)
+            path = os.path.join(directory, "2x2_1-9_00000.txt")
+            with open(path, 'w') as file:
+                file.write("kept")
+
+            with self.assertRaises(FileExistsError):
+                generate_corpus(directory, [(2, 2)], [(1, 9)], 2, workers=1)
+
+            records = generate_corpus(directory, [(2, 2)], [(1, 9)], 3,
+                                      overwrite="skip", workers=1)
+            self.assertEqual([False, False, True],
+                             [record["generated"] for record in records])
+            # Kept files keep the seed they were generated from
+            self.assertEqual([record["seed"] for record in first_records],
+                             [record["seed"] for record in records[:2]])
+
+            # Without a previous record, the seed of a kept file is unknown
+            os.remove(os.path.join(directory, "manifest.jsonl"))
+            records = generate_corpus(directory, [(2, 2)], [(1, 9)], 3,
+                                      overwrite="skip", workers=1)
+            self.assertEqual([None, None, None],
+                             [record["seed"] for record in records])
+            with open(path) as file:
+                self.assertEqual("kept", file.read())
+
+            generate_corpus(directory, [(2, 2)], [(1, 9)], 1,
+                            overwrite="overwrite", workers=1)
+            self.assertEqual(4, len(Puzzle.load_puzzle(path).get_pieces()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+from puzzle.puzzle import Puzzle
+from puzzle.puzzle_format import write_binary
+from puzzle.puzzle_piece import PuzzlePiece
+from puzzle.puzzle_solver import PuzzleSolver
+from puzzle.numpy_puzzle import NumpyPuzzle, np
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class NumpyPuzzleTest(unittest.TestCase):
+    def test_load_puzzle(self):
+        puzzle = NumpyPuzzle.load_puzzle("puzzles/4x4.txt")
+
+        self.assertEqual((16, 4, 4), puzzle.faces.shape)
+        self.assertEqual([1, 4, 3, 5], puzzle.get_pieces()[0].get_faces())
+        self.assertEqual([5, 1, 4, 3], puzzle.faces[0, 1].tolist())
+
+    def test_load_binary_puzzle(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        faces = [face for piece in puzzle.get_pieces()
+                 for face in piece.get_faces()]
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "puzzle.pzl")
+            with open(file_name, "wb") as file:
+                write_binary(file, 4, 4, faces)
+            numpy_puzzle = NumpyPuzzle.load_puzzle(file_name)
+
+        self.assertEqual([1, 4, 3, 5], numpy_puzzle.get_pieces()[0].get_faces())
+        self.assertEqual(list(range(1, 17)), numpy_puzzle.ids.tolist())
+
+    def test_check_feasibility(self):
+        puzzle = Puzzle()
+        puzzle.set_cols(2)
+        puzzle.set_rows(2)
+        for faces in [[[0, 0, 1, 2], [1, 0, 0, 3], [0, 2, 4, 0], [5, 3, 0, 0]],
+                      [[0, 0, 1, 2], [1, 0, 0, 2], [0, 2, 3, 0], [3, 2, 0, 0]],
+                      [[0, 0, 1, 2], [1, 0, 2, 0], [0, 2, 3, 0], [3, 2, 0, 0]]]:
+            puzzle.set_pieces([PuzzlePiece(piece_id + 1, piece_faces)
+                               for piece_id, piece_faces in enumerate(faces)])
+
+            self.assertEqual(puzzle.check_feasibility(),
+                             NumpyPuzzle.from_puzzle(puzzle).check_feasibility())
+
+    def test_classification(self):
+        puzzle = NumpyPuzzle()
+        puzzle.set_pieces([PuzzlePiece(1, [0, 0, 1, 2]),
+                           PuzzlePiece(2, [0, 1, 2, 3]),
+                           PuzzlePiece(3, [1, 2, 3, 4]),
+                           PuzzlePiece(4, [0, 1, 0, 0])])
+
+        self.assertEqual([2, 1, 0, 3], puzzle.count_borders().tolist())
+        self.assertEqual([True, False, False, False],
+                         puzzle.is_corner().tolist())
+        self.assertEqual([False, True, False, False],
+                         puzzle.is_edge().tolist())
+        self.assertEqual([False, False, True, False],
+                         puzzle.is_interior().tolist())
+        self.assertEqual([False, False, False, True],
+                         puzzle.is_linear_corner().tolist())
+
+    def test_solve(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        solver = PuzzleSolver(puzzle)
+        solver.solve()
+
+        numpy_solver = PuzzleSolver(NumpyPuzzle.from_puzzle(puzzle))
+        numpy_solver.solve()
+
+        self.assertEqual(solver.solutions, numpy_solver.solutions)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from puzzle.puzzle import Puzzle
+from puzzle.puzzle_solver import PuzzleSolver
+from puzzle.parallel_solver import ParallelPuzzleSolver
+
+
+class ParallelPuzzleSolverTest(unittest.TestCase):
+    def test_solve_matches_serial_solver(self):
+        puzzle = Puzzle.load_puzzle("puzzles/7x7.txt")
+        solver = PuzzleSolver(puzzle)
+        solver.solve()
+
+        parallel_solver = ParallelPuzzleSolver(puzzle, workers=2)
+        parallel_solver.solve()
+
+        self.assertEqual(solver.solutions, parallel_solver.solutions)
+
+    def test_solve_first_solution(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        solver = PuzzleSolver(puzzle)
+        solver.solve()
+
+        parallel_solver = ParallelPuzzleSolver(puzzle, workers=2)
+        parallel_solver.solve(max_solutions=1)
+
+        self.assertEqual(1, len(parallel_solver.solutions))
+        self.assertIn(parallel_solver.solutions[0], solver.solutions)
+
+    def test_split_search(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        parallel_solver = ParallelPuzzleSolver(puzzle, workers=1)
+        parallel_solver.prepare()
+
+        prefixes = parallel_solver.split_search()
+        self.assertTrue(all(len(prefix) == len(prefixes[0])
+                        for prefix in prefixes))
+        self.assertGreaterEqual(len(prefixes[0]), 2)
+        # Distinct prefixes of the same length root disjoint subtrees
+        self.assertEqual(len(prefixes), len(set(map(tuple, prefixes))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+from puzzle.compact_piece import CompactPiece
+from puzzle.piece_index import PieceIndex
+
+
+class PieceIndexTest(unittest.TestCase):
+    def test_get_candidates(self):
+        corner = CompactPiece(1, [1, 2, 0, 0])
+        edge = CompactPiece(2, [0, 3, 4, 5])
+        interior = CompactPiece(3, [1, 2, 3, 4])
+        index = PieceIndex([corner, edge, interior])
+
+        self.assertEqual([(corner, 2)],
+                         index.get_candidates(0, 0, False, False))
+        self.assertEqual([(edge, 2)],
+                         index.get_candidates(4, 5, True, False))
+        self.assertEqual([(interior, 2)],
+                         index.get_candidates(3, 4, False, False))
+        self.assertEqual([], index.get_candidates(9, 9, False, False))
+
+    def test_symmetric_piece_is_indexed_once(self):
+        piece = CompactPiece(1, [1, 2, 1, 2])
+        index = PieceIndex([piece])
+
+        self.assertEqual([(piece, 0)],
+                         index.get_candidates(1, 2, False, False))
+        self.assertEqual([(piece, 1)],
+                         index.get_candidates(2, 1, False, False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,11 @@
+import io
+import os
+import pickle
+import tempfile
 import unittest
+from contextlib import redirect_stdout
 from puzzle.puzzle import Puzzle
+from puzzle.puzzle_format import write_binary
 from puzzle.puzzle_piece import PuzzlePiece
 
 
@@ -42,6 +48,109 @@ class PuzzleTest(unittest.TestCase):
         self.assertTrue(puzzle_1dy.is_one_dimensional())
         self.assertFalse(puzzle_2d.is_one_dimensional())
 
+    def test_check_feasibility(self):
+        puzzle = Puzzle()
+        puzzle.set_cols(2)
+        puzzle.set_rows(2)
+        puzzle.set_pieces([PuzzlePiece(1, [0, 0, 1, 2]),
+                           PuzzlePiece(2, [1, 0, 0, 3]),
+                           PuzzlePiece(3, [0, 2, 4, 0]),
+                           PuzzlePiece(4, [4, 3, 0, 0])])
+        self.assertIsNone(puzzle.check_feasibility())
+
+        puzzle.get_pieces()[3].set_faces([5, 3, 0, 0])
+        self.assertIn("face value 4", puzzle.check_feasibility())
+
+        puzzle.get_pieces()[3].set_faces([4, 3, 7, 7])
+        self.assertIn("interior pieces", puzzle.check_feasibility())
+
+        puzzle.get_pieces()[3].set_faces([0, 4, 0, 3])
+        self.assertIn("piece 4", puzzle.check_feasibility())
+
+    def test_check_feasibility_one_dimensional(self):
+        puzzle = Puzzle.load_puzzle("puzzles/1x5.txt")
+        self.assertIsNone(puzzle.check_feasibility())
+
+        puzzle.get_pieces()[0].set_faces([0, 3, 2, 0])
+        self.assertIn("piece 1", puzzle.check_feasibility())
+
+    def test_load_puzzle_rejects_unsolvable_puzzle(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "puzzle.txt")
+            with open(file_name, "w") as file:
+                file.write("2 2\n0 0 1 2\n1 0 0 3\n0 2 4 0\n5 3 0 0\n")
+
+            with redirect_stdout(io.StringIO()) as output:
+                self.assertIsNone(Puzzle.load_puzzle(file_name))
+            self.assertIn("Unsolvable puzzle", output.getvalue())
+
+    def test_load_binary_puzzle(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        faces = [face for piece in puzzle.get_pieces()
+                 for face in piece.get_faces()]
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "puzzle.pzl")
+            with open(file_name, "wb") as file:
+                write_binary(file, 4, 4, faces)
+            binary_puzzle = Puzzle.load_puzzle(file_name)
+
+        self.assertEqual((4, 4), (binary_puzzle.get_cols(),
+                                  binary_puzzle.get_rows()))
+        self.assertEqual([(piece.get_id(), piece.get_faces())
+                          for piece in puzzle.get_pieces()],
+                         [(piece.get_id(), piece.get_faces())
+                          for piece in binary_puzzle.get_pieces()])
+
+    def test_pickle_binary_puzzle(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        faces = [face for piece in puzzle.get_pieces()
+                 for face in piece.get_faces()]
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "puzzle.pzl")
+            with open(file_name, "wb") as file:
+                write_binary(file, 4, 4, faces)
+            binary_puzzle = Puzzle.load_puzzle(file_name)
+            self.assertIsInstance(binary_puzzle.face_values, memoryview)
+            copy = pickle.loads(pickle.dumps(binary_puzzle))
+
+        self.assertEqual(faces, list(copy.face_values))
+        self.assertTrue(copy.feasibility_checked)
+        self.assertEqual([(piece.get_id(), piece.get_faces())
+                          for piece in puzzle.get_pieces()],
+                         [(piece.get_id(), piece.get_faces())
+                          for piece in copy.get_pieces()])
+
+    def test_pieces_built_on_demand(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        self.assertIsNotNone(puzzle.face_values)
+        self.assertTrue(puzzle.feasibility_checked)
+
+        compact_pieces = puzzle.get_compact_pieces()
+        self.assertIsNone(puzzle.check_feasibility())
+        self.assertIsNotNone(puzzle.face_values)
+
+        pieces = puzzle.get_pieces()
+        self.assertIsNone(puzzle.face_values)
+        self.assertEqual([(piece.get_id(), tuple(piece.get_faces())) for piece in pieces],
+                         [(piece.get_id(), piece.get_faces()) for piece in compact_pieces])
+
+        # Built pieces can be changed, so they are checked again
+        pieces[0].set_faces([0, 0, 0, 0])
+        self.assertIsNotNone(puzzle.check_feasibility())
+
+    def test_load_puzzle_format_errors(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "puzzle.txt")
+            with open(file_name, "w") as file:
+                file.write("2 1\n0 0 1\n1 0 0 0\n")
+
+            with redirect_stdout(io.StringIO()) as output:
+                self.assertIsNone(Puzzle.load_puzzle(file_name))
+            self.assertEqual("Error: Invalid piece format.\n",
+                             output.getvalue())
+
 
 if __name__ == '__main__':
     unittest.main()
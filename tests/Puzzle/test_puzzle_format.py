@@ -0,0 +1,58 @@
+import io
+import unittest
+from puzzle.puzzle_format import (BINARY_MAGIC, HEADER, PuzzleFormatError,
+                                  is_binary, parse_text, read_binary,
+                                  write_binary)
+
+
+class PuzzleFormatTest(unittest.TestCase):
+    def test_parse_text(self):
+        cols, rows, faces = parse_text(b"2 1\n0 0 1 0\n\n1 0 0 0\n")
+
+        self.assertEqual((2, 1), (cols, rows))
+        self.assertEqual([0, 0, 1, 0, 1, 0, 0, 0], list(faces))
+
+    def test_parse_text_errors(self):
+        with self.assertRaisesRegex(PuzzleFormatError, "piece format"):
+            parse_text(b"2 1\n0 0 1\n1 0 0 0\n")
+        # Eight faces in all, but not four per line
+        with self.assertRaisesRegex(PuzzleFormatError, "piece format"):
+            parse_text(b"2 1\n0 0\n1 0 0 0 1 0\n")
+        with self.assertRaisesRegex(PuzzleFormatError, "piece format"):
+            parse_text(b"2 1\n0 0 1 0 | 1 0 0 0\n")
+        with self.assertRaisesRegex(PuzzleFormatError, "number of pieces"):
+            parse_text(b"3 1\n0 0 1 0\n1 0 0 0\n")
+        with self.assertRaisesRegex(PuzzleFormatError, "dimensions"):
+            parse_text(b"2\n0 0 1 0\n1 0 0 0\n")
+
+    def test_binary_round_trip(self):
+        for max_face in [200, 60000, 70000]:
+            faces = [0, 0, max_face, 0, max_face, 0, 0, 0]
+            data = self.write(faces)
+
+            self.assertTrue(is_binary(data))
+            cols, rows, read_faces = read_binary(data)
+            self.assertEqual((2, 1), (cols, rows))
+            self.assertEqual(faces, list(read_faces))
+
+        # The smallest face size is used
+        self.assertEqual(HEADER.size + 8, len(self.write([0, 0, 200, 0, 200, 0, 0, 0])))
+
+    def test_read_binary_errors(self):
+        data = self.write([0, 0, 1, 0, 1, 0, 0, 0])
+
+        with self.assertRaisesRegex(PuzzleFormatError, "number of pieces"):
+            read_binary(data[:-1])
+        with self.assertRaisesRegex(PuzzleFormatError, "header"):
+            read_binary(BINARY_MAGIC)
+        with self.assertRaisesRegex(PuzzleFormatError, "version"):
+            read_binary(data[:4] + b"\x09" + data[5:])
+
+    def write(self, faces):
+        file = io.BytesIO()
+        write_binary(file, 2, 1, faces)
+        return file.getvalue()
+
+
+if __name__ == '__main__':
+    unittest.main()
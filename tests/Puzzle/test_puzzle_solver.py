@@ -0,0 +1,304 @@
+import unittest
+from unittest import mock
+from generate import generate_faces
+from puzzle.chain_solver import ChainPuzzleSolver
+from puzzle.puzzle import Puzzle
+from puzzle.puzzle_piece import PuzzlePiece
+from puzzle.puzzle_solver import PuzzleSolver
+from puzzle.search_stats import SearchStats
+
+
+def make_grid(cols, rows):
+    """
+    Make a puzzle whose inner faces are all distinct, in solved order.
+    """
+    def horizontal_face(row, col):
+        return row * cols + col + 1 if 0 < col < cols else 0
+
+    def vertical_face(row, col):
+        return cols * rows + row * cols + col + 1 if 0 < row < rows else 0
+
+    puzzle = Puzzle()
+    puzzle.set_cols(cols)
+    puzzle.set_rows(rows)
+    puzzle.set_pieces([PuzzlePiece(row * cols + col + 1,
+                                   [horizontal_face(row, col),
+                                    vertical_face(row, col),
+                                    horizontal_face(row, col + 1),
+                                    vertical_face(row + 1, col)])
+                       for row in range(rows) for col in range(cols)])
+    return puzzle
+
+
+class PuzzleSolverTest(unittest.TestCase):
+    def test_solve_square_puzzle(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        solver = PuzzleSolver(puzzle)
+        solver.solve()
+
+        solutions = [[[piece_id for piece_id, _ in row] for row in solution]
+                     for solution in solver.solutions]
+        self.assertEqual(2, len(solutions))
+        self.assertIn([[5, 7, 15, 11], [9, 16, 4, 3],
+                      [13, 1, 8, 10], [14, 2, 6, 12]], solutions)
+
+    def test_solve_one_dimensional_puzzle(self):
+        puzzle = Puzzle.load_puzzle("puzzles/5x1.txt")
+        solver = PuzzleSolver(puzzle)
+        solver.solve()
+
+        solutions = [[[piece_id for piece_id, _ in row] for row in solution]
+                     for solution in solver.solutions]
+        self.assertEqual([[[3, 4, 2, 1, 5]]], solutions)
+
+    def test_solve_single_piece(self):
+        puzzle = Puzzle()
+        puzzle.set_cols(1)
+        puzzle.set_rows(1)
+        puzzle.set_faces([0, 0, 0, 0])
+        for solver in [PuzzleSolver(puzzle), ChainPuzzleSolver(puzzle)]:
+            solver.solve()
+            self.assertIsNone(solver.infeasible_reason)
+            self.assertEqual([[[(1, 0)]]], solver.solutions)
+        self.assertEqual(1, PuzzleSolver(puzzle).count_solutions())
+
+    def test_solve_max_solutions(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        solver = PuzzleSolver(puzzle)
+        solver.solve(max_solutions=1)
+
+        self.assertEqual(1, len(solver.solutions))
+
+    def test_iter_solutions(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        solver = PuzzleSolver(puzzle)
+        solutions = solver.iter_solutions()
+
+        first_solution = next(solutions)
+        self.assertEqual(4, len(first_solution))
+        self.assertEqual(1, len(list(solutions)))
+        self.assertEqual([], solver.solutions)
+
+    def test_solve_does_not_rotate_pieces(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        faces = [piece.get_faces()[:] for piece in puzzle.get_pieces()]
+        solver = PuzzleSolver(puzzle)
+        solver.solve()
+
+        self.assertEqual(faces, [piece.get_faces()
+                         for piece in puzzle.get_pieces()])
+
+    def test_solutions_record_rotations(self):
+        puzzle = Puzzle.load_puzzle("puzzles/5x5.txt")
+        solver = PuzzleSolver(puzzle)
+        solver.solve()
+
+        solution = solver.solutions[0]
+        for row in range(puzzle.get_rows()):
+            for col in range(1, puzzle.get_cols()):
+                left_faces = solver.get_placed_faces(solution[row][col - 1])
+                faces = solver.get_placed_faces(solution[row][col])
+                self.assertEqual(left_faces[2], faces[0])
+
+    def test_piece_fitting_in_two_rotations(self):
+        # The center piece fits left 1 and top 1 turned once or twice
+        puzzle = Puzzle()
+        puzzle.set_cols(3)
+        puzzle.set_rows(3)
+        puzzle.set_faces([1, 1, 2, 0, 2, 1, 0, 0, 1, 2, 1, 1,
+                          0, 0, 1, 2, 1, 1, 0, 1, 2, 2, 2, 0,
+                          2, 1, 0, 0, 1, 1, 0, 0, 0, 1, 1, 1])
+        solver = PuzzleSolver(puzzle, expand_identical=False)
+        solver.solve()
+
+        center = solver.pieces_by_id[3]
+        self.assertEqual((1, 1), tuple(center.get_faces(1)[:2]))
+        self.assertEqual((1, 1), tuple(center.get_faces(2)[:2]))
+        # Only the second rotation that fits completes the puzzle
+        self.assertIn([[(2, 2), (1, 2), (8, 3)],
+                       [(5, 2), (3, 2), (9, 2)],
+                       [(4, 3), (6, 0), (7, 0)]], solver.solutions)
+
+    def test_identical_pieces(self):
+        puzzle = Puzzle()
+        puzzle.set_cols(3)
+        puzzle.set_rows(2)
+        puzzle.set_pieces([PuzzlePiece(1, [0, 0, 1, 1]),
+                           PuzzlePiece(2, [1, 0, 1, 1]),
+                           PuzzlePiece(3, [1, 0, 0, 1]),
+                           PuzzlePiece(4, [0, 1, 1, 0]),
+                           PuzzlePiece(5, [1, 1, 1, 0]),
+                           PuzzlePiece(6, [1, 1, 0, 0])])
+
+        solver = PuzzleSolver(puzzle, expand_identical=False)
+        solver.solve()
+        self.assertEqual([[[(1, 0), (2, 0), (3, 0)], [(4, 0), (5, 0), (6, 0)]]],
+                         solver.solutions)
+
+        solver = PuzzleSolver(puzzle)
+        solver.solve()
+        self.assertEqual(12, len(solver.solutions))
+        self.assertEqual(12, len(set(str(solution)
+                                     for solution in solver.solutions)))
+        self.assertTrue(all(solution[0][0] == (1, 0)
+                            for solution in solver.solutions))
+
+    def test_solve_beyond_recursion_limit(self):
+        puzzle = make_grid(40, 40)
+        solver = PuzzleSolver(puzzle)
+        solver.solve()
+
+        self.assertEqual(1, len(solver.solutions))
+        self.assertEqual([(41, 0), (42, 0)], solver.solutions[0][1][:2])
+
+    def test_memo_keeps_solutions(self):
+        for file_name in ["puzzles/4x4.txt", "puzzles/3x8.txt",
+                          "puzzles/5x1.txt", "puzzles/7x7.txt"]:
+            puzzle = Puzzle.load_puzzle(file_name)
+            solver = PuzzleSolver(puzzle)
+            solver.solve()
+
+            memo_solver = PuzzleSolver(puzzle, memo_size=10)
+            memo_solver.solve()
+
+            self.assertEqual(solver.solutions, memo_solver.solutions)
+            self.assertLessEqual(len(memo_solver.memo), 10)
+
+    def test_memo_with_repeated_faces(self):
+        puzzle = make_grid(3, 3)
+        for piece in puzzle.get_pieces():
+            piece.set_faces([1 if face else 0 for face in piece.get_faces()])
+        solver = PuzzleSolver(puzzle, expand_identical=False)
+        solver.solve()
+
+        memo_solver = PuzzleSolver(puzzle, expand_identical=False,
+                                   memo_size=1000)
+        memo_solver.solve()
+
+        self.assertEqual(solver.solutions, memo_solver.solutions)
+
+    def test_memo_keyed_at_row_starts(self):
+        puzzle = Puzzle()
+        puzzle.set_cols(5)
+        puzzle.set_rows(4)
+        puzzle.set_faces([face for faces in generate_faces(5, 4, 1, 2, seed=1)
+                          for face in faces])
+        solver = PuzzleSolver(puzzle, expand_identical=False)
+        solver.solve()
+
+        memo_solver = PuzzleSolver(puzzle, expand_identical=False,
+                                   memo_size=1 << 16)
+        memo_solver.solve()
+
+        self.assertEqual(solver.solutions, memo_solver.solutions)
+        self.assertLess(memo_solver.num_nodes, solver.num_nodes)
+        # Pieces left and the bottom faces of a complete row
+        self.assertGreater(len(memo_solver.memo), 0)
+        for _, bottom_faces in memo_solver.memo.states:
+            self.assertEqual(5, len(bottom_faces))
+
+    def test_memo_needs_candidate_lists(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        with self.assertRaises(ValueError):
+            PuzzleSolver(puzzle, memo_size=10, bitmask_kernel=True)
+        # Puzzles above BITMASK_KERNEL_MAX_PIECES use candidate lists
+        with mock.patch("puzzle.puzzle_solver.BITMASK_KERNEL_MAX_PIECES", 15):
+            solver = PuzzleSolver(puzzle, bitmask_kernel=True)
+            solver.solve()
+        self.assertFalse(solver.use_bitmask_kernel)
+        self.assertEqual(2, len(solver.solutions))
+
+    def test_count_solutions(self):
+        for file_name in ["puzzles/4x4.txt", "puzzles/2x10.txt",
+                          "puzzles/3x8.txt", "puzzles/5x1.txt"]:
+            puzzle = Puzzle.load_puzzle(file_name)
+            solver = PuzzleSolver(puzzle)
+            solver.solve()
+
+            self.assertEqual(len(solver.solutions),
+                             PuzzleSolver(puzzle).count_solutions())
+
+    def test_count_solutions_by_profile(self):
+        for cols, rows in [(6, 2), (2, 5), (7, 1)]:
+            puzzle = make_grid(cols, rows)
+            for piece in puzzle.get_pieces():
+                piece.set_faces([face % 2 + 1 if face else 0
+                                 for face in piece.get_faces()])
+
+            solver = PuzzleSolver(puzzle, expand_identical=False)
+            solver.solve()
+            counting_solver = PuzzleSolver(puzzle, expand_identical=False)
+            self.assertEqual(len(solver.solutions),
+                             counting_solver.count_solutions())
+            self.assertEqual([], counting_solver.solutions)
+
+            solver = PuzzleSolver(puzzle)
+            solver.solve()
+            self.assertEqual(len(solver.solutions),
+                             PuzzleSolver(puzzle).count_solutions())
+
+    def test_count_solutions_beyond_profile_states(self):
+        for cols, rows in [(6, 2), (7, 1), (1, 6)]:
+            puzzle = make_grid(cols, rows)
+            for piece in puzzle.get_pieces():
+                piece.set_faces([face % 2 + 1 if face else 0
+                                 for face in piece.get_faces()])
+            stats = SearchStats()
+            num_solutions = PuzzleSolver(puzzle, stats=stats).count_solutions()
+            # The profile states are nodes
+            self.assertGreater(stats.num_nodes, 0)
+
+            # Too many states: strips are walked as trails, others searched
+            with mock.patch("puzzle.puzzle_solver.MAX_PROFILE_STATES", 1):
+                stats = SearchStats()
+                solver = PuzzleSolver(puzzle, stats=stats)
+                self.assertEqual(num_solutions, solver.count_solutions())
+            self.assertGreater(stats.num_nodes, 0)
+
+    def test_bitmask_kernel_matches_candidate_lists(self):
+        puzzle = make_grid(3, 3)
+        for piece in puzzle.get_pieces():
+            piece.set_faces([1 if face else 0 for face in piece.get_faces()])
+        # Center piece fitting its cell in two rotations
+        puzzle.get_pieces()[4].set_faces([1, 1, 2, 1])
+        puzzle.get_pieces()[5].set_faces([2, 1, 0, 1])
+
+        puzzles = [puzzle, Puzzle.load_puzzle("puzzles/4x4.txt"),
+                   Puzzle.load_puzzle("puzzles/3x8.txt"),
+                   Puzzle.load_puzzle("puzzles/5x1.txt")]
+        for puzzle in puzzles:
+            solver = PuzzleSolver(puzzle, bitmask_kernel=True)
+            solver.solve()
+            self.assertTrue(solver.use_bitmask_kernel)
+
+            list_solver = PuzzleSolver(puzzle)
+            list_solver.solve()
+            self.assertFalse(list_solver.use_bitmask_kernel)
+
+            self.assertEqual(list_solver.solutions, solver.solutions)
+
+    def test_get_solutions_as_string(self):
+        puzzle = Puzzle.load_puzzle("puzzles/1x5.txt")
+        solver = PuzzleSolver(puzzle)
+        solver.solve()
+
+        self.assertEqual("\nSolution(s)\n3 \n4 \n2 \n1 \n5 \n\n",
+                         solver.get_solutions_as_string())
+
+    def test_num_nodes(self):
+        puzzle = make_grid(3, 3)
+        solver = PuzzleSolver(puzzle, bitmask_kernel=True)
+        solver.solve()
+        # A puzzle with distinct faces is placed without a dead end
+        self.assertEqual(9, solver.num_nodes)
+
+        list_solver = PuzzleSolver(puzzle)
+        list_solver.solve()
+        self.assertEqual(9, list_solver.num_nodes)
+
+        solver.solve()
+        self.assertEqual(9, solver.num_nodes)
+
+
+if __name__ == '__main__':
+    unittest.main()
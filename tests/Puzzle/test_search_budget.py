@@ -0,0 +1,159 @@
+import io
+import threading
+import unittest
+from generate import generate_faces
+from puzzle.chain_solver import ChainPuzzleSolver
+from puzzle.cp_solver import ConstraintPuzzleSolver
+from puzzle.parallel_solver import ParallelPuzzleSolver
+from puzzle.puzzle import Puzzle
+from puzzle.puzzle_solver import PuzzleSolver
+from puzzle.search_budget import SearchBudget, SearchStopped, SolveResult
+
+
+def create_huge_puzzle() -> Puzzle:
+    # Two face values give far too many solutions to enumerate
+    puzzle = Puzzle()
+    puzzle.set_cols(6)
+    puzzle.set_rows(6)
+    puzzle.set_faces([int(face) for piece in generate_faces(6, 6, 1, 2, seed=2)
+                      for face in piece])
+    return puzzle
+
+
+class SearchBudgetTest(unittest.TestCase):
+    def test_check(self):
+        budget = SearchBudget(max_nodes=10)
+        budget.start()
+        self.assertEqual(10, budget.check(0))
+        self.assertEqual(3, budget.check(7))
+        with self.assertRaises(SearchStopped) as context:
+            budget.check(10)
+        self.assertEqual("max_nodes", context.exception.reason)
+
+        self.assertFalse(SearchBudget().is_limited())
+        self.assertTrue(SearchBudget(cancel_token=threading.Event()).is_limited())
+        with self.assertRaises(ValueError):
+            SearchBudget(timeout=-1)
+
+    def test_complete(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        solver = PuzzleSolver(puzzle)
+        result = solver.solve(timeout=60, max_nodes=10 ** 9)
+
+        self.assertEqual("complete", result.stop_reason)
+        self.assertTrue(result.is_complete())
+        self.assertEqual(2, result.num_solutions)
+        self.assertEqual(solver.num_nodes, result.num_nodes)
+
+    def test_max_solutions(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        result = PuzzleSolver(puzzle).solve(max_solutions=1)
+        self.assertEqual("max_solutions", result.stop_reason)
+        self.assertEqual(1, result.num_solutions)
+
+        # Stopping on the last solution is still hitting the limit
+        result = PuzzleSolver(puzzle).solve(max_solutions=2)
+        self.assertEqual("max_solutions", result.stop_reason)
+        result = PuzzleSolver(puzzle).solve(max_solutions=3)
+        self.assertEqual("complete", result.stop_reason)
+
+    def test_caller_stops(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        result = SolveResult()
+        solutions = PuzzleSolver(puzzle).iter_within_budget(result)
+        next(solutions)
+        solutions.close()
+
+        self.assertIsNone(result.stop_reason)
+        self.assertEqual(1, result.num_solutions)
+
+    def test_max_nodes(self):
+        puzzle = create_huge_puzzle()
+        # Expanded solutions are not nodes, so they are not expanded
+        for solver in [PuzzleSolver(puzzle, expand_identical=False),
+                       PuzzleSolver(puzzle, expand_identical=False, bitmask_kernel=True),
+                       ConstraintPuzzleSolver(puzzle, expand_identical=False)]:
+            result = solver.solve(max_nodes=5000)
+
+            self.assertEqual("max_nodes", result.stop_reason)
+            self.assertEqual(5000, result.num_nodes)
+            self.assertEqual(5000, solver.num_nodes)
+            # The solutions found before the stop are kept
+            self.assertGreater(result.num_solutions, 0)
+            self.assertEqual(result.num_solutions, len(solver.solutions))
+            self.assertIs(solver.solutions, result.solutions)
+
+    def test_max_nodes_chain(self):
+        puzzle = Puzzle()
+        puzzle.set_cols(12)
+        puzzle.set_rows(1)
+        puzzle.set_faces([int(face) for piece in generate_faces(12, 1, 1, 2, seed=1)
+                          for face in piece])
+        solver = ChainPuzzleSolver(puzzle)
+        result = solver.solve(max_nodes=20)
+
+        self.assertEqual("max_nodes", result.stop_reason)
+        self.assertEqual(20, result.num_nodes)
+        self.assertEqual(result.num_solutions, len(solver.solutions))
+
+    def test_timeout(self):
+        puzzle = create_huge_puzzle()
+        for solver in [PuzzleSolver(puzzle), ConstraintPuzzleSolver(puzzle)]:
+            result = solver.solve(timeout=0.1)
+
+            self.assertEqual("timeout", result.stop_reason)
+            self.assertFalse(result.is_complete())
+            self.assertLess(result.seconds, 5)
+            self.assertGreater(result.num_nodes, 0)
+            self.assertEqual(result.num_solutions, len(solver.solutions))
+
+    def test_timeout_while_expanding(self):
+        # Identical pieces expand each solution found without placing nodes
+        puzzle = Puzzle()
+        puzzle.set_cols(4)
+        puzzle.set_rows(4)
+        puzzle.set_faces([0, 0, 1, 1] * 4 + [0, 1, 1, 1] * 8 + [1, 1, 1, 1] * 4)
+        result = PuzzleSolver(puzzle).solve(timeout=0.1)
+
+        self.assertEqual("timeout", result.stop_reason)
+        self.assertLess(result.seconds, 5)
+
+    def test_cancel_token(self):
+        puzzle = create_huge_puzzle()
+        cancel_token = threading.Event()
+        timer = threading.Timer(0.1, cancel_token.set)
+        timer.start()
+        try:
+            solver = PuzzleSolver(puzzle)
+            result = solver.solve(cancel_token=cancel_token)
+        finally:
+            timer.cancel()
+
+        self.assertEqual("cancelled", result.stop_reason)
+        self.assertGreater(result.num_nodes, 0)
+        self.assertEqual(result.num_solutions, len(solver.solutions))
+
+    def test_write_solutions(self):
+        puzzle = create_huge_puzzle()
+        output = io.StringIO()
+        solver = PuzzleSolver(puzzle, expand_identical=False)
+        result = solver.write_solutions(output, "json", max_nodes=5000)
+
+        self.assertEqual("max_nodes", result.stop_reason)
+        self.assertEqual(result.num_solutions, len(output.getvalue().splitlines()))
+
+    def test_parallel_timeout(self):
+        puzzle = create_huge_puzzle()
+        solver = ParallelPuzzleSolver(puzzle, workers=2)
+        result = solver.solve(timeout=0.5)
+
+        self.assertEqual("timeout", result.stop_reason)
+        self.assertLess(result.seconds, 10)
+        self.assertEqual(result.num_solutions, len(solver.solutions))
+
+        with self.assertRaises(ValueError):
+            solver.solve(max_nodes=100)
+
+
+if __name__ == '__main__':
+    unittest.main()
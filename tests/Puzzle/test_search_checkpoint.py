@@ -0,0 +1,154 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from generate import generate_faces
+from puzzle.cp_solver import ConstraintPuzzleSolver
+from puzzle.puzzle import Puzzle
+from puzzle.puzzle_solver import PuzzleSolver
+from puzzle.search_budget import SolveResult
+from puzzle.search_checkpoint import SearchCheckpoint
+
+
+def create_puzzle(cols: int, rows: int, faces_range_max: int, seed: int) -> Puzzle:
+    puzzle = Puzzle()
+    puzzle.set_cols(cols)
+    puzzle.set_rows(rows)
+    puzzle.set_faces([int(face) for piece in generate_faces(cols, rows, 1, faces_range_max, seed)
+                      for face in piece])
+    return puzzle
+
+
+class SearchCheckpointTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "checkpoint.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def solve_in_steps(self, puzzle: Puzzle, expand_identical: bool, bitmask_kernel: bool, **budget) -> list:
+        # Stop the solve again and again, resuming it from its checkpoint
+        solutions = []
+        resume = False
+        while True:
+            solver = PuzzleSolver(puzzle, expand_identical, bitmask_kernel=bitmask_kernel)
+            result = solver.solve(checkpoint=SearchCheckpoint(self.path, interval=0),
+                                  resume=resume, **budget)
+            solutions.extend(solver.solutions)
+            if result.is_complete():
+                return solutions
+            if "max_solutions" in budget:
+                budget["max_solutions"] += 1
+            resume = True
+
+    def test_resume(self):
+        # Identical pieces make expanded solutions to resume from
+        puzzle = create_puzzle(2, 6, 2, seed=4)
+        for bitmask_kernel in [True, False]:
+            with mock.patch("puzzle.search_budget.BUDGET_CHECK_INTERVAL", 3):
+                for expand_identical in [True, False]:
+                    solver = PuzzleSolver(puzzle, expand_identical, bitmask_kernel=bitmask_kernel)
+                    solver.solve()
+                    self.assertGreater(len(solver.solutions), 1)
+
+                    for budget in [{"max_nodes": 3}, {"max_solutions": 1}]:
+                        solutions = self.solve_in_steps(puzzle, expand_identical, bitmask_kernel,
+                                                        **budget)
+                        self.assertEqual(list(solver.solutions), solutions)
+
+    def test_resume_after_cancel(self):
+        puzzle = create_puzzle(6, 6, 2, seed=1)
+        cancel_token = threading.Event()
+        cancel_token.set()
+        solver = PuzzleSolver(puzzle)
+        result = solver.solve(cancel_token=cancel_token, checkpoint=SearchCheckpoint(self.path))
+        self.assertEqual("cancelled", result.stop_reason)
+
+        with open(self.path) as file:
+            state = json.load(file)
+        self.assertFalse(state["complete"])
+        self.assertEqual(len(state["cursors"]), len(state["used_pieces"]))
+
+        # The resumed solve finds the first solutions the cancelled one did not
+        full_solver = PuzzleSolver(puzzle)
+        full_solver.solve(max_solutions=10)
+        resumed_solver = PuzzleSolver(puzzle)
+        result = resumed_solver.solve(max_solutions=10, checkpoint=SearchCheckpoint(self.path),
+                                      resume=True)
+        self.assertEqual(10, result.num_solutions)
+        self.assertEqual(list(full_solver.solutions), list(resumed_solver.solutions))
+
+    def test_resume_after_crash(self):
+        puzzle = create_puzzle(2, 6, 2, seed=4)
+        solver = PuzzleSolver(puzzle)
+        solver.solve()
+
+        # Saved at every check, then stopped without the last save
+        result = SolveResult()
+        solutions = PuzzleSolver(puzzle).iter_within_budget(
+            result, checkpoint=SearchCheckpoint(self.path, interval=0))
+        for _ in range(5):
+            next(solutions)
+        solutions.close()
+        self.assertIsNone(result.stop_reason)
+
+        # The fifth solution was handed out, but the search never got back
+        resumed_solver = PuzzleSolver(puzzle)
+        result = resumed_solver.solve(checkpoint=SearchCheckpoint(self.path), resume=True)
+        self.assertEqual(len(solver.solutions), result.num_solutions)
+        self.assertEqual(list(solver.solutions)[4:], list(resumed_solver.solutions))
+
+    def test_resume_output(self):
+        puzzle = Puzzle.load_puzzle("puzzles/2x10.txt")
+        output_path = os.path.join(self.directory.name, "solutions.json")
+        with open(output_path, 'w') as file:
+            result = PuzzleSolver(puzzle).write_solutions(
+                file, "json", max_solutions=1,
+                checkpoint=SearchCheckpoint(self.path, output=file))
+            # Written after the checkpoint, dropped when resuming
+            file.write("[]\n")
+        self.assertEqual("max_solutions", result.stop_reason)
+
+        with open(self.path) as file:
+            output_offset = json.load(file)["output_offset"]
+        with open(output_path, 'r+') as file:
+            file.seek(output_offset)
+            file.truncate()
+            result = PuzzleSolver(puzzle).write_solutions(
+                file, "json", checkpoint=SearchCheckpoint(self.path, output=file),
+                resume=True)
+        self.assertTrue(result.is_complete())
+
+        solver = PuzzleSolver(puzzle)
+        solver.solve()
+        with open(output_path) as file:
+            solutions = [[[tuple(placement) for placement in row] for row in json.loads(line)]
+                         for line in file]
+        self.assertEqual(list(solver.solutions), solutions)
+        self.assertEqual(len(solutions), result.num_solutions)
+
+        # A complete checkpoint resumes to nothing
+        resumed_solver = PuzzleSolver(puzzle)
+        result = resumed_solver.solve(checkpoint=SearchCheckpoint(self.path), resume=True)
+        self.assertTrue(result.is_complete())
+        self.assertEqual(0, len(resumed_solver.solutions))
+
+    def test_invalid_checkpoint(self):
+        PuzzleSolver(Puzzle.load_puzzle("puzzles/4x4.txt")).solve(
+            max_nodes=5, checkpoint=SearchCheckpoint(self.path))
+        with self.assertRaises(ValueError):
+            PuzzleSolver(Puzzle.load_puzzle("puzzles/5x5.txt")).solve(
+                checkpoint=SearchCheckpoint(self.path), resume=True)
+        with self.assertRaises(ValueError):
+            PuzzleSolver(Puzzle.load_puzzle("puzzles/4x4.txt"), expand_identical=False).solve(
+                checkpoint=SearchCheckpoint(self.path), resume=True)
+        with self.assertRaises(ValueError):
+            ConstraintPuzzleSolver(Puzzle.load_puzzle("puzzles/4x4.txt")).solve(
+                checkpoint=SearchCheckpoint(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
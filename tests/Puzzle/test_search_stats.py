@@ -0,0 +1,73 @@
+import unittest
+from puzzle.cp_solver import ConstraintPuzzleSolver
+from puzzle.puzzle import Puzzle
+from puzzle.puzzle_solver import PuzzleSolver
+from puzzle.search_stats import SearchStats
+
+
+class SearchStatsTest(unittest.TestCase):
+    def test_counters(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        for bitmask_kernel in [True, False]:
+            stats = SearchStats()
+            solver = PuzzleSolver(puzzle, stats=stats, bitmask_kernel=bitmask_kernel)
+            solver.solve()
+
+            self.assertEqual(solver.num_nodes, stats.num_nodes)
+            self.assertEqual(2, stats.num_solutions)
+            self.assertIsNotNone(stats.first_solution_seconds)
+            self.assertLessEqual(stats.first_solution_seconds, stats.seconds)
+            self.assertEqual(16, len(stats.backtracks))
+            self.assertGreater(sum(stats.backtracks), 0)
+            self.assertEqual(stats.num_nodes,
+                             sum(stats.tried.values()) - sum(stats.rejected.values()))
+
+    def test_kernels_count_tries_alike(self):
+        # None of these puzzles is pruned by the bitmask kernel's forward check
+        for path in ["puzzles/1x5.txt", "puzzles/5x1.txt", "puzzles/5x6.txt"]:
+            puzzle = Puzzle.load_puzzle(path)
+            counters = []
+            for bitmask_kernel in [True, False]:
+                stats = SearchStats()
+                solver = PuzzleSolver(puzzle, stats=stats, bitmask_kernel=bitmask_kernel)
+                solver.solve()
+                self.assertEqual(bitmask_kernel, solver.use_bitmask_kernel)
+                counters.append((stats.num_nodes, stats.tried, stats.rejected))
+
+            self.assertEqual(counters[0], counters[1])
+
+    def test_stats_match_without_stats(self):
+        puzzle = Puzzle.load_puzzle("puzzles/7x7.txt")
+        solver = ConstraintPuzzleSolver(puzzle)
+        solver.solve()
+        stats = SearchStats()
+        stats_solver = ConstraintPuzzleSolver(puzzle, stats=stats)
+        stats_solver.solve()
+
+        self.assertEqual(solver.solutions, stats_solver.solutions)
+        self.assertEqual(solver.num_nodes, stats.num_nodes)
+        self.assertEqual(stats.num_nodes,
+                         sum(stats.tried.values()) - sum(stats.rejected.values()))
+
+    def test_hooks(self):
+        events = []
+        stats = SearchStats(progress_interval=10)
+        stats.add_hook(lambda event, stats: events.append(event))
+        solver = PuzzleSolver(Puzzle.load_puzzle("puzzles/4x4.txt"), stats=stats)
+        solver.solve()
+
+        self.assertEqual("start", events[0])
+        self.assertEqual("finish", events[-1])
+        self.assertEqual(2, events.count("solution"))
+        self.assertEqual(stats.num_nodes // 10, events.count("progress"))
+
+    def test_count_solutions(self):
+        stats = SearchStats()
+        solver = PuzzleSolver(Puzzle.load_puzzle("puzzles/3x8.txt"), stats=stats)
+
+        self.assertEqual(solver.count_solutions(), stats.num_solutions)
+        self.assertEqual(solver.num_nodes, stats.num_nodes)
+
+
+if __name__ == '__main__':
+    unittest.main()
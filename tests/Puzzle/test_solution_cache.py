@@ -0,0 +1,194 @@
+import glob
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+from puzzle.compact_piece import CompactPiece
+from puzzle.puzzle import Puzzle
+from puzzle.puzzle_piece import PuzzlePiece
+from puzzle.puzzle_solver import PuzzleSolver
+from puzzle.search_stats import SearchStats
+from puzzle.solution_cache import CachedPuzzleSolver, SolutionCache, canonicalize
+
+
+def shuffle_puzzle(puzzle, seed, shuffle=True):
+    """
+    Copy a puzzle with its pieces shuffled, rotated and renumbered.
+    """
+    rng = random.Random(seed)
+    pieces = [piece.get_faces() for piece in puzzle.get_pieces()]
+    if shuffle:
+        rng.shuffle(pieces)
+    shuffled = Puzzle()
+    shuffled.set_cols(puzzle.get_cols())
+    shuffled.set_rows(puzzle.get_rows())
+    shuffled.set_pieces([PuzzlePiece(100 + piece_id,
+                                     list(CompactPiece(0, faces).get_faces(rng.randint(0, 3))))
+                         for piece_id, faces in enumerate(pieces)])
+    return shuffled
+
+
+def is_solution(puzzle, solution):
+    """
+    Check that a solution uses every piece once and that its faces match.
+    """
+    pieces = {piece.get_id(): piece for piece in puzzle.get_compact_pieces()}
+    faces = [[pieces[piece_id].get_faces(rotation) for piece_id, rotation in row]
+             for row in solution]
+    rows, cols = len(faces), len(faces[0])
+    used_ids = sorted(piece_id for row in solution for piece_id, _ in row)
+    return used_ids == sorted(pieces) and all(
+        faces[row][col][2] == (faces[row][col + 1][0] if col + 1 < cols else 0)
+        and faces[row][col][3] == (faces[row + 1][col][1] if row + 1 < rows else 0)
+        and (col or faces[row][col][0] == 0) and (row or faces[row][col][1] == 0)
+        for row in range(rows) for col in range(cols))
+
+
+def normalize_solutions(puzzle, solutions):
+    """
+    Sort solutions, with each piece turned to its first rotation with the
+    same faces.
+    """
+    pieces = {piece.get_id(): piece for piece in puzzle.get_compact_pieces()}
+    return sorted([[(piece_id, pieces[piece_id].rotations.index(pieces[piece_id].rotations[rotation]))
+                    for piece_id, rotation in row]
+                   for row in solution]
+                  for solution in solutions)
+
+
+class SolutionCacheTest(unittest.TestCase):
+    def test_fingerprint_ignores_order_and_rotation(self):
+        puzzle = Puzzle.load_puzzle("puzzles/5x6.txt")
+        fingerprint, canonical_puzzle, origins = canonicalize(puzzle)
+        shuffled_fingerprint, _, _ = canonicalize(shuffle_puzzle(puzzle, 3))
+
+        self.assertEqual(fingerprint, shuffled_fingerprint)
+        self.assertNotEqual(fingerprint,
+                            canonicalize(Puzzle.load_puzzle("puzzles/6x5.txt"))[0])
+        self.assertEqual(sorted(piece.get_id() for piece in puzzle.get_pieces()),
+                         sorted(piece_id for piece_id, _ in origins))
+
+    def test_cached_solutions(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        solver = PuzzleSolver(puzzle)
+        solver.solve()
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SolutionCache(os.path.join(directory, "cache.db"))
+            cached_solver = CachedPuzzleSolver(puzzle, cache)
+            cached_solver.solve()
+            self.assertFalse(cached_solver.cache_hit)
+            self.assertEqual(1, len(cache))
+
+            # Rotated pieces in the same order fix the same corner
+            rotated = shuffle_puzzle(puzzle, 5, shuffle=False)
+            rotated_solver = CachedPuzzleSolver(rotated, cache)
+            rotated_solver.solve()
+            self.assertTrue(rotated_solver.cache_hit)
+
+            # A copy that fixes another corner is solved and cached on its own
+            fixed_corners = set()
+            for seed in range(8):
+                shuffled = shuffle_puzzle(puzzle, seed)
+                corner, _ = solver.find_fixed_corner_piece(shuffled.get_compact_pieces())
+                fixed_corners.add(min(corner.rotations))
+                CachedPuzzleSolver(shuffled, cache).solve()
+            self.assertGreater(len(fixed_corners), 1)
+            corner, _ = solver.find_fixed_corner_piece(puzzle.get_compact_pieces())
+            self.assertEqual(len(fixed_corners | {min(corner.rotations)}), len(cache))
+            cache.close()
+
+        self.assertEqual(solver.solutions, cached_solver.solutions)
+        expected_solver = PuzzleSolver(rotated)
+        expected_solver.solve()
+        self.assertEqual(expected_solver.solutions, rotated_solver.solutions)
+
+    def test_bundled_puzzles(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SolutionCache(os.path.join(directory, "cache.db"))
+            for path in sorted(glob.glob("puzzles/*.txt")):
+                puzzle = Puzzle.load_puzzle(path)
+                copies = [puzzle, puzzle, shuffle_puzzle(puzzle, 1, shuffle=False)]
+                copies += [shuffle_puzzle(puzzle, seed) for seed in range(3)]
+                for index, copy in enumerate(copies):
+                    solver = PuzzleSolver(copy)
+                    solver.solve()
+                    cached_solver = CachedPuzzleSolver(copy, cache)
+                    cached_solver.solve()
+                    self.assertEqual(len(solver.solutions), len(cached_solver.solutions), path)
+                    self.assertEqual(normalize_solutions(copy, solver.solutions),
+                                     normalize_solutions(copy, cached_solver.solutions), path)
+                    for solution in cached_solver.solutions:
+                        self.assertTrue(is_solution(copy, solution), path)
+                    # The same copy again is read from the cache
+                    cached_solver = CachedPuzzleSolver(copy, cache)
+                    cached_solver.solve()
+                    self.assertTrue(cached_solver.cache_hit, path)
+                    self.assertEqual(normalize_solutions(copy, solver.solutions),
+                                     normalize_solutions(copy, cached_solver.solutions), path)
+            cache.close()
+
+    def test_stats_on_cache_hit(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        events = []
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SolutionCache(os.path.join(directory, "cache.db"))
+            CachedPuzzleSolver(puzzle, cache).solve()
+            stats = SearchStats()
+            stats.num_solutions = 5
+            stats.add_hook(lambda event, stats: events.append(event))
+            solver = CachedPuzzleSolver(shuffle_puzzle(puzzle, 2, shuffle=False), cache)
+            solver.stats = stats
+            solver.solve()
+            self.assertTrue(solver.cache_hit)
+            cache.close()
+
+        self.assertEqual(len(solver.solutions), stats.num_solutions)
+        self.assertEqual(0, stats.num_nodes)
+        self.assertEqual(16, len(stats.backtracks))
+        self.assertEqual("start", events[0])
+        self.assertEqual("finish", events[-1])
+        self.assertGreater(stats.seconds, 0)
+
+    def test_partial_solve_is_not_cached(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SolutionCache(os.path.join(directory, "cache.db"))
+            solver = CachedPuzzleSolver(Puzzle.load_puzzle("puzzles/4x4.txt"), cache)
+            solver.solve(max_solutions=1)
+            del solver
+            self.assertEqual(0, len(cache))
+            cache.close()
+
+    def test_solutions_too_large_are_not_buffered(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SolutionCache(os.path.join(directory, "cache.db"), max_bytes=200)
+            solver = CachedPuzzleSolver(puzzle, cache)
+            with mock.patch.object(cache, "put") as put:
+                solver.solve()
+            # One solution fits in max_bytes, both do not
+            self.assertEqual(2, len(solver.solutions))
+            put.assert_not_called()
+            cache.close()
+
+    def test_evicts_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SolutionCache(os.path.join(directory, "cache.db"), max_bytes=50)
+            cache.put("a", {"solutions": [1] * 5})
+            cache.put("b", {"solutions": [2] * 5})
+            self.assertIsNotNone(cache.get("a"))
+            cache.put("c", {"solutions": [3] * 5})
+
+            self.assertIn("a", cache)
+            self.assertNotIn("b", cache)
+            self.assertIn("c", cache)
+
+            # Too large to be cached at all
+            cache.put("d", {"solutions": [4] * 50})
+            self.assertNotIn("d", cache)
+            cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
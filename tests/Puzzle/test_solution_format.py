@@ -0,0 +1,79 @@
+import io
+import json
+import unittest
+from unittest import mock
+from puzzle.puzzle import Puzzle
+from puzzle.puzzle_format import PuzzleFormatError
+from puzzle.puzzle_solver import PuzzleSolver
+from puzzle.solution_format import (CELL_SIZE, PackedSolutions, SOLUTION_HEADER,
+                                    pack_solution, read_binary_solutions,
+                                    unpack_solution, write_solutions)
+
+
+class SolutionFormatTest(unittest.TestCase):
+    def test_pack_solution(self):
+        solution = [[(5, 2), (70000, 3)], [(1, 0), (2, 1)]]
+        packed = pack_solution(solution)
+
+        self.assertEqual(4, packed.itemsize)
+        self.assertEqual(solution, unpack_solution(packed, 2))
+
+    def test_packed_solutions(self):
+        solutions = PackedSolutions(2, 1)
+        solutions.append([[(1, 0), (2, 3)]])
+        solutions.append([[(2, 1), (1, 2)]])
+
+        self.assertEqual(2, len(solutions))
+        self.assertEqual([[(2, 1), (1, 2)]], solutions[-1])
+        self.assertEqual([[[(1, 0), (2, 3)]]], solutions[:1])
+        self.assertEqual([[[(1, 0), (2, 3)]], [[(2, 1), (1, 2)]]], solutions)
+        self.assertIn([[(2, 1), (1, 2)]], solutions)
+        with self.assertRaises(IndexError):
+            solutions[2]
+
+    def test_write_solutions(self):
+        puzzle = Puzzle.load_puzzle("puzzles/4x4.txt")
+        solver = PuzzleSolver(puzzle)
+        solver.solve()
+
+        text = io.StringIO()
+        self.assertEqual(2, PuzzleSolver(puzzle).write_solutions(text).num_solutions)
+        self.assertEqual(solver.get_solutions_as_string(), text.getvalue())
+
+        lines = io.StringIO()
+        PuzzleSolver(puzzle).write_solutions(lines, "json")
+        self.assertEqual([[[list(placement) for placement in row] for row in solution]
+                          for solution in solver.solutions],
+                         [json.loads(line) for line in lines.getvalue().splitlines()])
+
+        data = io.BytesIO()
+        PuzzleSolver(puzzle).write_solutions(data, "binary", max_solutions=1)
+        self.assertEqual(SOLUTION_HEADER.size + 16 * 4, len(data.getvalue()))
+        cols, rows, solutions = read_binary_solutions(data.getvalue())
+        self.assertEqual((4, 4), (cols, rows))
+        self.assertEqual(solver.solutions[:1], list(solutions))
+
+    def test_read_binary_solutions_in_blocks(self):
+        self.assertEqual(4, CELL_SIZE)
+        solutions = [[[(piece_id, rotation), (piece_id + 1, 3 - rotation)]]
+                     for piece_id in range(1, 6) for rotation in range(4)]
+        data = io.BytesIO()
+        write_solutions(data, solutions, 2, 1, "binary")
+
+        # Three solutions per block, the last one partly filled
+        with mock.patch("puzzle.solution_format.READ_BLOCK_CELLS", 7):
+            _, _, read_solutions = read_binary_solutions(data.getvalue())
+            self.assertEqual(solutions, list(read_solutions))
+
+    def test_read_binary_solutions_errors(self):
+        data = io.BytesIO()
+        write_solutions(data, [[[(1, 0), (2, 0)]]], 2, 1, "binary")
+
+        with self.assertRaisesRegex(PuzzleFormatError, "do not fit"):
+            read_binary_solutions(data.getvalue()[:-1])
+        with self.assertRaisesRegex(PuzzleFormatError, "Not a binary"):
+            read_binary_solutions(b"PZLB" + data.getvalue()[4:])
+
+
+if __name__ == '__main__':
+    unittest.main()
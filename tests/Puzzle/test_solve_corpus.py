@@ -0,0 +1,120 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+from generate import generate_faces, write_puzzle
+from generate_corpus import generate_corpus
+from solve_corpus import iter_puzzle_paths, solve_corpus, solve_task
+from puzzle.puzzle import Puzzle
+from puzzle.puzzle_solver import PuzzleSolver
+
+
+class SolveCorpusTest(unittest.TestCase):
+    def test_solve_corpus(self):
+        paths = ["puzzles/4x4.txt", "puzzles/1x5.txt", "puzzles/3x7.txt"]
+        output = io.StringIO()
+        records = solve_corpus(paths, output, workers=2)
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+
+        self.assertEqual(records, lines)
+        self.assertEqual(sorted(paths), sorted(record["path"] for record in records))
+        for record in records:
+            solver = PuzzleSolver(Puzzle.load_puzzle(record["path"]))
+            solver.solve()
+            self.assertEqual("solved", record["status"])
+            self.assertEqual(len(solver.solutions), record["num_solutions"])
+            self.assertEqual([[list(placement) for placement in row]
+                              for row in solver.solutions[0]],
+                             record["first_solution"])
+            self.assertGreater(record["num_nodes"], 0)
+
+    def test_solve_task_timeout(self):
+        # Two face values give far too many solutions to enumerate
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "puzzle.txt")
+            write_puzzle(path, 6, 6, generate_faces(6, 6, 1, 2, seed=1), False)
+            record = solve_task((path, "backtrack", 0.1, None))
+
+        self.assertEqual("timeout", record["status"])
+        self.assertLess(record["seconds"], 5)
+        self.assertGreater(record["num_nodes"], 0)
+
+    def test_solve_task_capped(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "puzzle.txt")
+            write_puzzle(path, 6, 6, generate_faces(6, 6, 1, 2, seed=1), False)
+            record = solve_task((path, "backtrack", None, 5))
+
+        self.assertEqual("capped", record["status"])
+        self.assertEqual(5, record["num_solutions"])
+        self.assertIsNotNone(record["first_solution"])
+
+    def test_solve_task_error(self):
+        record = solve_task(("puzzles/missing.txt", "backtrack", None, None))
+        self.assertEqual("error", record["status"])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "puzzle.txt")
+            with open(path, 'w') as file:
+                file.write("2 1\n0 0 1\n")
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout):
+                record = solve_task((path, "backtrack", None, None))
+        self.assertEqual("error", record["status"])
+        self.assertEqual("", stdout.getvalue())
+
+    def test_solve_task_unsolvable(self):
+        # Face 1 cannot pair up
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "puzzle.txt")
+            with open(path, 'w') as file:
+                file.write("2 1\n0 0 1 0\n0 0 0 2\n")
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout):
+                record = solve_task((path, "backtrack", None, None))
+
+        self.assertEqual("unsolvable", record["status"])
+        self.assertTrue(record["reason"])
+        self.assertEqual("", stdout.getvalue())
+
+        # Faces pair up, but no arrangement fits
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "puzzle.txt")
+            with open(path, 'w') as file:
+                file.write("2 2\n0 0 1 1\n0 0 1 1\n0 0 1 1\n0 0 2 2\n")
+            record = solve_task((path, "backtrack", None, None))
+
+        self.assertEqual("unsolvable", record["status"])
+        self.assertEqual(0, record["num_solutions"])
+        self.assertTrue(record["reason"])
+
+    def test_solve_task_timeout_includes_load(self):
+        read_puzzle = Puzzle.read_puzzle
+
+        def slow_read_puzzle(path):
+            time.sleep(0.2)
+            return read_puzzle(path)
+
+        with mock.patch.object(Puzzle, "read_puzzle", side_effect=slow_read_puzzle):
+            record = solve_task(("puzzles/4x4.txt", "backtrack", 0.1, None))
+
+        self.assertEqual("timeout", record["status"])
+        self.assertEqual(0, record["num_solutions"])
+
+    def test_iter_puzzle_paths(self):
+        with tempfile.TemporaryDirectory() as directory:
+            records = generate_corpus(directory, [(3, 3)], [(1, 9)], 2,
+                                      seed=1, workers=1)
+            self.assertEqual([record["path"] for record in records],
+                             list(iter_puzzle_paths(directory)))
+            self.assertEqual([record["path"] for record in records],
+                             list(iter_puzzle_paths(
+                                 os.path.join(directory, "manifest.jsonl"))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+from puzzle.transposition_table import TranspositionTable
+
+
+class TranspositionTableTest(unittest.TestCase):
+    def test_add_and_contains(self):
+        table = TranspositionTable(2)
+        table.add((1, 0, (2, 3)))
+
+        self.assertIn((1, 0, (2, 3)), table)
+        self.assertNotIn((1, 0, (3, 2)), table)
+
+    def test_evicts_least_recently_used(self):
+        table = TranspositionTable(2)
+        table.add("a")
+        table.add("b")
+        self.assertIn("a", table)
+        table.add("c")
+
+        self.assertEqual(2, len(table))
+        self.assertIn("a", table)
+        self.assertNotIn("b", table)
+        self.assertIn("c", table)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            TranspositionTable(0)
+
+
+if __name__ == '__main__':
+    unittest.main()